@@ -0,0 +1,34 @@
+"""
+Microbenchmark of bearer token validation with and without the verified token cache.
+
+    python -m benchmarks.bench_auth
+"""
+import os
+import timeit
+
+os.environ["AUTH"] = "TRUE"
+
+from idp_schedule_provider.authentication import auth  # noqa: E402
+
+
+def main(number: int = 100_000) -> None:
+    token = auth.create_token().access_token
+
+    def uncached() -> None:
+        auth.verified_tokens.clear()
+        auth.validate_token(token)
+
+    def cached() -> None:
+        auth.validate_token(token)
+
+    baseline = min(timeit.repeat(auth.verified_tokens.clear, number=number, repeat=5))
+    results = {
+        "jwt.decode per request": min(timeit.repeat(uncached, number=number, repeat=5)) - baseline,
+        "verified token cache": min(timeit.repeat(cached, number=number, repeat=5)),
+    }
+    for name, seconds in results.items():
+        print(f"{name:<24}{seconds / number * 1e6:>8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark of the size and decode time of schedule data stored with each codec of the data column.
+
+    python -m benchmarks.bench_codec [rows]
+
+"json" is the format of the JSON column before the codecs.
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import timeit
+from typing import Any, Callable, Dict, List, Tuple
+
+from idp_schedule_provider.forecaster import codec
+
+
+def balanced(value: float) -> Dict[str, Any]:
+    return {"p": value, "q": value / 3}
+
+
+def unbalanced(value: float) -> Dict[str, Any]:
+    return {"p": {"A": value, "B": value * 1.01, "C": value * 0.99}, "q": value / 3}
+
+
+def cost_curve(value: float) -> Dict[str, Any]:
+    return {
+        "p": value,
+        "active_energy_cost": [{"x": value * step, "y": 10.0 + step} for step in range(3)],
+    }
+
+
+SHAPES: List[Tuple[str, Callable[[float], Dict[str, Any]]]] = [
+    ("balanced", balanced),
+    ("unbalanced", unbalanced),
+    ("cost curve", cost_curve),
+]
+
+
+def file_size(payloads: List[bytes]) -> float:
+    """MiB of a sqlite database of only the payloads"""
+    path = os.path.join(tempfile.mkdtemp(), "codec.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE schedule_data (id INTEGER PRIMARY KEY, data BLOB)")
+        connection.executemany(
+            "INSERT INTO schedule_data (data) VALUES (?)", ((data,) for data in payloads)
+        )
+    return os.path.getsize(path) / 2**20
+
+
+def main(rows: int = 100_000) -> None:
+    generator = random.Random(0)
+    print(f"{rows} rows")
+    print(f"{'':<24}{'size':>12}{'decode':>14}")
+    for shape, make_entry in SHAPES:
+        entries = [make_entry(generator.uniform(0, 5000)) for _ in range(rows)]
+        for name in codec.CODECS:
+            payloads = [codec.encode(entry, name) for entry in entries]
+
+            def decode() -> None:
+                for payload in payloads:
+                    codec.decode(payload)
+
+            elapsed = min(timeit.repeat(decode, number=1, repeat=3))
+            print(
+                f"{shape + ' ' + name:<24}{file_size(payloads):>8.1f} MiB"
+                f"{elapsed / rows * 1e6:>11.2f} us"
+            )
+
+
+if __name__ == "__main__":
+    main(*(int(argument) for argument in sys.argv[1:]))
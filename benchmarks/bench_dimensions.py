@@ -0,0 +1,142 @@
+"""
+Benchmark of the on-disk size and read speed of schedule data with the asset, feeder and scenario
+identifiers stored in every row (strings) against integer keys of dimension tables.
+
+    python -m benchmarks.bench_dimensions [assets] [days]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import timeit
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, List, Tuple
+
+from sqlalchemy import create_engine
+
+from idp_schedule_provider.forecaster.models import Base
+
+FEEDERS = 4
+# the schema before the dimension tables, with the same indexes
+STRING_SCHEMA = """
+CREATE TABLE scenarios (id VARCHAR PRIMARY KEY, name VARCHAR UNIQUE, description VARCHAR);
+CREATE TABLE schedule_data (
+    id INTEGER PRIMARY KEY,
+    scenario_id VARCHAR REFERENCES scenarios (id),
+    asset_name VARCHAR,
+    feeder VARCHAR,
+    data JSON,
+    timestamp DATETIME
+);
+CREATE INDEX ix_schedule_data_asset_name ON schedule_data (asset_name);
+CREATE INDEX ix_schedule_data_feeder ON schedule_data (feeder);
+CREATE INDEX ix_schedule_data_timestamp ON schedule_data (timestamp);
+CREATE INDEX ix_schedule_data_scenario_asset_timestamp
+    ON schedule_data (scenario_id, asset_name, timestamp);
+"""
+STRING_READ = """
+SELECT asset_name, timestamp, data FROM schedule_data
+WHERE scenario_id = ? AND timestamp BETWEEN ? AND ? AND feeder IN (?, ?)
+ORDER BY asset_name, timestamp
+"""
+STRING_TIMESPAN = """
+SELECT asset_name, min(timestamp), max(timestamp) FROM schedule_data
+WHERE scenario_id = ? GROUP BY asset_name
+"""
+KEY_READ = """
+SELECT assets.name, schedule_data.timestamp, schedule_data.data
+FROM schedule_data JOIN assets ON schedule_data.asset_key = assets.key
+WHERE schedule_data.scenario_key = (SELECT key FROM scenarios WHERE id = ?)
+    AND schedule_data.timestamp BETWEEN ? AND ?
+    AND schedule_data.feeder_key IN (SELECT key FROM feeders WHERE name IN (?, ?))
+ORDER BY assets.name, schedule_data.timestamp
+"""
+KEY_TIMESPAN = """
+SELECT assets.name, spans.min, spans.max
+FROM (
+    SELECT asset_key, min(timestamp) AS min, max(timestamp) AS max FROM schedule_data
+    WHERE scenario_key = (SELECT key FROM scenarios WHERE id = ?) GROUP BY asset_key
+) AS spans JOIN assets ON spans.asset_key = assets.key
+"""
+
+
+def synthetic_rows(assets: int, days: int) -> List[Tuple[str, str, str, str]]:
+    """(asset, feeder, data, timestamp) rows with uuid identifiers like the IEEE123 seed data"""
+    feeders = [str(uuid.uuid4()) for _ in range(FEEDERS)]
+    asset_names = [str(uuid.uuid4()) for _ in range(assets)]
+    start = datetime(2000, 1, 1)
+    return [
+        (
+            asset,
+            feeders[index % FEEDERS],
+            '{"p": 1.0, "q": 0.5}',
+            str(start + timedelta(hours=hour)),
+        )
+        for index, asset in enumerate(asset_names)
+        for hour in range(days * 24)
+    ]
+
+
+def string_database(path: str, scenario: str, rows: List[Tuple[str, str, str, str]]) -> None:
+    with sqlite3.connect(path) as connection:
+        connection.executescript(STRING_SCHEMA)
+        connection.execute("INSERT INTO scenarios (id, name) VALUES (?, ?)", (scenario, scenario))
+        connection.executemany(
+            "INSERT INTO schedule_data (scenario_id, asset_name, feeder, data, timestamp) "
+            "VALUES (?, ?, ?, ?, ?)",
+            ((scenario, *row) for row in rows),
+        )
+
+
+def key_database(path: str, scenario: str, rows: List[Tuple[str, str, str, str]]) -> None:
+    Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    assets = {asset: key for key, asset in enumerate(sorted({row[0] for row in rows}), 1)}
+    feeders = {feeder: key for key, feeder in enumerate(sorted({row[1] for row in rows}), 1)}
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "INSERT INTO scenarios (key, id, name) VALUES (1, ?, ?)", (scenario,) * 2
+        )
+        for table, members in (("assets", assets), ("feeders", feeders)):
+            connection.executemany(
+                f"INSERT INTO {table} (key, name) VALUES (?, ?)",
+                ((key, member) for member, key in members.items()),
+            )
+        connection.executemany(
+            "INSERT INTO schedule_data (scenario_key, asset_key, feeder_key, data, timestamp) "
+            "VALUES (1, ?, ?, ?, ?)",
+            ((assets[asset], feeders[feeder], data, ts) for asset, feeder, data, ts in rows),
+        )
+
+
+def main(assets: int = 500, days: int = 30) -> None:
+    scenario = str(uuid.uuid4())
+    rows = synthetic_rows(assets, days)
+    feeders = sorted({row[1] for row in rows})[:2]
+    read_parameters = (scenario, "2000-01-02 00:00:00", "2000-01-09 00:00:00", *feeders)
+    print(f"{len(rows)} rows, {assets} assets, {FEEDERS} feeders")
+
+    directory = tempfile.mkdtemp()
+    layouts: List[Tuple[str, Callable, str, str]] = [
+        ("string ids", string_database, STRING_READ, STRING_TIMESPAN),
+        ("integer keys", key_database, KEY_READ, KEY_TIMESPAN),
+    ]
+    print(f"{'':<14}{'size':>12}{'read':>12}{'timespan':>12}")
+    for name, build, *statements in layouts:
+        path = os.path.join(directory, f"{name.replace(' ', '_')}.db")
+        build(path, scenario, rows)
+        timings = []
+        with sqlite3.connect(path) as connection:
+            connection.execute("VACUUM")
+            for statement, parameters in zip(statements, (read_parameters, (scenario,))):
+
+                def read() -> None:
+                    connection.execute(statement, parameters).fetchall()
+
+                timings.append(min(timeit.repeat(read, number=5, repeat=3)) / 5)
+        size = os.path.getsize(path) / 2**20
+        print(f"{name:<14}{size:>8.1f} MiB" + "".join(f"{t * 1000:>9.1f} ms" for t in timings))
+
+
+if __name__ == "__main__":
+    main(*(int(argument) for argument in sys.argv[1:]))
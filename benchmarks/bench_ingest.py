@@ -0,0 +1,88 @@
+"""
+Benchmark of schedule ingest throughput through the ORM and through the bulk writer.
+
+    python -m benchmarks.bench_ingest [database url] [rows]
+
+The database defaults to a temporary sqlite file, its tables are dropped and created.
+"""
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from idp_schedule_provider.forecaster import bulk
+from idp_schedule_provider.forecaster.models import (
+    Assets,
+    Base,
+    Feeders,
+    Scenarios,
+    ScheduleData,
+)
+
+KEY = ("scenario_key", "feeder_key", "asset_key", "timestamp")
+ASSETS = 100
+
+
+def synthetic_rows(count: int, value: float) -> List[bulk.Row]:
+    start = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    return [
+        dict(
+            scenario_key=1,
+            feeder_key=1,
+            asset_key=row % ASSETS + 1,
+            timestamp=start + timedelta(hours=row // ASSETS),
+            data={"p": value, "q": {"A": value, "B": value, "C": value}},
+        )
+        for row in range(count)
+    ]
+
+
+def orm_insert(db: Session, rows: List[bulk.Row]) -> None:
+    db.add_all(ScheduleData(**row) for row in rows)
+    db.flush()
+
+
+def orm_update(db: Session, rows: List[bulk.Row]) -> None:
+    for row in rows:
+        db.query(ScheduleData).filter_by(**{column: row[column] for column in KEY}).update(
+            {"data": row["data"]}, synchronize_session=False
+        )
+
+
+def bulk_insert(db: Session, rows: List[bulk.Row]) -> None:
+    bulk.insert(db, ScheduleData.__table__, rows)
+
+
+def bulk_update(db: Session, rows: List[bulk.Row]) -> None:
+    bulk.update(db, ScheduleData.__table__, rows, key=KEY)
+
+
+def main(url: str = "", count: int = 20_000) -> None:
+    url = url or f"sqlite:///{tempfile.mkdtemp()}/ingest.db"
+    engine = create_engine(url)
+    print(f"{engine.dialect.name}, {count} rows")
+
+    for writers in ([orm_insert, orm_update], [bulk_insert, bulk_update]):
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        with Session(bind=engine) as db, db.begin():
+            db.add(Scenarios(key=1, id="bench", name="bench"))
+            db.add(Feeders(key=1, name="feeder"))
+            db.add_all(Assets(key=key, name=f"asset_{key}") for key in range(1, ASSETS + 1))
+
+        for writer, value in zip(writers, (1.0, 2.0)):
+            rows = synthetic_rows(count, value)
+            with Session(bind=engine) as db:
+                start = time.perf_counter()
+                with db.begin():
+                    writer(db, rows)
+                elapsed = time.perf_counter() - start
+            print(f"{writer.__name__:<12}{count / elapsed:>12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2], *(int(argument) for argument in sys.argv[2:3]))
@@ -0,0 +1,58 @@
+"""
+Benchmark of resampling a wide read in-process and in process pools of 2 to 8 workers.
+
+    python -m benchmarks.bench_resample [assets] [days]
+"""
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from idp_schedule_provider.forecaster import process_pool, resampler, series
+from idp_schedule_provider.forecaster.schemas import (
+    InterpolationMethod,
+    SamplingMode,
+    TimeInterval,
+)
+
+
+def synthetic_series(assets: int, days: int) -> series.ScheduleSeries:
+    start = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    time_stamps = [start + timedelta(hours=hour) for hour in range(days * 24)]
+    data = series.ScheduleSeries(TimeInterval.HOUR_1, series.to_times(time_stamps), {})
+    for asset in range(assets):
+        data.assets[f"asset_{asset}"] = asset_series = series.AssetSeries(len(time_stamps))
+        for position in range(len(time_stamps)):
+            asset_series.set_entry(
+                position, {"p": float(position % 24), "q": {"A": 1.0, "B": 2.0, "C": 3.0}}
+            )
+    return data
+
+
+def main(assets: int = 64, days: int = 90) -> None:
+    data = synthetic_series(assets, days)
+    arguments = (TimeInterval.MIN_15, InterpolationMethod.LINEAR, SamplingMode.HOLD_FIRST, data)
+    print(f"{assets} assets, {days} days, {data.size} values, {os.cpu_count()} cpus")
+
+    start = time.perf_counter()
+    resampler.resample_series(*arguments)
+    baseline = time.perf_counter() - start
+    print(f"{'in-process':<12}{baseline:>8.2f} s")
+
+    for workers in (2, 4, 8):
+        # the same workers as the service
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(process_pool.PRELOAD)
+        with ProcessPoolExecutor(workers, mp_context=context) as executor:
+            # start the workers before timing
+            list(executor.map(abs, range(workers)))
+            start = time.perf_counter()
+            resampler.resample_series(*arguments, executor=executor, shards=workers)
+            elapsed = time.perf_counter() - start
+        print(f"{f'{workers} workers':<12}{elapsed:>8.2f} s{baseline / elapsed:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(argument) for argument in sys.argv[1:]))
@@ -0,0 +1,159 @@
+"""
+Startup profile of a worker and the budget for the time from process start to the first 200 of `/`.
+
+    poetry run profile_startup [--runs 5] [--budget 5] [--top 15] [--output startup.json]
+
+The service is started the same way as `docker_scripts/init.sh` against an empty database. The
+budget is relative to a baseline measured on the same machine, the time of `python -c "import
+fastapi"`, so that it holds on slower or busier runners. Each of `--runs` starts is timed after a
+run of the baseline and the median start is checked against the budget times the median baseline,
+the command fails when it is over.
+One more start runs with `-X importtime` and PROFILE_STARTUP to report the import time of each
+module and package, and the duration of each init step of the worker.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess  # nosec
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.load_test import Client, start_server
+
+# the time from process start to the first 200 on `/` with one worker, in multiples of BASELINE
+BUDGET = 5.0
+BASELINE = [sys.executable, "-c", "import fastapi"]
+
+
+def baseline_time() -> float:
+    """seconds to run the baseline"""
+    start = time.perf_counter()
+    subprocess.run(BASELINE, check=True)  # nosec
+    return time.perf_counter() - start
+
+
+def time_to_first_response(
+    args: argparse.Namespace, env: Optional[Dict[str, str]] = None
+) -> Tuple[float, str]:
+    """seconds from process start to the first 200 on `/` and what the server wrote to stderr"""
+    with tempfile.TemporaryDirectory() as directory, tempfile.TemporaryFile("w+") as stderr:
+        start = time.perf_counter()
+        server = start_server(args, os.path.join(directory, "startup.db"), env, stderr=stderr)
+        try:
+            while Client(f"http://127.0.0.1:{args.port}").request("GET", "/") != 200:
+                if server.poll() is not None or time.perf_counter() - start > args.timeout:
+                    stderr.seek(0)
+                    raise RuntimeError(f"server did not become ready:\n{stderr.read()}")
+                time.sleep(0.005)
+            elapsed = time.perf_counter() - start
+        finally:
+            server.terminate()
+            server.wait()
+        stderr.seek(0)
+        return elapsed, stderr.read()
+
+
+def parse_profile(output: str) -> Tuple[Dict[str, int], Dict[str, int], List[Tuple[str, int]]]:
+    """
+    self and cumulative import microseconds by module, and the init steps, from the lines of
+    `-X importtime` and of PROFILE_STARTUP
+    """
+    self_times: Dict[str, int] = {}
+    cumulative_times: Dict[str, int] = {}
+    steps: List[Tuple[str, int]] = []
+    for line in output.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            self_time, cumulative, name = line[len("import time:") :].split("|")
+            if not self_time.strip().isdigit():
+                continue  # the header
+            # the master and the worker both import some modules, keep the slower import
+            name = name.strip()
+            self_times[name] = max(self_times.get(name, 0), int(self_time))
+            cumulative_times[name] = max(cumulative_times.get(name, 0), int(cumulative))
+        elif line.startswith("startup step:"):
+            duration, name = line[len("startup step:") :].split("|")
+            steps.append((name.strip(), int(duration)))
+    return self_times, cumulative_times, steps
+
+
+def print_profile(output: str, top: int) -> Dict[str, dict]:
+    self_times, cumulative_times, steps = parse_profile(output)
+    packages: Dict[str, int] = defaultdict(int)
+    for name, self_time in self_times.items():
+        packages[name.split(".")[0]] += self_time
+
+    print(f"\nimports of the master and the worker {sum(self_times.values()) / 1000:.1f} ms")
+    print(f"\n{'package':<48}{'self ms':>10}")
+    for name, self_time in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{name:<48}{self_time / 1000:>10.1f}")
+    print(f"\n{'module':<48}{'self ms':>10}{'cumulative ms':>15}")
+    for name, self_time in sorted(self_times.items(), key=lambda item: -item[1])[:top]:
+        print(f"{name:<48}{self_time / 1000:>10.1f}{cumulative_times[name] / 1000:>15.1f}")
+    print(f"\n{'init step':<48}{'ms':>10}")
+    for name, duration in steps:
+        print(f"{name:<48}{duration / 1000:>10.1f}")
+    return {
+        "packages_us": dict(packages),
+        "modules_us": self_times,
+        "steps_us": dict(steps),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--runs", type=int, default=5, help="starts timed against the budget")
+    parser.add_argument("--budget", type=float, default=BUDGET, help="multiple of the baseline")
+    parser.add_argument("--top", type=int, default=15, help="modules and packages reported")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", help="also write the results as json to this file")
+    args = parser.parse_args(argv)
+    # the server settings of docker_scripts/init.sh
+    args.workers, args.threads = 1, 4
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    baseline_times, times = [], []
+    for _ in range(args.runs):
+        baseline_times.append(baseline_time())
+        times.append(time_to_first_response(args)[0])
+    baseline = statistics.median(baseline_times)
+    median = statistics.median(times)
+    budget = args.budget * baseline
+
+    _, output = time_to_first_response(
+        args, {"PYTHONPROFILEIMPORTTIME": "1", "PROFILE_STARTUP": "true"}
+    )
+    profile = print_profile(output, args.top)
+
+    print(
+        f"\nprocess start to first 200 on /: {median:.3f} s (median of "
+        f"{', '.join(f'{elapsed:.3f}' for elapsed in times)}), budget {budget:.3f} s "
+        f"({args.budget:g} times the baseline of {baseline:.3f} s)"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                dict(
+                    profile,
+                    times=times,
+                    median=median,
+                    baseline_times=baseline_times,
+                    baseline=baseline,
+                    budget=budget,
+                ),
+                f,
+                indent=2,
+            )
+    if median > budget:
+        sys.exit(f"startup is over the budget by {median - budget:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
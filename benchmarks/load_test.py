@@ -0,0 +1,414 @@
+"""
+Reproducible load test for the schedule provider.
+
+Starts the service the same way as `docker_scripts/init.sh` (gunicorn with a uvicorn worker),
+seeds a synthetic scenario and then drives a weighted mix of API calls against it from a pool of
+client threads. Reports throughput, latency percentiles and error rate per operation, and the
+hit ratio and lookup latency of each cache tier of schedule reads.
+
+    poetry run load_test --duration 30 --concurrency 8 \\
+        --mix get_schedules=60,get_events=20,schedule_timespan=5,event_timespan=5,add_schedules=10
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import subprocess  # nosec
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+from urllib.request import urlopen
+
+SCENARIO_ID = "load_test"
+START = datetime(2022, 1, 1, tzinfo=timezone.utc)
+DEFAULT_MIX = "get_schedules=60,get_events=20,schedule_timespan=5,event_timespan=5,add_schedules=10"
+# a sample of the cache metrics, eg. idp_cache_requests_total{cache="series",result="hit"} 12.0
+CACHE_SAMPLE = re.compile(
+    r"^idp_cache_(requests_total|lookup_duration_seconds_(?:sum|count))"
+    r'\{cache="(\w+)",result="(\w+)"\} (\S+)$'
+)
+
+
+@dataclass
+class Scenario:
+    feeders: List[str]
+    assets: Dict[str, List[str]]
+    hours: int
+
+
+@dataclass
+class Result:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+
+class Client:
+    """a keep-alive http client, one per load generating thread"""
+
+    def __init__(self, base_url: str):
+        url = urlsplit(base_url)
+        self.connection = http.client.HTTPConnection(url.hostname or "", url.port, timeout=60)
+
+    def request(
+        self, method: str, path: str, params: Optional[dict] = None, body: Optional[dict] = None
+    ) -> int:
+        if params:
+            path = f"{path}?{urlencode(params, doseq=True)}"
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        payload = json.dumps(body) if body is not None else None
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            return 0
+
+
+def synthetic_schedules(assets: List[str], start: datetime, hours: int, rng: random.Random):
+    return {
+        "time_stamps": [(start + timedelta(hours=hour)).isoformat() for hour in range(hours)],
+        "assets": {
+            asset: [
+                {
+                    "p": rng.uniform(0, 1000),
+                    "q": {"A": rng.uniform(0, 100), "B": rng.uniform(0, 100), "C": None},
+                    "active_energy_cost": rng.uniform(0, 50),
+                }
+                for _ in range(hours)
+            ]
+            for asset in assets
+        },
+    }
+
+
+def synthetic_events(assets: List[str], hours: int, rng: random.Random):
+    events: Dict[str, list] = {}
+    for asset in assets:
+        events[asset] = []
+        for day in range(max(hours // 24, 1)):
+            start = START + timedelta(days=day, hours=rng.randrange(0, 20))
+            events[asset].append(
+                {
+                    "start_datetime": start.isoformat(),
+                    "end_datetime": (start + timedelta(hours=rng.randrange(1, 4))).isoformat(),
+                    "event_type": "electric_vehicle_charge",
+                    "pf": 0.9,
+                    "p_max": rng.uniform(1000, 10000),
+                }
+            )
+    return {"assets": events}
+
+
+def seed_scenario(client: Client, args: argparse.Namespace) -> Scenario:
+    rng = random.Random(args.seed)
+    feeders = [f"feeder_{index}" for index in range(args.feeders)]
+    assets = {
+        feeder: [f"{feeder}_asset_{index}" for index in range(args.assets_per_feeder)]
+        for feeder in feeders
+    }
+
+    status = client.request("PUT", f"/scenario/{SCENARIO_ID}", body={"name": "load test"})
+    if status != 204:
+        raise RuntimeError(f"failed to create the load test scenario ({status})")
+
+    for feeder in feeders:
+        body = synthetic_schedules(assets[feeder], START, args.hours, rng)
+        if client.request("POST", f"/{SCENARIO_ID}/asset_schedules/{feeder}", body=body) != 201:
+            raise RuntimeError(f"failed to seed schedules for {feeder}")
+        body = synthetic_events(assets[feeder], args.hours, rng)
+        if client.request("POST", f"/{SCENARIO_ID}/asset_events/{feeder}", body=body) != 201:
+            raise RuntimeError(f"failed to seed events for {feeder}")
+
+    return Scenario(feeders=feeders, assets=assets, hours=args.hours)
+
+
+def _window(scenario: Scenario, rng: random.Random) -> Tuple[str, str]:
+    start_hour = rng.randrange(0, scenario.hours)
+    end_hour = rng.randrange(start_hour, scenario.hours) + 1
+    return (
+        (START + timedelta(hours=start_hour)).isoformat(),
+        (START + timedelta(hours=end_hour) - timedelta(microseconds=1)).isoformat(),
+    )
+
+
+def _selection(scenario: Scenario, rng: random.Random) -> dict:
+    feeder = rng.choice(scenario.feeders)
+    if rng.random() < 0.5:
+        return {"asset_name": rng.choice(scenario.assets[feeder])}
+    return {"feeders": rng.sample(scenario.feeders, rng.randint(1, len(scenario.feeders)))}
+
+
+def get_schedules(client: Client, scenario: Scenario, rng: random.Random) -> int:
+    start, end = _window(scenario, rng)
+    params = {
+        "start_datetime": start,
+        "end_datetime": end,
+        "time_interval": rng.choice(["15 minutes", "30 minutes", "1 hour", "1 day", "1 month"]),
+        "interpolation_method": rng.choice(["linear", "last_observation_carried_forward"]),
+        "sampling_mode": rng.choice(["weighted_average", "hold_first_value"]),
+        **_selection(scenario, rng),
+    }
+    return client.request("GET", f"/{SCENARIO_ID}/asset_schedules", params)
+
+
+def get_events(client: Client, scenario: Scenario, rng: random.Random) -> int:
+    start, end = _window(scenario, rng)
+    params = {"start_datetime": start, "end_datetime": end, **_selection(scenario, rng)}
+    return client.request("GET", f"/{SCENARIO_ID}/asset_events", params)
+
+
+def schedule_timespan(client: Client, scenario: Scenario, rng: random.Random) -> int:
+    params = _selection(scenario, rng)
+    return client.request("GET", f"/{SCENARIO_ID}/asset_schedules/timespan", params)
+
+
+def event_timespan(client: Client, scenario: Scenario, rng: random.Random) -> int:
+    params = _selection(scenario, rng)
+    return client.request("GET", f"/{SCENARIO_ID}/asset_events/timespan", params)
+
+
+def add_schedules(client: Client, scenario: Scenario, rng: random.Random) -> int:
+    # rewrite a day of data for a single asset, updating existing rows
+    feeder = rng.choice(scenario.feeders)
+    start = START + timedelta(hours=rng.randrange(0, max(scenario.hours - 24, 1)))
+    body = synthetic_schedules([rng.choice(scenario.assets[feeder])], start, 24, rng)
+    return client.request("POST", f"/{SCENARIO_ID}/asset_schedules/{feeder}", body=body)
+
+
+OPERATIONS: Dict[str, Callable[[Client, Scenario, random.Random], int]] = {
+    "get_schedules": get_schedules,
+    "get_events": get_events,
+    "schedule_timespan": schedule_timespan,
+    "event_timespan": event_timespan,
+    "add_schedules": add_schedules,
+}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation `{name}`")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def run_load(
+    base_url: str, scenario: Scenario, args: argparse.Namespace
+) -> Tuple[Dict[str, Result], float]:
+    names = list(args.mix)
+    weights = [args.mix[name] for name in names]
+    results = {name: Result() for name in names}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def generate_load(worker: int) -> None:
+        rng = random.Random(f"{args.seed}-{worker}")
+        client = Client(base_url)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            operation_rng = rng
+            if args.distinct_reads and name == "get_schedules":
+                # repeat the same reads, as the clients of a hot scenario do
+                operation_rng = random.Random(f"{args.seed}-{rng.randrange(args.distinct_reads)}")
+            start = time.perf_counter()
+            status = OPERATIONS[name](client, scenario, operation_rng)
+            latency = time.perf_counter() - start
+            with lock:
+                results[name].latencies.append(latency)
+                if not 200 <= status < 300:
+                    results[name].errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        list(executor.map(generate_load, range(args.concurrency)))
+    return results, time.perf_counter() - start
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    rank = max(int(round(percent / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(results: Dict[str, Result], elapsed: float) -> Dict[str, dict]:
+    combined = Result()
+    for result in results.values():
+        combined.latencies.extend(result.latencies)
+        combined.errors += result.errors
+
+    summary = {}
+    for name, result in [*results.items(), ("total", combined)]:
+        latencies = sorted(result.latencies)
+        count = len(latencies)
+        summary[name] = {
+            "requests": count,
+            "throughput_rps": count / elapsed,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "error_rate": result.errors / count if count else 0.0,
+        }
+    return summary
+
+
+def print_summary(summary: Dict[str, dict]) -> None:
+    header = f"{'operation':<18}{'requests':>10}{'req/s':>10}{'p50 ms':>10}"
+    print(f"{header}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    for name, row in summary.items():
+        print(
+            f"{name:<18}{row['requests']:>10}{row['throughput_rps']:>10.1f}"
+            f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+            f"{row['error_rate']:>9.2%}"
+        )
+
+
+def cache_report(base_url: str) -> Dict[str, dict]:
+    """the hits, misses and mean lookup latency of each cache tier, as reported at /metrics"""
+    with urlopen(f"{base_url}/metrics", timeout=60) as response:  # nosec
+        text = response.read().decode()
+    samples: Dict[str, Dict[Tuple[str, str], float]] = {}
+    for line in text.splitlines():
+        match = CACHE_SAMPLE.match(line)
+        if match:
+            name, cache, result, value = match.groups()
+            samples.setdefault(name, {})[cache, result] = float(value)
+
+    report = {}
+    requests = samples.get("requests_total", {})
+    durations = samples.get("lookup_duration_seconds_sum", {})
+    lookups = samples.get("lookup_duration_seconds_count", {})
+    for cache in sorted({cache for cache, _ in requests}):
+        hits, misses = requests.get((cache, "hit"), 0), requests.get((cache, "miss"), 0)
+        duration = sum(value for (name, _), value in durations.items() if name == cache)
+        count = sum(value for (name, _), value in lookups.items() if name == cache)
+        report[cache] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            # the series cache counts hits and misses per chunk, its latency per read
+            "mean_lookup_ms": 1000 * duration / count if count else float("nan"),
+        }
+    return report
+
+
+def print_cache_report(report: Dict[str, dict]) -> None:
+    if not report:
+        return
+    print(f"\n{'cache':<18}{'hits':>10}{'misses':>10}{'hit ratio':>11}{'lookup ms':>11}")
+    for cache, row in report.items():
+        print(
+            f"{cache:<18}{row['hits']:>10.0f}{row['misses']:>10.0f}{row['hit_ratio']:>11.1%}"
+            f"{row['mean_lookup_ms']:>11.2f}"
+        )
+
+
+def start_server(
+    args: argparse.Namespace, database: str, env: Optional[Dict[str, str]] = None, **popen_args
+) -> subprocess.Popen:
+    # the same server settings as docker_scripts/init.sh
+    command = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "-k",
+        "uvicorn.workers.UvicornWorker",
+        "--workers",
+        str(args.workers),
+        "--threads",
+        str(args.threads),
+        "--bind",
+        f"127.0.0.1:{args.port}",
+        "--log-level=WARNING",
+        "idp_schedule_provider.main:app",
+    ]
+    env = {**os.environ, **(env or {}), "SQLALCHEMY_DATABASE_URL": f"sqlite:///{database}"}
+    return subprocess.Popen(command, env=env, **popen_args)  # nosec
+
+
+def wait_until_ready(base_url: str, timeout: float = 60) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if Client(base_url).request("GET", "/") == 200:
+            return
+        time.sleep(0.1)
+    raise RuntimeError(f"server at {base_url} did not become ready")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--feeders", type=int, default=4)
+    parser.add_argument("--assets-per-feeder", type=int, default=10)
+    parser.add_argument("--hours", type=int, default=24 * 7, help="hours of data per asset")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--distinct-reads", type=int, default=0, help="schedule reads to repeat, 0 for all random"
+    )
+    parser.add_argument(
+        "--cache-env",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="a cache setting of the started server, eg. SERIES_CACHE_BYTES=67108864",
+    )
+    parser.add_argument(
+        "--shared-cache", action="store_true", help="share reads between the workers of the server"
+    )
+    parser.add_argument("--output", help="also write the summary as json to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    server = None
+    with tempfile.TemporaryDirectory() as directory:
+        base_url = args.url
+        if base_url is None:
+            # /metrics merges the metrics of all workers for the cache report
+            metrics_dir = os.path.join(directory, "metrics")
+            os.mkdir(metrics_dir)
+            env = dict(setting.split("=", 1) for setting in args.cache_env)
+            env["METRICS_DIR"] = metrics_dir
+            if args.shared_cache:
+                env["SHARED_CACHE_PATH"] = os.path.join(directory, "shared_cache.db")
+            server = start_server(args, os.path.join(directory, "load_test.db"), env)
+            base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            wait_until_ready(base_url)
+            scenario = seed_scenario(Client(base_url), args)
+            results, elapsed = run_load(base_url, scenario, args)
+            caches = cache_report(base_url)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    summary = summarize(results, elapsed)
+    print_summary(summary)
+    print_cache_report(caches)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({**summary, "caches": caches}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
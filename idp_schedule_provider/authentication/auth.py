@@ -1,4 +1,7 @@
-import os
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, Optional
 
@@ -13,8 +16,6 @@ from fastapi.security.oauth2 import (
 from idp_schedule_provider import config
 from idp_schedule_provider.authentication import schemas
 
-settings: config.Settings = config.get_settings()
-
 
 class Oauth2ClientCredentials(OAuth2):
     def __init__(
@@ -53,32 +54,89 @@ class OAuth2ClientCredentialsRequestForm:
         self.client_secret = client_secret
 
 
+class VerifiedTokenCache:
+    """
+    A bounded LRU cache of tokens which have already been verified.
+
+    Entries are keyed by a digest of the token and expire at the token's `exp` claim or after
+    `ttl` seconds, whichever is first. Tokens are checked against the settings at the time they
+    were verified, so a change of signing key requires a restart.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def __contains__(self, token: str) -> bool:
+        key = self._key(token)
+        with self._lock:
+            expiry = self._entries.get(key)
+            if expiry is None:
+                return False
+            if expiry <= time.time():
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(self, token: str, claims: Dict) -> None:
+        expiry = time.time() + self.ttl
+        if "exp" in claims:
+            expiry = min(expiry, float(claims["exp"]))
+
+        with self._lock:
+            self._entries[self._key(token)] = expiry
+            self._entries.move_to_end(self._key(token))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_settings = config.get_settings()
+verified_tokens = VerifiedTokenCache(_settings.token_cache_size, _settings.token_cache_ttl)
+
+
 def authenticate_client(client_id: Optional[str], client_secret: Optional[str]) -> bool:
+    settings = config.get_settings()
     return client_id in settings.jwt_clients and settings.jwt_clients[client_id] == client_secret
 
 
 def validate_token(token: Optional[str] = Depends(oauth2_scheme)) -> bool:
-    if os.environ.get("AUTH") == "TRUE":
+    settings = config.get_settings()
+    if settings.auth_enabled:
         if not token:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Not authenticated",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        else:
+        elif token not in verified_tokens:
             try:
-                jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+                claims = jwt.decode(
+                    token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm]
+                )
             except (jwt.DecodeError, jwt.ExpiredSignatureError) as e:
                 raise HTTPException(
                     status_code=401,
                     detail="Invalid Credentials",
                     headers={"WWW-Authenticate": "Bearer"},
                 ) from e
+            verified_tokens.add(token, claims)
 
     return True
 
 
 def create_token() -> schemas.TokenResponseModal:
+    settings = config.get_settings()
     expiry = datetime.utcnow() + timedelta(days=1)
     token = jwt.encode({"exp": expiry}, settings.jwt_secret_key, settings.jwt_algorithm)
     return schemas.TokenResponseModal(
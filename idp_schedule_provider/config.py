@@ -1,7 +1,7 @@
 import json
 import os
 from functools import lru_cache
-from typing import Dict
+from typing import Dict, Literal, Optional
 
 from pydantic import BaseSettings
 
@@ -10,6 +10,59 @@ class Settings(BaseSettings):
     jwt_algorithm: str = os.getenv("JWT_ALG", "HS256")
     jwt_secret_key: str = os.getenv("JWT_SECRET_KEY", "INSECURE_SECRET_KEY")
     jwt_clients: Dict[str, str] = json.loads(os.getenv("JWT_CLIENTS", '{"gridos": "gridos_pw"}'))
+    # JWT auth is only enabled by exactly "TRUE", as when it was read from the environment (AUTH)
+    auth: str = ""
+    # verified tokens are cached for at most this many seconds (TOKEN_CACHE_TTL)
+    token_cache_ttl: float = 300
+    token_cache_size: int = 1024
+    # gaps in schedule data longer than this are not filled when resampling (RESAMPLE_MAX_GAP_HOURS)
+    resample_max_gap_hours: Optional[float] = None
+    # day, month and year buckets follow the calendar of this IANA timezone (CALENDAR_TIMEZONE)
+    calendar_timezone: str = "UTC"
+    # reads with at least this many values are resampled in a pool of this many processes
+    # (RESAMPLE_WORKERS, RESAMPLE_PARALLEL_THRESHOLD)
+    resample_workers: int = 1
+    resample_parallel_threshold: int = 500_000
+    # unpaginated reads of several feeders are split into up to this many concurrent queries, with
+    # at most FANOUT_POOL_SIZE queries running across all requests (FANOUT_SHARDS)
+    fanout_shards: int = 1
+    fanout_pool_size: int = 8
+    # put a sqlite primary database in write-ahead-log mode so that reads on other connections
+    # (eg. SQLALCHEMY_READ_DATABASE_URL) are not blocked by writes (SQLITE_WAL)
+    sqlite_wal: bool = False
+    # codec of the schedule and event data written to the database, "packed" or "json" (DATA_CODEC)
+    data_codec: Literal["packed", "json"] = "packed"
+    # upper bound for a single page of schedule/event data (PAGE_MAX_ROWS, PAGE_MAX_BYTES)
+    page_max_rows: Optional[int] = None
+    page_max_bytes: Optional[int] = None
+    # stream unpaginated schedule reads from the database cursor to the response (STREAM_SCHEDULES)
+    stream_schedules: bool = False
+    # directory of the memory mapped snapshots of frozen scenarios, which serve their unpaginated
+    # schedule reads (SNAPSHOT_DIR)
+    snapshot_dir: Optional[str] = None
+    # bytes of decoded schedule data each worker caches for unpaginated reads, 0 disables the cache
+    # (SERIES_CACHE_BYTES)
+    series_cache_bytes: int = 0
+    # sqlite database in which the workers of a host share resampled schedule reads, and the bytes
+    # of reads it keeps (SHARED_CACHE_PATH, SHARED_CACHE_BYTES)
+    shared_cache_path: Optional[str] = None
+    shared_cache_bytes: int = 256 * 2**20
+    # directory where each worker publishes its metrics so they can be aggregated (METRICS_DIR)
+    metrics_dir: Optional[str] = None
+    # expose per-request database timings in the Server-Timing response header (DEBUG)
+    debug: bool = False
+    # statements slower than this are logged with their query plan (SLOW_QUERY_THRESHOLD_MS)
+    slow_query_threshold_ms: Optional[float] = None
+    # requests with this value in the X-Profile header are profiled (PROFILING_TOKEN)
+    profiling_token: Optional[str] = None
+    # where request profiles are stored, defaults to the temp directory (PROFILE_DIR)
+    profile_dir: Optional[str] = None
+    # report the duration of each init step of a worker on stderr (PROFILE_STARTUP)
+    profile_startup: bool = False
+
+    @property
+    def auth_enabled(self) -> bool:
+        return self.auth == "TRUE"
 
 
 @lru_cache()
@@ -0,0 +1,94 @@
+"""
+Calendar aligned bucket edges for aggregating schedule data.
+
+Edges are computed once per (interval, year, timezone) and cached as sorted arrays of seconds
+since the epoch, so finding the buckets of a request is a binary search over those arrays.
+"""
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import List, Sequence, Tuple, Union
+from zoneinfo import ZoneInfo
+
+from idp_schedule_provider.forecaster import schemas
+
+CALENDAR_INTERVALS = (
+    schemas.TimeInterval.DAY_1,
+    schemas.TimeInterval.MONTH_1,
+    schemas.TimeInterval.YEAR_1,
+)
+
+
+def _timezone(tz_name: str) -> Union[timezone, ZoneInfo]:
+    return timezone.utc if tz_name == "UTC" else ZoneInfo(tz_name)
+
+
+@lru_cache(maxsize=512)
+def _year_edges(time_interval: schemas.TimeInterval, year: int, tz_name: str) -> "array[float]":
+    """the start of every bucket within a (local) calendar year"""
+    tz = _timezone(tz_name)
+    year_start = datetime(year, 1, 1, tzinfo=tz)
+    if time_interval == schemas.TimeInterval.DAY_1:
+        days = (datetime(year + 1, 1, 1) - datetime(year, 1, 1)).days
+        # aware datetime arithmetic is wall clock time so edges stay at local midnight
+        starts = [year_start + timedelta(days=day) for day in range(days)]
+    elif time_interval == schemas.TimeInterval.MONTH_1:
+        starts = [datetime(year, month, 1, tzinfo=tz) for month in range(1, 13)]
+    elif time_interval == schemas.TimeInterval.YEAR_1:
+        starts = [year_start]
+    else:
+        raise ValueError(f"{time_interval} is not a calendar interval")
+
+    return array("d", (start.timestamp() for start in starts))
+
+
+def bucket_edges(
+    time_interval: schemas.TimeInterval, first: float, last: float, tz_name: str = "UTC"
+) -> "array[float]":
+    """
+    Get the sorted edges of the buckets covering the times from `first` to `last` (in seconds
+    since the epoch), including the end edge of the last bucket.
+    """
+    tz = _timezone(tz_name)
+    first_year = datetime.fromtimestamp(first, tz).year
+    last_year = datetime.fromtimestamp(last, tz).year
+
+    edges: "array[float]" = array("d")
+    for year in range(first_year, last_year + 1):
+        edges.extend(_year_edges(time_interval, year, tz_name))
+    edges.append(datetime(last_year + 1, 1, 1, tzinfo=tz).timestamp())
+
+    # trim to the buckets containing first and last
+    start = max(bisect_right(edges, first) - 1, 0)
+    stop = bisect_right(edges, last) + 1
+    return edges[start:stop]
+
+
+def assign_buckets(edges: Sequence[float], times: Sequence[float]) -> List[int]:
+    """
+    Get the index of the bucket containing each of the (sorted) times.
+
+    The buckets of all times are assigned in a single merge of the two sorted arrays.
+    """
+    assignments = []
+    bucket = bisect_right(edges, times[0]) - 1 if times else 0
+    last_bucket = len(edges) - 2
+    for time in times:
+        while bucket < last_bucket and time >= edges[bucket + 1]:
+            bucket += 1
+        assignments.append(bucket)
+    return assignments
+
+
+def occupied_buckets(
+    edges: Sequence[float], times: Sequence[float]
+) -> List[Tuple[int, float, float]]:
+    """get the (index, start, end) of every bucket which contains at least one of the times"""
+    occupied = []
+    previous = -1
+    for bucket in assign_buckets(edges, times):
+        if bucket != previous:
+            occupied.append((bucket, edges[bucket], edges[bucket + 1]))
+            previous = bucket
+    return occupied
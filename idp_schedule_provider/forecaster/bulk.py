@@ -0,0 +1,180 @@
+"""
+Bulk writes of plain rows (dicts of column values) which skip the ORM unit of work.
+
+- postgresql: the rows are streamed with COPY, into the table itself for inserts and into a
+  temporary staging table which is merged into the table for updates and upserts
+- other databases (sqlite): one prepared statement executed for all rows (executemany)
+
+Either way the rows are written in the transaction of the session.
+"""
+import io
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import Table, TypeDecorator, and_, bindparam, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import expression
+
+from idp_schedule_provider import metrics
+
+Row = Dict[str, Any]
+
+
+def insert(db: Session, table: Table, rows: Sequence[Row]) -> None:
+    """insert the rows, which must all have the same columns"""
+    if not rows:
+        return
+
+    if db.get_bind().dialect.name == "postgresql":
+        _copy(db, table.name, table, rows)
+    else:
+        db.execute(table.insert(), rows)
+    metrics.ROWS_WRITTEN.inc(table.name, amount=len(rows))
+
+
+def update(db: Session, table: Table, rows: Sequence[Row], key: Sequence[str]) -> None:
+    """set the other columns of the rows of the table matching the `key` columns of each row"""
+    if not rows:
+        return
+
+    columns = [column for column in rows[0] if column not in key]
+    if db.get_bind().dialect.name == "postgresql":
+        staging = _stage(db, table, rows)
+        db.execute(
+            text(
+                f"UPDATE {table.name} SET "
+                + ", ".join(f"{column} = {staging}.{column}" for column in columns)
+                + f" FROM {staging} WHERE "
+                + " AND ".join(f"{table.name}.{column} = {staging}.{column}" for column in key)
+            )
+        )
+        db.execute(text(f"DROP TABLE {staging}"))
+    else:
+        # the bound names must differ from the column names
+        statement = (
+            table.update()
+            .where(and_(*(table.c[column] == bindparam(f"_{column}") for column in key)))
+            .values({column: bindparam(f"_{column}") for column in columns})
+        )
+        db.execute(
+            statement, [{f"_{column}": value for column, value in row.items()} for row in rows]
+        )
+    metrics.ROWS_WRITTEN.inc(table.name, amount=len(rows))
+
+    # objects already loaded in the session do not see the update
+    db.expire_all()
+
+
+def upsert(
+    db: Session,
+    table: Table,
+    rows: Sequence[Row],
+    key: Sequence[str],
+    index_elements: Optional[Sequence[Any]] = None,
+) -> None:
+    """
+    Insert the rows, or set the other columns of the existing row with the same `key` columns.
+
+    A unique index on `index_elements` (the key columns by default) must exist. Of rows with the
+    same key in `rows` the last one is written.
+    """
+    if not rows:
+        return
+
+    # a statement may not update the same row twice
+    rows = list({tuple(row[column] for column in key): row for row in rows}.values())
+    columns = list(rows[0])
+    if index_elements is None:
+        index_elements = key
+
+    postgres = db.get_bind().dialect.name == "postgresql"
+    statement: Any
+    if postgres:
+        staging = _stage(db, table, rows)
+        statement = postgresql.insert(table).from_select(
+            columns,
+            select([expression.column(name) for name in columns]).select_from(
+                expression.table(staging)
+            ),
+        )
+    else:
+        statement = sqlite.insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={name: statement.excluded[name] for name in columns if name not in key},
+    )
+    if postgres:
+        db.execute(statement)
+        db.execute(text(f"DROP TABLE {staging}"))
+    else:
+        db.execute(statement, rows)
+    metrics.ROWS_WRITTEN.inc(table.name, amount=len(rows))
+
+    # objects already loaded in the session do not see the update
+    db.expire_all()
+
+
+def _stage(db: Session, table: Table, rows: Sequence[Row]) -> str:
+    """COPY the rows into a new temporary table with the same columns and return its name"""
+    staging = f"{table.name}_staging"
+    db.execute(
+        text(
+            f"CREATE TEMPORARY TABLE {staging} AS "
+            f"SELECT {', '.join(rows[0])} FROM {table.name} WITH NO DATA"
+        )
+    )
+    _copy(db, staging, table, rows)
+    return staging
+
+
+def _copy(db: Session, target: str, table: Table, rows: Sequence[Row]) -> None:
+    """COPY the rows into `target`, which has (at least) the columns of the rows in `table`"""
+    connection = db.connection()
+    columns = list(rows[0])
+    dialect = connection.dialect
+    processors = [_copy_processor(table.c[column].type, dialect) for column in columns]
+
+    buffer = io.StringIO()
+    for row in rows:
+        values: List[str] = []
+        for column, processor in zip(columns, processors):
+            value = row[column]
+            if processor is not None:
+                value = processor(value)
+            values.append(_copy_text(value))
+        buffer.write("\t".join(values))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    # use the dbapi (psycopg2) cursor within the session's transaction
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {target} ({', '.join(columns)}) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+
+
+def _copy_processor(column_type: Any, dialect: Any) -> Optional[Callable[[Any], Any]]:
+    if isinstance(column_type, TypeDecorator):
+        # without the processor of the underlying type, which wraps bytes for the dbapi
+        return lambda value: column_type.process_bind_param(value, dialect)
+    return column_type.dialect_impl(dialect).bind_processor(dialect)
+
+
+def _copy_text(value: Any) -> str:
+    """format a value for the text format of COPY"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, bytes):
+        # bytea hex format, with the backslash escaped
+        return "\\\\x" + value.hex()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
@@ -0,0 +1,436 @@
+"""
+Encodings of the `data` column of schedule and event rows (a mapping of variable names to values).
+
+- json: the JSON text, as the column was stored before the codecs
+- packed: variable names from `VARIABLES` are stored as a one byte id and values are packed binary,
+  an entry of only floats is a list of ids followed by the float64 values
+
+Encoded entries start with the byte of their format, so rows of every format, including legacy JSON
+text, can be read whatever codec is used for writing (DATA_CODEC). Entries read from the database
+are decoded lazily, when their values are first used.
+"""
+import json
+import struct
+from abc import ABC, abstractmethod
+from collections import abc
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterator,
+    KeysView,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from sqlalchemy import LargeBinary, TypeDecorator
+
+from idp_schedule_provider import config
+
+Entry = Dict[str, Any]
+
+# append-only (up to 255 names), the position of a name (plus one) is its id in stored entries
+VARIABLES = (
+    "p",
+    "q",
+    "pf",
+    "load",
+    "load_pf",
+    "generation",
+    "generation_pf",
+    "active_energy_cost",
+    "reactive_energy_cost",
+    "capacitor_operation_cost",
+    "p_max",
+    "p_min",
+    "q_max",
+    "q_min",
+    "start_soc",
+    "total_battery_capacity",
+    "event_type",
+    "control_mode",
+    "status",
+    "state",
+    "A",
+    "B",
+    "C",
+    "x",
+    "y",
+    "min_SOC",
+    "max_SOC",
+    "tap_positions",
+    "tap_operation_cost",
+)
+_VARIABLE_IDS = {name: index for index, name in enumerate(VARIABLES, 1)}
+
+# first byte of the packed formats, JSON text never starts with these
+FLOATS = 0x01
+TAGGED = 0x02
+
+# value tags of the tagged format, _FLOATS is a mapping of known variables to floats and
+# _FLOATS_LIST a list of such mappings with the same variables (eg. the points of a cost curve)
+_NULL, _FALSE, _TRUE, _FLOAT, _INT, _STR, _LIST, _DICT, _FLOATS, _FLOATS_LIST = range(10)
+
+_DOUBLE = struct.Struct("<d")
+_INT64 = struct.Struct("<q")
+_INT64_MIN, _INT64_MAX = -(2**63), 2**63 - 1
+
+
+class Codec(ABC):
+    """encodes entries to bytes, `decoders` maps the first byte of its formats to their decoder"""
+
+    name: str
+    decoders: Dict[int, Callable[[bytes, Optional[Collection[str]]], Entry]] = {}
+
+    @abstractmethod
+    def encode(self, entry: Mapping[str, Any]) -> bytes:
+        ...
+
+
+class JsonCodec(Codec):
+    name = "json"
+
+    def encode(self, entry: Mapping[str, Any]) -> bytes:
+        return json.dumps(entry, separators=(",", ":")).encode()
+
+
+class PackedCodec(Codec):
+    name = "packed"
+
+    def __init__(self) -> None:
+        self.decoders = {FLOATS: _decode_floats, TAGGED: _decode_tagged}
+
+    def encode(self, entry: Mapping[str, Any]) -> bytes:
+        if _only_floats(entry):
+            return bytes((FLOATS,)) + _pack_floats(entry)
+        buffer = bytearray((TAGGED,))
+        _write_mapping(buffer, entry)
+        return bytes(buffer)
+
+
+def encode(entry: Mapping[str, Any], codec: Optional[str] = None) -> bytes:
+    """encode an entry with the named codec, by default the one of the settings (DATA_CODEC)"""
+    return CODECS[codec or config.get_settings().data_codec].encode(entry)
+
+
+def decode(payload: Union[bytes, str], variables: Optional[Collection[str]] = None) -> Entry:
+    """decode an entry of any format, only the `variables` of it if given"""
+    if isinstance(payload, str):
+        payload = payload.encode()
+    decoder = _DECODERS.get(payload[0]) if payload else None
+    if decoder is not None:
+        return decoder(payload, variables)
+
+    entry = json.loads(payload)
+    if variables is not None:
+        entry = {name: value for name, value in entry.items() if name in variables}
+    return entry
+
+
+def select(
+    entry: Optional[Mapping[str, Any]], variables: Optional[Collection[str]] = None
+) -> Mapping[str, Any]:
+    """the entry of a row, only the `variables` of it if given, the other ones are not decoded"""
+    if entry is None:
+        return {}
+    if isinstance(entry, LazyEntry):
+        return entry.decode(variables)
+    if variables is None:
+        return entry
+    return {name: value for name, value in entry.items() if name in variables}
+
+
+def codec_of(payload: Union[bytes, str]) -> str:
+    """the name of the codec which encoded a payload"""
+    if isinstance(payload, bytes) and payload:
+        for codec in CODECS.values():
+            if payload[0] in codec.decoders:
+                return codec.name
+    return JsonCodec.name
+
+
+class LazyEntry(Mapping[str, Any]):
+    """an entry as read from the database, which is decoded on first use"""
+
+    __slots__ = ("payload", "_entry")
+
+    def __init__(self, payload: Union[bytes, str]) -> None:
+        self.payload = payload
+        self._entry: Optional[Entry] = None
+
+    def decode(self, variables: Optional[Collection[str]] = None) -> Entry:
+        """the decoded entry, only the `variables` of it if given"""
+        if self._entry is None:
+            if variables is not None:
+                return decode(self.payload, variables)
+            self._entry = decode(self.payload)
+        if variables is not None:
+            return {name: value for name, value in self._entry.items() if name in variables}
+        return self._entry
+
+    def __getitem__(self, name: str) -> Any:
+        return self.decode()[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.decode())
+
+    def __len__(self) -> int:
+        return len(self.decode())
+
+    def keys(self) -> KeysView[str]:
+        return self.decode().keys()
+
+    def items(self):
+        return self.decode().items()
+
+    def __repr__(self) -> str:
+        return f"LazyEntry({self.decode()!r})"
+
+
+class EncodedData(TypeDecorator):
+    """column of entries encoded by a codec, read as `LazyEntry`"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(  # type: ignore
+        self, value: Optional[Mapping[str, Any]], dialect
+    ) -> Optional[bytes]:
+        if value is None:
+            return None
+        if isinstance(value, LazyEntry):
+            return bytes(value.payload) if isinstance(value.payload, bytes) else encode(value)
+        return encode(value)
+
+    def process_result_value(self, value: Any, dialect) -> Optional[Mapping[str, Any]]:
+        if isinstance(value, (bytes, str)):
+            return LazyEntry(value)
+        if isinstance(value, memoryview):
+            # bytea of psycopg2
+            return LazyEntry(bytes(value))
+        # null, or a JSON column which was not migrated yet and is decoded by the driver
+        return value
+
+
+@lru_cache(maxsize=None)
+def _floats_format(count: int) -> struct.Struct:
+    return struct.Struct(f"<{count}d")
+
+
+@lru_cache(maxsize=4096)
+def _names(ids: bytes) -> Tuple[str, ...]:
+    return tuple(VARIABLES[index - 1] for index in ids)
+
+
+def _only_floats(entry: Mapping[str, Any]) -> bool:
+    if not 0 < len(entry) < 256:
+        return False
+    for name, value in entry.items():
+        if type(value) is not float or name not in _VARIABLE_IDS:
+            return False
+    return True
+
+
+def _same_floats(items: Sequence[Any]) -> bool:
+    if not items or not isinstance(items[0], abc.Mapping) or not _only_floats(items[0]):
+        return False
+    names = list(items[0])
+    return all(
+        isinstance(item, abc.Mapping) and list(item) == names and _only_floats(item)
+        for item in items
+    )
+
+
+def _pack_floats(entry: Mapping[str, Any]) -> bytes:
+    """the number of variables, their ids (one byte each) and their values"""
+    return _ids(tuple(entry)) + _floats_format(len(entry)).pack(*entry.values())
+
+
+@lru_cache(maxsize=4096)
+def _ids(names: Tuple[str, ...]) -> bytes:
+    return bytes((len(names), *(_VARIABLE_IDS[name] for name in names)))
+
+
+def _unpack_floats(payload: bytes, offset: int) -> Tuple[Entry, int]:
+    count = payload[offset]
+    offset += 1 + count
+    names = _names(payload[offset - count : offset])
+    return dict(zip(names, _floats_format(count).unpack_from(payload, offset))), offset + 8 * count
+
+
+def _decode_floats(payload: bytes, variables: Optional[Collection[str]]) -> Entry:
+    entry, _ = _unpack_floats(payload, 1)
+    if variables is not None:
+        entry = {name: value for name, value in entry.items() if name in variables}
+    return entry
+
+
+def _decode_tagged(payload: bytes, variables: Optional[Collection[str]]) -> Entry:
+    entry, _ = _read_mapping(payload, 1, variables)
+    return entry
+
+
+def _write_varint(buffer: bytearray, number: int) -> None:
+    while number >= 0x80:
+        buffer.append(number & 0x7F | 0x80)
+        number >>= 7
+    buffer.append(number)
+
+
+def _read_varint(payload: bytes, offset: int) -> Tuple[int, int]:
+    number = shift = 0
+    while True:
+        byte = payload[offset]
+        offset += 1
+        number |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return number, offset
+        shift += 7
+
+
+def _write_mapping(buffer: bytearray, entry: Mapping[str, Any]) -> None:
+    _write_varint(buffer, len(entry))
+    for name, value in entry.items():
+        if not isinstance(name, str):
+            raise TypeError(f"keys must be str, not {type(name).__name__}")
+        variable_id = _VARIABLE_IDS.get(name, 0)
+        _write_varint(buffer, variable_id)
+        if not variable_id:
+            _write_bytes(buffer, name.encode())
+        _write_value(buffer, value)
+
+
+def _write_bytes(buffer: bytearray, data: bytes) -> None:
+    _write_varint(buffer, len(data))
+    buffer += data
+
+
+def _write_value(buffer: bytearray, value: Any) -> None:
+    # isinstance checks of abstract classes are slow, the common types are checked first
+    if type(value) is float:
+        buffer.append(_FLOAT)
+        buffer += _DOUBLE.pack(value)
+    elif value is None:
+        buffer.append(_NULL)
+    elif value is True or value is False:
+        buffer.append(_TRUE if value else _FALSE)
+    elif isinstance(value, float):
+        buffer.append(_FLOAT)
+        buffer += _DOUBLE.pack(value)
+    elif isinstance(value, int) and _INT64_MIN <= value <= _INT64_MAX:
+        buffer.append(_INT)
+        buffer += _INT64.pack(value)
+    elif isinstance(value, str):
+        buffer.append(_STR)
+        _write_bytes(buffer, value.encode())
+    elif isinstance(value, abc.Mapping) and _only_floats(value):
+        buffer.append(_FLOATS)
+        buffer += _pack_floats(value)
+    elif isinstance(value, (list, tuple)) and _same_floats(value):
+        buffer.append(_FLOATS_LIST)
+        _write_varint(buffer, len(value))
+        buffer += _pack_floats(value[0])[: 1 + len(value[0])]
+        buffer += _floats_format(len(value) * len(value[0])).pack(
+            *(number for item in value for number in item.values())
+        )
+    elif isinstance(value, (list, tuple, abc.Mapping)):
+        # nested values are prefixed with their size so that they can be skipped
+        nested = bytearray()
+        if isinstance(value, abc.Mapping):
+            buffer.append(_DICT)
+            _write_mapping(nested, value)
+        else:
+            buffer.append(_LIST)
+            _write_varint(nested, len(value))
+            for item in value:
+                _write_value(nested, item)
+        _write_bytes(buffer, nested)
+    else:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _read_mapping(
+    payload: bytes, offset: int, variables: Optional[Collection[str]] = None
+) -> Tuple[Entry, int]:
+    count, offset = _read_varint(payload, offset)
+    entry: Entry = {}
+    for _ in range(count):
+        variable_id, offset = _read_varint(payload, offset)
+        if variable_id:
+            name = VARIABLES[variable_id - 1]
+        else:
+            size, offset = _read_varint(payload, offset)
+            name = payload[offset : offset + size].decode()
+            offset += size
+        if variables is None or name in variables:
+            if payload[offset] == _FLOAT:
+                entry[name] = _DOUBLE.unpack_from(payload, offset + 1)[0]
+                offset += 9
+            else:
+                entry[name], offset = _read_value(payload, offset)
+        else:
+            offset = _skip_value(payload, offset)
+    return entry, offset
+
+
+def _read_value(payload: bytes, offset: int) -> Tuple[Any, int]:
+    tag = payload[offset]
+    offset += 1
+    if tag == _FLOAT:
+        return _DOUBLE.unpack_from(payload, offset)[0], offset + 8
+    if tag == _INT:
+        return _INT64.unpack_from(payload, offset)[0], offset + 8
+    if tag <= _TRUE:
+        return (None, False, True)[tag], offset
+    if tag == _FLOATS:
+        return _unpack_floats(payload, offset)
+    if tag == _FLOATS_LIST:
+        length, offset = _read_varint(payload, offset)
+        count = payload[offset]
+        offset += 1 + count
+        names = _names(payload[offset - count : offset])
+        values = _floats_format(length * count).unpack_from(payload, offset)
+        return [
+            dict(zip(names, values[start : start + count]))
+            for start in range(0, length * count, count)
+        ], offset + 8 * length * count
+    size, offset = _read_varint(payload, offset)
+    end = offset + size
+    if tag == _STR:
+        return payload[offset:end].decode(), end
+    if tag == _DICT:
+        return _read_mapping(payload, offset)[0], end
+    count, offset = _read_varint(payload, offset)
+    items: List[Any] = []
+    for _ in range(count):
+        item, offset = _read_value(payload, offset)
+        items.append(item)
+    return items, end
+
+
+def _skip_value(payload: bytes, offset: int) -> int:
+    tag = payload[offset]
+    offset += 1
+    if tag in (_FLOAT, _INT):
+        return offset + 8
+    if tag <= _TRUE:
+        return offset
+    if tag == _FLOATS:
+        return offset + 1 + 9 * payload[offset]
+    if tag == _FLOATS_LIST:
+        length, offset = _read_varint(payload, offset)
+        return offset + 1 + payload[offset] * (1 + 8 * length)
+    size, offset = _read_varint(payload, offset)
+    return offset + size
+
+
+CODECS: Dict[str, Codec] = {codec.name: codec for codec in (JsonCodec(), PackedCodec())}
+_DECODERS = {
+    marker: decoder for codec in CODECS.values() for marker, decoder in codec.decoders.items()
+}
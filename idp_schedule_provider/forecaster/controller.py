@@ -1,12 +1,52 @@
+import time
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Set, Tuple, Union
+from itertools import groupby
+from operator import attrgetter
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 from sqlalchemy import func, or_
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Query, Session
 from sqlalchemy.orm.exc import NoResultFound
 
-from idp_schedule_provider.forecaster import exceptions, resampler, schemas
-from idp_schedule_provider.forecaster.models import EventData, Scenarios, ScheduleData
+from idp_schedule_provider import config, metrics
+from idp_schedule_provider.forecaster import (
+    bulk,
+    codec,
+    dimensions,
+    exceptions,
+    fanout,
+    pagination,
+    process_pool,
+    resampler,
+    schemas,
+    series,
+    series_cache,
+    shared_cache,
+    snapshots,
+)
+from idp_schedule_provider.forecaster.models import (
+    EVENT_NATURAL_KEY,
+    Assets,
+    EventData,
+    EventType,
+    Feeders,
+    Scenarios,
+    ScheduleData,
+    new_revision,
+)
 
 
 def get_scenario(
@@ -54,15 +94,24 @@ def create_or_update_scenario(
 def delete_scenario(db: Session, scenario: schemas.ScenarioID) -> None:
     """Delete scenario and associated schedules & events in schedule provider."""
 
-    db.query(EventData).filter_by(scenario_id=scenario).delete()
-    db.query(ScheduleData).filter_by(scenario_id=scenario).delete()
-    db.query(Scenarios).filter_by(id=scenario).delete()
+    scenario_model = get_scenario(db, scenario_id=scenario)
+    if scenario_model is None:
+        return
+
+    db.query(EventData).filter_by(scenario_key=scenario_model.key).delete()
+    db.query(ScheduleData).filter_by(scenario_key=scenario_model.key).delete()
+    db.query(Scenarios).filter_by(key=scenario_model.key).delete()
+    snapshots.discard(scenario)
+    series_cache.discard(scenario)
+    shared_cache.discard(scenario)
 
 
 def insert_rows(db: Session, rows: List[Union[ScheduleData, EventData, Scenarios]]) -> None:
     """insert data to database"""
     db.add_all(rows)
     db.flush()
+    for table, count in Counter(row.__tablename__ for row in rows).items():
+        metrics.ROWS_WRITTEN.inc(table, amount=count)
 
 
 def validate_schedules(schedules: schemas.AddNewSchedulesModel):
@@ -88,50 +137,53 @@ def add_schedules(
     new_schedules: schemas.AddNewSchedulesModel,
 ) -> None:
     """Add new asset schedule to schedule provider"""
-    if not get_scenario(db, scenario_id=scenario):
+    scenario_model = get_scenario(db, scenario_id=scenario)
+    if not scenario_model:
         raise exceptions.ScenarioNotFoundException
 
     timestamps = new_schedules.time_stamps
     asset_schedules = new_schedules.dict()["assets"]
-    new_schedule_models = []
 
     validate_schedules(new_schedules)
 
-    query_data = (
-        db.query(ScheduleData)
-        .filter(
-            ScheduleData.scenario_id == scenario,
-            ScheduleData.timestamp.between(timestamps[0], timestamps[-1]),
-            ScheduleData.feeder == feeder,
-        )
-        .all()
+    feeder_key = dimensions.intern(db, Feeders.name, [feeder])[feeder]
+    asset_keys = dimensions.intern(db, Assets.name, asset_schedules)
+    query_data = db.query(ScheduleData.asset_key, ScheduleData.timestamp).filter(
+        ScheduleData.scenario_key == scenario_model.key,
+        ScheduleData.timestamp.between(timestamps[0], timestamps[-1]),
+        ScheduleData.feeder_key == feeder_key,
     )
-
-    assets_with_schedules: Set[Tuple[str, datetime]] = set(
-        [(schedule_data.asset_name, schedule_data.timestamp) for schedule_data in query_data]
+    assets_with_schedules: Set[Tuple[int, datetime]] = set(
+        (asset_key, timestamp) for asset_key, timestamp in query_data
     )
 
+    new_rows: List[bulk.Row] = []
+    updated_rows: List[bulk.Row] = []
     for asset_id, schedules in asset_schedules.items():
-        for idx, schedule in enumerate(schedules):
-
-            timestamp = timestamps[idx]
-
-            if (asset_id, timestamp) in assets_with_schedules:
-                db.query(ScheduleData).filter_by(
-                    scenario_id=scenario, timestamp=timestamp, asset_name=asset_id, feeder=feeder
-                ).update({"data": schedule})
+        asset_key = asset_keys[asset_id]
+        for timestamp, schedule in zip(timestamps, schedules):
+            row = dict(
+                scenario_key=scenario_model.key,
+                feeder_key=feeder_key,
+                asset_key=asset_key,
+                timestamp=timestamp,
+                data=schedule,
+            )
+            if (asset_key, timestamp) in assets_with_schedules:
+                updated_rows.append(row)
             else:
-                new_schedule_models.append(
-                    ScheduleData(
-                        scenario_id=scenario,
-                        asset_name=asset_id,
-                        feeder=feeder,
-                        data=schedule,
-                        timestamp=timestamp,
-                    )
-                )
+                new_rows.append(row)
 
-    insert_rows(db, new_schedule_models)
+    table = ScheduleData.__table__
+    bulk.update(
+        db, table, updated_rows, key=("scenario_key", "feeder_key", "asset_key", "timestamp")
+    )
+    bulk.insert(db, table, new_rows)
+    # cached data of the scenario is out of date, and so is its snapshot until it is frozen again
+    db.query(Scenarios).filter_by(key=scenario_model.key).update({"revision": new_revision()})
+    series_cache.discard(scenario)
+    shared_cache.discard(scenario)
+    snapshots.discard(scenario)
 
 
 def add_events(
@@ -141,27 +193,47 @@ def add_events(
     new_events: schemas.AddNewEventsModel,
 ) -> None:
     """Add new asset events to schedule provider"""
-    if not get_scenario(db, scenario_id=scenario):
+    scenario_model = get_scenario(db, scenario_id=scenario)
+    if not scenario_model:
         raise exceptions.ScenarioNotFoundException()
 
     asset_events = new_events.dict()["assets"]
-    new_event_models = []
+    new_rows: List[bulk.Row] = []
 
+    feeder_key = dimensions.intern(db, Feeders.name, [feeder])[feeder]
+    asset_keys = dimensions.intern(db, Assets.name, asset_events)
     for asset_id, events in asset_events.items():
         for event in events:
             start_time, end_time = event.pop("start_datetime"), event.pop("end_datetime")
-            new_event_models.append(
-                EventData(
-                    scenario_id=scenario,
-                    asset_name=asset_id,
-                    feeder=feeder,
-                    event_type=event.get("event_type", None),
+            event_type = event.get("event_type", None)
+            if event_type is not None:
+                EventType(event_type)  # propagate value error if exists
+            new_rows.append(
+                dict(
+                    scenario_key=scenario_model.key,
+                    asset_key=asset_keys[asset_id],
+                    feeder_key=feeder_key,
+                    event_type=event_type,
                     data=event,
                     start_timestamp=start_time,
                     end_timestamp=end_time,
                 )
             )
-    insert_rows(db, new_event_models)
+    # events posted again replace the stored event with the same key instead of duplicating it
+    bulk.upsert(
+        db,
+        EventData.__table__,
+        new_rows,
+        key=(
+            "scenario_key",
+            "feeder_key",
+            "asset_key",
+            "event_type",
+            "start_timestamp",
+            "end_timestamp",
+        ),
+        index_elements=EVENT_NATURAL_KEY,
+    )
 
 
 def get_all_scenarios(db: Session) -> schemas.GetScenariosResponseModel:
@@ -175,33 +247,23 @@ def get_asset_timespan(
     asset_name: Optional[str] = None,
     feeders: Optional[List[str]] = None,
 ) -> schemas.GetTimeSpanModel:
-    try:
-        db.query(Scenarios).filter(Scenarios.id == scenario_id).one()
-    except NoResultFound:
-        raise exceptions.ScenarioNotFoundException()
+    scenario_key = _scenario_key(db, scenario_id)
 
     query = db.query(
+        ScheduleData.asset_key,
         func.min(ScheduleData.timestamp).label("min"),
         func.max(ScheduleData.timestamp).label("max"),
-        ScheduleData.asset_name,
     ).filter(
-        ScheduleData.scenario_id == scenario_id,
+        ScheduleData.scenario_key == scenario_key,
     )
 
     if asset_name is not None:
-        query = query.filter(ScheduleData.asset_name == asset_name)
+        query = query.filter(ScheduleData.asset_key.in_(_asset_keys(db, asset_name)))
 
     if feeders:
-        query = query.filter(ScheduleData.feeder.in_(feeders))
+        query = query.filter(ScheduleData.feeder_key.in_(_feeder_keys(db, feeders)))
 
-    return schemas.GetTimeSpanModel(
-        assets={
-            asset.asset_name: schemas.TimeSpanModel(
-                start_datetime=asset.min, end_datetime=asset.max
-            )
-            for asset in query.group_by(ScheduleData.asset_name).all()
-        }
-    )
+    return _timespans(db, query.group_by(ScheduleData.asset_key))
 
 
 def get_event_timespan(
@@ -212,34 +274,42 @@ def get_event_timespan(
     asset_name: Optional[str] = None,
     feeders: Optional[List[str]] = None,
 ) -> schemas.GetTimeSpanModel:
-    try:
-        db.query(Scenarios).filter(Scenarios.id == scenario_id).one()
-    except NoResultFound:
-        raise exceptions.ScenarioNotFoundException()
+    scenario_key = _scenario_key(db, scenario_id)
 
     query = db.query(
+        EventData.asset_key,
         func.min(EventData.start_timestamp).label("min"),
         func.max(EventData.end_timestamp).label("max"),
-        EventData.asset_name,
     ).filter(
-        EventData.scenario_id == scenario_id,
+        EventData.scenario_key == scenario_key,
     )
 
     if asset_name is not None:
-        query = query.filter(EventData.asset_name == asset_name)
+        query = query.filter(EventData.asset_key.in_(_asset_keys(db, asset_name)))
 
     if feeders:
-        query = query.filter(EventData.feeder.in_(feeders))
+        query = query.filter(EventData.feeder_key.in_(_feeder_keys(db, feeders)))
 
     if event_type is not None:
         query = query.filter(EventData.event_type.in_([et.value for et in event_type]))
 
+    return _timespans(db, query.group_by(EventData.asset_key))
+
+
+def _timespans(db: Session, query: Query) -> schemas.GetTimeSpanModel:
+    """
+    Name the (asset_key, min, max) timespans of `query`. The names are joined after grouping so
+    that the aggregation only reads the index of the keys.
+    """
+    spans = query.subquery()
     return schemas.GetTimeSpanModel(
         assets={
             asset.asset_name: schemas.TimeSpanModel(
                 start_datetime=asset.min, end_datetime=asset.max
             )
-            for asset in query.group_by(EventData.asset_name).all()
+            for asset in db.query(Assets.name.label("asset_name"), spans.c.min, spans.c.max)
+            .join(spans, spans.c.asset_key == Assets.key)
+            .all()
         }
     )
 
@@ -255,29 +325,303 @@ def get_asset_data(
     *,
     asset_name: Optional[str] = None,
     feeders: Optional[List[str]] = None,
-) -> schemas.GetSchedulesResponseModel:
+    variables: Optional[Collection[schemas.VariableName]] = None,
+    page: Optional[pagination.Page] = None,
+) -> series.ScheduleSeries:
+    """
+    Get the resampled asset data, only the `variables` of it if given. Other variables are not
+    decoded or resampled.
+    """
+
+    def read() -> series.ScheduleSeries:
+        return _resampled_asset_data(
+            db,
+            scenario_id,
+            start_time,
+            end_time,
+            time_interval,
+            interpolation_method,
+            sampling_modes,
+            asset_name=asset_name,
+            feeders=feeders,
+            variables=variables,
+            page=page,
+        )
+
+    if page is not None:
+        return read()
+    settings = config.get_settings()
+    # everything the result depends on other than the data of the scenario
+    parameters = [
+        start_time.timestamp(),
+        end_time.timestamp(),
+        time_interval.value,
+        interpolation_method.value,
+        sampling_modes.value,
+        asset_name,
+        sorted(feeders) if feeders else None,
+        sorted(variables) if variables is not None else None,
+        settings.resample_max_gap_hours,
+        settings.calendar_timezone,
+    ]
+    return shared_cache.read_through(db, scenario_id, parameters, read)
+
+
+def _resampled_asset_data(
+    db: Session,
+    scenario_id: schemas.ScenarioID,
+    start_time: datetime,
+    end_time: datetime,
+    time_interval: schemas.TimeInterval,
+    interpolation_method: schemas.InterpolationMethod,
+    sampling_modes: schemas.SamplingMode,
+    *,
+    asset_name: Optional[str],
+    feeders: Optional[List[str]],
+    variables: Optional[Collection[schemas.VariableName]],
+    page: Optional[pagination.Page],
+) -> series.ScheduleSeries:
+    """read the asset data from a snapshot, the series cache or the database and resample it"""
+    stage_latency = metrics.SCHEDULE_STAGE_LATENCY
+    settings = config.get_settings()
+    data = None
+    if page is None and settings.snapshot_dir:
+        start = time.perf_counter()
+        with stage_latency.time("snapshot"):
+            snapshot = snapshots.get(scenario_id)
+            if snapshot is not None and snapshot.revision != _scenario_revision(db, scenario_id):
+                # frozen from data which was changed or deleted since
+                snapshot = None
+            if snapshot is not None:
+                data = snapshot.read(
+                    start_time,
+                    end_time,
+                    time_interval,
+                    asset_name=asset_name,
+                    feeders=set(feeders) if feeders else None,
+                    variables=variables,
+                )
+        result = "hit" if data is not None else "miss"
+        metrics.CACHE_REQUESTS.inc("snapshot", result)
+        metrics.CACHE_LATENCY.observe(time.perf_counter() - start, "snapshot", result)
+    if data is None and page is None:
+        data = series_cache.read(
+            db,
+            scenario_id,
+            start_time,
+            end_time,
+            time_interval,
+            asset_name=asset_name,
+            feeders=set(feeders) if feeders else None,
+            variables=variables,
+        )
+    if data is None:
+        data = _read_series(
+            db,
+            scenario_id,
+            start_time,
+            end_time,
+            time_interval,
+            asset_name=asset_name,
+            feeders=feeders,
+            variables=variables,
+            page=page,
+        )
+
+    max_gap_hours = settings.resample_max_gap_hours
+    # small reads are quicker to resample than to send to another process
+    executor = None
+    if data.size >= settings.resample_parallel_threshold:
+        executor = process_pool.get_process_pool()
+    with stage_latency.time("resample"):
+        return resampler.resample_series(
+            time_interval,
+            interpolation_method,
+            sampling_modes,
+            data,
+            max_gap=timedelta(hours=max_gap_hours) if max_gap_hours is not None else None,
+            calendar_timezone=settings.calendar_timezone,
+            executor=executor,
+            shards=settings.resample_workers,
+        )
+
+
+def _read_series(
+    db: Session,
+    scenario_id: schemas.ScenarioID,
+    start_time: datetime,
+    end_time: datetime,
+    time_interval: schemas.TimeInterval,
+    *,
+    asset_name: Optional[str],
+    feeders: Optional[List[str]],
+    variables: Optional[Collection[schemas.VariableName]],
+    page: Optional[pagination.Page],
+) -> series.ScheduleSeries:
+    """read the stored asset data from the database"""
+    stage_latency = metrics.SCHEDULE_STAGE_LATENCY
+    settings = config.get_settings()
+    filters = _schedule_filters(db, scenario_id, start_time, end_time, asset_name)
+    feeder_keys = _feeder_keys(db, feeders) if feeders else None
+    query = _schedule_rows(db, filters, feeder_keys)
+    with stage_latency.time("query"):
+        if page is None and feeder_keys and len(feeder_keys) > 1 and settings.fanout_shards > 1:
+
+            def read_feeders(session: Session, group: List[int]) -> List[Any]:
+                return _schedule_rows(session, filters, group).all()
+
+            query_data = [
+                row
+                for rows in fanout.fan_out(db, feeder_keys, read_feeders, settings.fanout_shards)
+                for row in rows
+            ]
+        elif page is not None:
+            # keyed by the asset key rather than its name, so that a page is a range scan of
+            # ix_schedule_data_scenario_asset_timestamp
+            query_data = pagination.paginate(
+                query.order_by(ScheduleData.asset_key, ScheduleData.timestamp),
+                page,
+                pagination.SCHEDULE_CURSOR,
+                (ScheduleData.asset_key, ScheduleData.timestamp),
+                lambda row: (row.asset_key, row.timestamp),
+                row_size=func.length(ScheduleData.data),
+            )
+        else:
+            query_data = query.order_by(Assets.name, ScheduleData.timestamp).all()
+    metrics.ROWS_READ.inc(ScheduleData.__tablename__, amount=len(query_data))
+
+    with stage_latency.time("build_response"):
+        return _query_data_to_series(query_data, time_interval, variables)
+
+
+def stream_asset_data(
+    db: Session,
+    scenario_id: schemas.ScenarioID,
+    start_time: datetime,
+    end_time: datetime,
+    time_interval: schemas.TimeInterval,
+    interpolation_method: schemas.InterpolationMethod,
+    sampling_modes: schemas.SamplingMode,
+    *,
+    asset_name: Optional[str] = None,
+    feeders: Optional[List[str]] = None,
+    variables: Optional[Collection[schemas.VariableName]] = None,
+) -> Tuple[List[datetime], Iterator[Tuple[schemas.AssetID, Iterator[schemas.ScheduleEntry]]]]:
+    """
+    Get the resampled timestamps and a lazy stream of (asset, entries) for the asset data.
+
+    Unlike `get_asset_data` the rows are never held in memory together. Only the distinct
+    timestamps are read up front (to build the time axis). The rows are then read in batches
+    and each asset is resampled once its rows have arrived, so that entries can be serialized
+    while the rest of the rows are still being read.
+    """
+    stage_latency = metrics.SCHEDULE_STAGE_LATENCY
+    filters = _schedule_filters(db, scenario_id, start_time, end_time, asset_name)
+    query = _schedule_rows(db, filters, _feeder_keys(db, feeders) if feeders else None)
+    with stage_latency.time("query"):
+        stored_time_stamps = [
+            row.timestamp
+            for row in query.with_entities(ScheduleData.timestamp)
+            .distinct()
+            .order_by(ScheduleData.timestamp)
+        ]
+    positions = {time_stamp: position for position, time_stamp in enumerate(stored_time_stamps)}
+
+    settings = config.get_settings()
+    max_gap_hours = settings.resample_max_gap_hours
+    times, resample_asset = resampler.asset_resampler(
+        time_interval,
+        interpolation_method,
+        sampling_modes,
+        series.to_times(stored_time_stamps),
+        max_gap=timedelta(hours=max_gap_hours) if max_gap_hours is not None else None,
+        calendar_timezone=settings.calendar_timezone,
+    )
+
+    rows = query.order_by(Assets.name, ScheduleData.timestamp).yield_per(1000)
+
+    def asset_entries(asset_rows: Iterable[Any]) -> Iterator[schemas.ScheduleEntry]:
+        asset_series = series.AssetSeries(len(stored_time_stamps))
+        count = 0
+        for row in asset_rows:
+            count += 1
+            asset_series.set_entry(positions[row.timestamp], codec.select(row.data, variables))
+        metrics.ROWS_READ.inc(ScheduleData.__tablename__, amount=count)
+        return resample_asset(asset_series).entries()
+
+    assets = (
+        (asset, asset_entries(asset_rows))
+        for asset, asset_rows in groupby(rows, key=attrgetter("asset_name"))
+    )
+    return series.to_datetimes(times), assets
+
+
+def _scenario_revision(db: Session, scenario_id: schemas.ScenarioID) -> int:
+    """get the revision of a scenario, which changes whenever its schedules change"""
+    revision = db.query(Scenarios.revision).filter(Scenarios.id == scenario_id).scalar()
+    if revision is None:
+        raise exceptions.ScenarioNotFoundException()
+    return revision
+
+
+def _scenario_key(db: Session, scenario_id: schemas.ScenarioID) -> int:
+    """get the key of a scenario, schedule and event rows refer to the scenario by it"""
     try:
-        db.query(Scenarios).filter(Scenarios.id == scenario_id).one()
+        (key,) = db.query(Scenarios.key).filter(Scenarios.id == scenario_id).one()
     except NoResultFound:
         raise exceptions.ScenarioNotFoundException()
+    return key
 
-    query = db.query(ScheduleData).filter(
-        ScheduleData.scenario_id == scenario_id,
-        ScheduleData.timestamp.between(start_time, end_time),
-    )
 
-    if asset_name is not None:
-        query = query.filter(ScheduleData.asset_name == asset_name)
+def _asset_keys(db: Session, asset_name: str) -> List[int]:
+    """get the key of the asset, or no keys if it has no data"""
+    return list(dimensions.lookup(db, Assets.name, [asset_name]).values())
 
-    if feeders:
-        query = query.filter(ScheduleData.feeder.in_(feeders))
 
-    query_data = query.order_by(ScheduleData.asset_name, ScheduleData.timestamp).all()
-    response_data = _query_data_to_schedule_response(query_data, time_interval)
-    return resampler.resample_data(
-        time_interval, interpolation_method, sampling_modes, response_data
+def _feeder_keys(db: Session, feeders: List[str]) -> List[int]:
+    """get the keys of the feeders, feeders without any data are left out"""
+    return list(dimensions.lookup(db, Feeders.name, feeders).values())
+
+
+def _schedule_filters(
+    db: Session,
+    scenario_id: schemas.ScenarioID,
+    start_time: datetime,
+    end_time: datetime,
+    asset_name: Optional[str],
+) -> List[Any]:
+    """check that the scenario exists and get the filters of its asset data, see `_schedule_rows`"""
+    with metrics.SCHEDULE_STAGE_LATENCY.time("scenario_check"):
+        scenario_key = _scenario_key(db, scenario_id)
+
+    filters = [
+        ScheduleData.scenario_key == scenario_key,
+        ScheduleData.timestamp.between(start_time, end_time),
+    ]
+    if asset_name is not None:
+        filters.append(Assets.name == asset_name)
+    return filters
+
+
+def _schedule_rows(db: Session, filters: List[Any], feeder_keys: Optional[List[int]]) -> Query:
+    """get the (unordered) query for the (asset_name, asset_key, timestamp, data) of the data"""
+    query = (
+        db.query(
+            Assets.name.label("asset_name"),
+            ScheduleData.asset_key,
+            ScheduleData.timestamp,
+            ScheduleData.data,
+        )
+        .select_from(ScheduleData)
+        .join(Assets, ScheduleData.asset_key == Assets.key)
+        .filter(*filters)
     )
 
+    if feeder_keys is not None:
+        query = query.filter(ScheduleData.feeder_key.in_(feeder_keys))
+
+    return query
+
 
 def get_asset_events_data(
     db: Session,
@@ -288,66 +632,76 @@ def get_asset_events_data(
     event_type: Optional[List[schemas.AssetEventType]] = None,
     asset_name: Optional[str] = None,
     feeders: Optional[List[str]] = None,
+    page: Optional[pagination.Page] = None,
 ) -> schemas.GetEventsResponseModel:
-
-    try:
-        db.query(Scenarios).filter(Scenarios.id == scenario_id).one()
-    except NoResultFound:
-        raise exceptions.ScenarioNotFoundException()
-
-    query = db.query(EventData).filter(
-        EventData.scenario_id == scenario_id,
-        or_(
-            EventData.start_timestamp.between(start_time, end_time),
-            EventData.end_timestamp.between(start_time, end_time),
-        ),
+    scenario_key = _scenario_key(db, scenario_id)
+
+    query = (
+        db.query(
+            EventData.id,
+            Assets.name.label("asset_name"),
+            EventData.data,
+            EventData.start_timestamp,
+            EventData.end_timestamp,
+        )
+        .select_from(EventData)
+        .join(Assets, EventData.asset_key == Assets.key)
+        .filter(
+            EventData.scenario_key == scenario_key,
+            or_(
+                EventData.start_timestamp.between(start_time, end_time),
+                EventData.end_timestamp.between(start_time, end_time),
+            ),
+        )
     )
 
     if asset_name is not None:
-        query = query.filter(EventData.asset_name == asset_name)
+        query = query.filter(Assets.name == asset_name)
 
     if feeders is not None:
-        query = query.filter(EventData.feeder.in_(feeders))
+        query = query.filter(EventData.feeder_key.in_(_feeder_keys(db, feeders)))
 
     if event_type is not None:
         query = query.filter(EventData.event_type.in_([et.value for et in event_type]))
 
-    query_data = query.order_by(EventData.start_timestamp).all()
+    query = query.order_by(EventData.start_timestamp, EventData.id)
+    if page is not None:
+        query_data = pagination.paginate(
+            query,
+            page,
+            pagination.EVENT_CURSOR,
+            (EventData.start_timestamp, EventData.id),
+            lambda row: (row.start_timestamp, row.id),
+            row_size=func.length(EventData.data),
+        )
+    else:
+        query_data = query.all()
+    metrics.ROWS_READ.inc(EventData.__tablename__, amount=len(query_data))
     return _query_data_to_events_response(query_data)
 
 
-def _query_data_to_schedule_response(
-    query_data: List[ScheduleData],
+def _query_data_to_series(
+    query_data: Sequence[Any],
     time_interval: schemas.TimeInterval,
-) -> schemas.GetSchedulesResponseModel:
-    asset_names: Set[str] = set()
-    entries_by_time: Dict[datetime, Dict[str, ScheduleData]] = {}
+    variables: Optional[Collection[schemas.VariableName]] = None,
+) -> series.ScheduleSeries:
+    # rows are not necessarily in time order when they span several assets
+    time_stamps = sorted({entry.timestamp for entry in query_data})
+    positions = {time_stamp: position for position, time_stamp in enumerate(time_stamps)}
+
+    assets: Dict[schemas.AssetID, series.AssetSeries] = {}
     for entry in query_data:
-        if entry.timestamp not in entries_by_time:
-            entries_by_time[entry.timestamp] = {}
-
-        entries_by_time[entry.timestamp][entry.asset_name] = entry
-        asset_names.add(entry.asset_name)
-
-    assets: Dict[schemas.AssetID, List[schemas.ScheduleEntry]] = {}
-    for asset in asset_names:
-        assets[asset] = []
-        for entry_by_time in entries_by_time.values():
-            try:
-                value = entry_by_time[asset].data
-            except (KeyError, AttributeError):
-                value = {}
-            assets[asset].append(value)
-
-    return schemas.GetSchedulesResponseModel(
-        time_interval=time_interval,
-        time_stamps=sorted(entries_by_time.keys()),
-        assets=assets,
-    )
+        if entry.asset_name not in assets:
+            assets[entry.asset_name] = series.AssetSeries(len(time_stamps))
+        assets[entry.asset_name].set_entry(
+            positions[entry.timestamp], codec.select(entry.data, variables)
+        )
+
+    return series.ScheduleSeries(time_interval, series.to_times(time_stamps), assets)
 
 
 def _query_data_to_events_response(
-    events_data: List[EventData],
+    events_data: Sequence[Any],
 ) -> schemas.GetEventsResponseModel:
     assets: Dict[schemas.AssetID, List[schemas.EventsEntry]] = {}
     for event in events_data:
@@ -1,18 +1,51 @@
+import logging
 import os
-from typing import Generator
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Generator, Optional
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.session import Session
 
+from idp_schedule_provider import config, metrics
+
 SQLALCHEMY_DATABASE_URL = os.environ.get("SQLALCHEMY_DATABASE_URL", "sqlite:///./forecast.db")
+# reads can go to a replica or to read-only connections of the same database, by default they go to
+# the primary (eg. "sqlite:///file:forecast.db?mode=ro&uri=true")
+SQLALCHEMY_READ_DATABASE_URL = os.environ.get("SQLALCHEMY_READ_DATABASE_URL")
 
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+read_engine = (
+    create_engine(SQLALCHEMY_READ_DATABASE_URL, connect_args={"check_same_thread": False})
+    if SQLALCHEMY_READ_DATABASE_URL
+    else engine
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=read_engine, info={"read_only": True}
+)
 
 Base = declarative_base()
 
+slow_query_logger = logging.getLogger("idp_schedule_provider.slow_query")
+
+
+@dataclass
+class QueryStats:
+    """number of statements executed and the time spent executing them"""
+
+    count: int = 0
+    duration: float = 0.0
+
+
+# the statistics of the request currently being handled
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
 
 def get_db_session() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -24,3 +57,83 @@ def get_db_session() -> Generator[Session, None, None]:
         raise
     finally:
         db.close()
+
+
+def get_read_db_session() -> Generator[Session, None, None]:
+    """
+    A session for the read endpoints. It is never committed and refuses to flush changes.
+
+    Anything which reads its own writes must use `get_db_session`, the read engine may lag behind
+    the primary.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@event.listens_for(ReadSessionLocal, "before_flush")
+def _refuse_flush(session: Session, flush_context, instances):
+    raise InvalidRequestError("cannot write with a read-only session")
+
+
+@event.listens_for(engine, "connect")
+def _connect_primary(dbapi_connection, connection_record):
+    if engine.dialect.name == "sqlite" and config.get_settings().sqlite_wal:
+        # let readers on other connections run while the primary writes
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+
+@event.listens_for(read_engine, "connect")
+def _connect_read(dbapi_connection, connection_record):
+    if read_engine is not engine and read_engine.dialect.name == "sqlite":
+        dbapi_connection.execute("PRAGMA query_only=ON")
+
+
+def _before_cursor_execute(conn: Connection, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Connection, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start_time"].pop()
+    metrics.DB_QUERY_LATENCY.observe(duration)
+
+    stats = query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += duration
+
+    threshold = config.get_settings().slow_query_threshold_ms
+    if threshold is not None and duration * 1000 >= threshold:
+        _log_slow_query(conn, statement, parameters, duration, executemany)
+
+
+for _engine in {engine, read_engine}:
+    event.listen(_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _log_slow_query(
+    conn: Connection, statement: str, parameters: Any, duration: float, executemany: bool
+) -> None:
+    plan = "n/a"
+    if not executemany and statement.lstrip().upper().startswith("SELECT"):
+        explain = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+        # use the dbapi connection directly so the explain is not instrumented itself
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(explain + statement, parameters)
+            plan = "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+        except Exception as e:
+            plan = f"failed to explain statement: {e}"
+        finally:
+            cursor.close()
+
+    slow_query_logger.warning(
+        "slow query (%.1f ms): %s\nparameters: %s\nplan:\n%s",
+        duration * 1000,
+        statement,
+        parameters,
+        plan,
+    )
@@ -0,0 +1,81 @@
+"""
+Scenarios, assets and feeders are stored once in their own (dimension) tables and schedule and
+event rows refer to them by small integer keys. Names are resolved to keys once per request.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Union
+
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from idp_schedule_provider.forecaster import exceptions
+from idp_schedule_provider.forecaster.models import (
+    Assets,
+    EventData,
+    Feeders,
+    Scenarios,
+    ScheduleData,
+    pending_names,
+)
+
+
+def lookup(db: Session, name_column: Any, names: Iterable[str]) -> Dict[str, int]:
+    """get the keys of the existing members of a dimension by their name (`name_column`)"""
+    unique_names = set(names)
+    if not unique_names:
+        return {}
+    key_column = name_column.class_.key
+    return dict(db.query(name_column, key_column).filter(name_column.in_(unique_names)).all())
+
+
+def intern(db: Session, name_column: Any, names: Iterable[str]) -> Dict[str, int]:
+    """get the keys of members of a dimension by their name, adding the ones which don't exist"""
+    unique_names = set(names)
+    keys = lookup(db, name_column, unique_names)
+    missing = sorted(unique_names - keys.keys())
+    if missing:
+        insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        # another request may add the same names concurrently
+        db.execute(
+            insert(name_column.class_.__table__).on_conflict_do_nothing(),
+            [{name_column.key: name} for name in missing],
+        )
+        keys.update(lookup(db, name_column, missing))
+    return keys
+
+
+@event.listens_for(Session, "before_flush")
+def resolve_names(session: Session, flush_context, instances) -> None:
+    """set the keys of new schedule and event rows which were constructed with names"""
+    rows: List[Union[ScheduleData, EventData]] = [
+        row
+        for row in session.new
+        if isinstance(row, (ScheduleData, EventData)) and row.scenario_key is None
+    ]
+    if not rows:
+        return
+
+    # scenarios added in the same flush do not have a key yet
+    pending = {row.id: row for row in session.new if isinstance(row, Scenarios)}
+    names = [(row, pending_names(row)) for row in rows]
+
+    def all_names(name: str) -> Iterator[str]:
+        return (value for _, row_names in names if (value := row_names.get(name)))
+
+    scenarios = lookup(session, Scenarios.id, all_names("scenario_id"))
+    assets = intern(session, Assets.name, all_names("asset_name"))
+    feeders = intern(session, Feeders.name, all_names("feeder"))
+    for row, row_names in names:
+        scenario_id = row_names.get("scenario_id")
+        if scenario_id in scenarios:
+            row.scenario_key = scenarios[scenario_id]
+        elif scenario_id in pending:
+            row.scenario = pending[scenario_id]
+        elif row.scenario is None:
+            raise exceptions.ScenarioNotFoundException()
+        asset_name = row_names.get("asset_name")
+        if asset_name:
+            row.asset_key = assets[asset_name]
+        feeder = row_names.get("feeder")
+        if feeder:
+            row.feeder_key = feeders[feeder]
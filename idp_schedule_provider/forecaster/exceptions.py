@@ -16,3 +16,11 @@ class BadAssetScheduleTimeIntervalException(ForecasterException):
 
 class DuplicateScenarioNameException(ForecasterException):
     pass
+
+
+class InvalidCursorException(ForecasterException):
+    pass
+
+
+class TransferException(ForecasterException):
+    pass
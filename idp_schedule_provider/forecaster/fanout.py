@@ -0,0 +1,75 @@
+"""
+Concurrent reads of groups of feeders, each on its own pooled connection.
+
+A thread pool shared by all requests bounds the number of shard queries running at once, and the
+number of shards of a single request is bounded separately so that one wide request cannot take
+every thread.
+"""
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, TypeVar
+
+from sqlalchemy.orm import Session
+
+from idp_schedule_provider import config
+
+T = TypeVar("T")
+K = TypeVar("K")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    global _executor
+
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                config.get_settings().fanout_pool_size, thread_name_prefix="fanout"
+            )
+        return _executor
+
+
+def split(feeders: Sequence[K], shards: int) -> List[List[K]]:
+    """split the feeders into at most `shards` contiguous groups of (nearly) equal size"""
+    shards = max(1, min(shards, len(feeders)))
+    size, remainder = divmod(len(feeders), shards)
+    groups = []
+    start = 0
+    for shard in range(shards):
+        end = start + size + (1 if shard < remainder else 0)
+        groups.append(list(feeders[start:end]))
+        start = end
+    return groups
+
+
+def fan_out(
+    db: Session, feeders: Sequence[K], read: Callable[[Session, List[K]], T], shards: int
+) -> List[T]:
+    """
+    Call `read` for each group of feeders concurrently, with a new session bound to the same
+    engine as `db`. The results are in the order of the feeders.
+
+    The shard sessions do not see uncommitted changes made in `db`.
+    """
+    bind = db.get_bind()
+
+    def read_shard(context: contextvars.Context, group: List[K]) -> T:
+        def read_group() -> T:
+            session = Session(bind=bind)
+            try:
+                return read(session, group)
+            finally:
+                session.close()
+
+        return context.run(read_group)
+
+    executor = get_thread_pool()
+    # run in a copy of the request's context so that the queries are counted for the request
+    futures = [
+        executor.submit(read_shard, contextvars.copy_context(), group)
+        for group in split(feeders, shards)
+    ]
+    return [future.result() for future in futures]
@@ -1,12 +1,21 @@
 import enum
+import secrets
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional, cast
-
-import sqlalchemy
-from sqlalchemy import Column, ForeignKey, String, TypeDecorator
-from sqlalchemy.orm import validates
-from sqlalchemy.sql.sqltypes import JSON, DateTime, Integer
-
+from typing import Any, Dict, Optional
+
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Index,
+    String,
+    TypeDecorator,
+    func,
+    literal_column,
+)
+from sqlalchemy.orm import relationship, validates
+from sqlalchemy.sql.sqltypes import BigInteger, DateTime, Integer
+
+from idp_schedule_provider.forecaster.codec import EncodedData
 from idp_schedule_provider.forecaster.database import Base, engine
 
 
@@ -23,6 +32,10 @@ class UTCDateTime(TypeDecorator):
     impl = DateTime
     cache_ok = True
 
+    @property
+    def python_type(self):
+        return datetime
+
     def process_bind_param(  # type: ignore
         self, value: Optional[datetime], dialect
     ) -> Optional[datetime]:
@@ -48,37 +61,94 @@ class UTCDateTime(TypeDecorator):
         return None
 
 
+def new_revision() -> int:
+    """a random revision for `Scenarios.revision`"""
+    return secrets.randbits(63)
+
+
 class Scenarios(Base):
     __tablename__ = "scenarios"
 
-    id = Column(String, primary_key=True, index=True)
+    # schedule and event rows refer to the scenario by this key rather than by its id
+    key = Column(Integer, primary_key=True)
+    id = Column(String, unique=True, index=True, nullable=False)
     name = Column(String, unique=True)
     description = Column(String, nullable=True)
+    # a new random value whenever the schedules of the scenario change, so that every worker can
+    # tell whether the data it has cached for the scenario is still current
+    revision = Column(BigInteger, nullable=False, default=new_revision)
+
+
+class Assets(Base):
+    __tablename__ = "assets"
 
+    key = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
 
-class ScheduleData(Base):
+
+class Feeders(Base):
+    __tablename__ = "feeders"
+
+    key = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+
+
+class NamedRow:
+    """
+    Schedule and event rows can be constructed with the `scenario_id`, `asset_name` and `feeder`
+    names instead of the keys, see `dimensions.resolve_names`. The names are not attributes of the
+    row, rows read from the database only have the keys.
+    """
+
+    NAMES = ("scenario_id", "asset_name", "feeder")
+
+    def __init__(self, **kwargs: Any) -> None:
+        self._pending_names = {name: kwargs.pop(name) for name in self.NAMES if name in kwargs}
+        super().__init__(**kwargs)
+
+
+def pending_names(row: NamedRow) -> Dict[str, Optional[str]]:
+    """the names a new row was constructed with, which are not resolved to keys yet"""
+    return getattr(row, "_pending_names", {})
+
+
+class ScheduleData(NamedRow, Base):
     __tablename__ = "schedule_data"
 
     id = Column(Integer, primary_key=True, index=True)
-    scenario_id = Column(String, ForeignKey(Scenarios.id))
-    asset_name = Column(String, index=True)
-    feeder = Column(String, index=True)
-    data = Column(cast("sqlalchemy.types.TypeEngine[Dict[str, Any]]", JSON()))  # force type to dict
+    scenario_key = Column(Integer, ForeignKey(Scenarios.key))
+    asset_key = Column(Integer, ForeignKey(Assets.key), index=True)
+    feeder_key = Column(Integer, ForeignKey(Feeders.key), index=True)
+    data = Column(EncodedData)
     timestamp = Column(UTCDateTime, index=True)
 
+    scenario: Any = relationship(Scenarios)
 
-class EventData(Base):
+    __table_args__ = (
+        # supports keyset pagination of schedule reads by (asset, timestamp)
+        Index("ix_schedule_data_scenario_asset_timestamp", scenario_key, asset_key, timestamp),
+    )
+
+
+class EventData(NamedRow, Base):
     __tablename__ = "event_data"
 
     id = Column(Integer, primary_key=True, index=True)
-    scenario_id = Column(String, ForeignKey(Scenarios.id))
-    asset_name = Column(String, index=True)
-    feeder = Column(String, index=True)
-    data = Column(cast("sqlalchemy.types.TypeEngine[Dict[str, Any]]", JSON()))  # force type to dict
+    scenario_key = Column(Integer, ForeignKey(Scenarios.key))
+    asset_key = Column(Integer, ForeignKey(Assets.key), index=True)
+    feeder_key = Column(Integer, ForeignKey(Feeders.key), index=True)
+    data = Column(EncodedData)
     event_type = Column(String, index=True)
     start_timestamp = Column(UTCDateTime, index=True)
     end_timestamp = Column(UTCDateTime, index=True)
 
+    scenario: Any = relationship(Scenarios)
+
+    __table_args__ = (
+        # supports keyset pagination of event reads by (start_timestamp, id)
+        Index("ix_event_data_scenario_start_timestamp_id", scenario_key, start_timestamp, id),
+    )
+
     @validates("event_type")
     def validate_event_type(self, key, event_type):
         if event_type is None:
@@ -88,5 +158,20 @@ class EventData(Base):
         return event_type
 
 
-Base.metadata.drop_all(engine)
-Base.metadata.create_all(engine)
+# an event is identified by these, event_type is nullable and nulls are distinct in unique indexes
+EVENT_NATURAL_KEY = (
+    EventData.scenario_key,
+    EventData.feeder_key,
+    EventData.asset_key,
+    func.coalesce(EventData.event_type, literal_column("''")),
+    EventData.start_timestamp,
+    EventData.end_timestamp,
+)
+Index("ux_event_data_natural_key", *EVENT_NATURAL_KEY, unique=True)
+
+
+def init_db(reset: bool = True) -> None:
+    """create the tables, with `reset` first drop them as the service does every time it starts"""
+    if reset:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
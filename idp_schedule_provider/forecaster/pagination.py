@@ -0,0 +1,124 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import literal, tuple_
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.elements import ColumnElement
+
+from idp_schedule_provider import config
+from idp_schedule_provider.forecaster import exceptions
+
+# the header used to hand the continuation cursor back to the client
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# the version of a kind of cursor changes with its key, cursors of other versions are invalid
+SCHEDULE_CURSOR = "schedule:2"
+EVENT_CURSOR = "event"
+
+
+@dataclass
+class Page:
+    """
+    A single page of a keyset paginated read.
+
+    The cursor is an opaque token produced by a previous page, `max_rows` and `max_bytes` are the
+    budget for this page. After the read `next_cursor` is populated if there is more data.
+    """
+
+    cursor: Optional[str] = None
+    max_rows: Optional[int] = None
+    max_bytes: Optional[int] = None
+    next_cursor: Optional[str] = field(default=None, init=False)
+
+
+def page_request(cursor: Optional[str], page_size: Optional[int]) -> Optional[Page]:
+    """
+    Build the page for a request from the client parameters and the configured page budget.
+    Returns None when the read is unbounded.
+    """
+    settings = config.get_settings()
+    max_rows = settings.page_max_rows
+    if page_size is not None:
+        max_rows = page_size if max_rows is None else min(page_size, max_rows)
+
+    if cursor is None and max_rows is None and settings.page_max_bytes is None:
+        return None
+
+    return Page(cursor=cursor, max_rows=max_rows, max_bytes=settings.page_max_bytes)
+
+
+def encode_cursor(kind: str, key: Sequence[Any]) -> str:
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in key]
+    payload = json.dumps([kind, *values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(kind: str, cursor: str, key_types: Sequence[type]) -> Tuple[Any, ...]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_kind, *values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if cursor_kind != kind or len(values) != len(key_types):
+            raise ValueError(cursor_kind)
+        return tuple(
+            datetime.fromisoformat(value) if key_type is datetime else key_type(value)
+            for key_type, value in zip(key_types, values)
+        )
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise exceptions.InvalidCursorException() from e
+
+
+def paginate(
+    query: Query,
+    page: Page,
+    kind: str,
+    key_columns: Sequence[ColumnElement],
+    row_key: Callable[[Any], Tuple[Any, ...]],
+    row_size: Optional[ColumnElement] = None,
+) -> List[Any]:
+    """
+    Read a single page of `query`.
+
+    The query must select columns (not entities) and already be ordered by `key_columns`. Rather
+    than skipping rows with an OFFSET, the page resumes strictly after the key stored in the cursor
+    so each page is an index range scan. `row_size` is an sql expression estimating the stored size
+    of a row which is used to enforce the byte budget of the page.
+    """
+    if page.cursor is not None:
+        key_types = [column.type.python_type for column in key_columns]
+        after = decode_cursor(kind, page.cursor, key_types)
+        query = query.filter(
+            tuple_(*key_columns)
+            > tuple_(*[literal(value, column.type) for value, column in zip(after, key_columns)])
+        )
+
+    max_bytes = page.max_bytes if row_size is not None else None
+    if max_bytes is not None and row_size is not None:
+        # the rows keep the extra column, they are read by column name
+        query = query.add_columns(row_size.label("row_size"))
+
+    if page.max_rows is not None:
+        # fetch a single extra row to find out if there is another page
+        query = query.limit(page.max_rows + 1)
+
+    rows: List[Any] = []
+    page_bytes = 0
+    has_more = False
+    for row in query.yield_per(1000):
+        if max_bytes is not None:
+            page_bytes += row.row_size or 0
+            # always include at least one row so that the client makes progress
+            if rows and page_bytes > max_bytes:
+                has_more = True
+                break
+
+        if page.max_rows is not None and len(rows) == page.max_rows:
+            has_more = True
+            break
+        rows.append(row)
+
+    page.next_cursor = encode_cursor(kind, row_key(rows[-1])) if has_more else None
+    return rows
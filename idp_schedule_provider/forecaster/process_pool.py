@@ -0,0 +1,47 @@
+"""
+A shared process pool for CPU bound work (eg. resampling) so that one request can use more than
+one core.
+
+The pool is created by the first request which needs it, when the web worker already runs
+threads, so workers are not forked from the web worker (a lock held by another thread would stay
+held in the child) but from a single threaded fork server. The fork server imports the resampler
+once, so that each worker does not import it again.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+
+from idp_schedule_provider import config
+
+# modules imported by the fork server, the workers forked from it start with them
+PRELOAD = ["idp_schedule_provider.forecaster.resampler"]
+
+_executor: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def get_process_pool() -> Optional[Executor]:
+    """get the process pool, or None if work should stay in-process"""
+    global _executor
+
+    workers = config.get_settings().resample_workers
+    if workers < 2 or "forkserver" not in multiprocessing.get_all_start_methods():
+        return None
+
+    with _lock:
+        if _executor is None:
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(PRELOAD)
+            _executor = ProcessPoolExecutor(workers, mp_context=context)
+        return _executor
+
+
+def shutdown() -> None:
+    """stop the workers of the pool, the next request which needs it starts a new one"""
+    global _executor
+
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
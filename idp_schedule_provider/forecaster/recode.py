@@ -0,0 +1,105 @@
+"""
+Re-encode the schedule and event data of a database with a codec, eg. the JSON of rows which were
+written before the codecs or of rows which were written with another codec (DATA_CODEC).
+
+    python -m idp_schedule_provider.forecaster.recode [--codec packed] [--batch-size 5000] [url]
+
+Rows are read in batches by id and every batch is committed on its own, so the migration can be
+interrupted and run again. Rows of any format can be read at any point, so the service does not
+have to be stopped. On postgresql a JSON data column is first changed to bytea.
+"""
+import argparse
+import os
+from typing import List, Optional
+
+from sqlalchemy import LargeBinary, bindparam, create_engine, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql import expression
+
+from idp_schedule_provider import config
+from idp_schedule_provider.forecaster import codec
+
+TABLES = ("schedule_data", "event_data")
+
+
+def recode(engine: Engine, table_name: str, codec_name: str, batch_size: int = 5000) -> int:
+    """re-encode the data of the rows of the table which use another format, get their number"""
+    # plain columns, the stored payloads are compared and written as they are
+    table = expression.table(table_name, expression.column("id"), expression.column("data"))
+    statement = (
+        table.update()
+        .where(table.c.id == bindparam("_id"))
+        .values(data=bindparam("_data", type_=LargeBinary))
+    )
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as connection:
+            _to_bytea(connection, table_name)
+
+    recoded = 0
+    last_id = None
+    while True:
+        with engine.begin() as connection:
+            query = select([table.c.id, table.c.data]).order_by(table.c.id).limit(batch_size)
+            if last_id is not None:
+                query = query.where(table.c.id > last_id)
+            rows = connection.execute(query).fetchall()
+            if not rows:
+                return recoded
+
+            changed = [
+                {"_id": row_id, "_data": codec.encode(codec.decode(payload), codec_name)}
+                for row_id, payload in _payloads(rows)
+                if codec.codec_of(payload) != codec_name
+            ]
+            if changed:
+                connection.execute(statement, changed)
+            recoded += len(changed)
+            last_id = rows[-1].id
+
+
+def _payloads(rows) -> List:
+    return [
+        (row.id, row.data if isinstance(row.data, str) else bytes(row.data))
+        for row in rows
+        if row.data is not None
+    ]
+
+
+def _to_bytea(connection: Connection, table_name: str) -> None:
+    data_type = connection.execute(
+        text(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_name = :table AND column_name = 'data'"
+        ),
+        {"table": table_name},
+    ).scalar()
+    if data_type != "bytea":
+        connection.execute(
+            text(
+                f"ALTER TABLE {table_name} ALTER COLUMN data TYPE bytea "
+                "USING convert_to(data::text, 'UTF8')"
+            )
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "url",
+        nargs="?",
+        default=os.environ.get("SQLALCHEMY_DATABASE_URL", "sqlite:///./forecast.db"),
+    )
+    parser.add_argument(
+        "--codec", choices=sorted(codec.CODECS), default=config.get_settings().data_codec
+    )
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.url)
+    for table_name in TABLES:
+        recoded = recode(engine, table_name, args.codec, args.batch_size)
+        print(f"{table_name}: {recoded} rows re-encoded with {args.codec}")
+
+
+if __name__ == "__main__":
+    main()
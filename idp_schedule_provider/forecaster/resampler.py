@@ -1,6 +1,17 @@
-from typing import List, Sequence, Tuple, cast
+import math
+from array import array
+from concurrent.futures import Executor
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
-from idp_schedule_provider.forecaster import schemas
+from idp_schedule_provider.forecaster import buckets, schemas, series
+
+# stored data is sampled at this interval, see controller.validate_schedules
+NATIVE_INTERVAL = timedelta(hours=1)
+
+# (time of the sample in seconds since the epoch, position of the sample)
+KnownSample = Tuple[float, int]
 
 
 def resample_data(
@@ -8,133 +19,251 @@ def resample_data(
     interpolation_method: schemas.InterpolationMethod,
     sampling_mode: schemas.SamplingMode,
     response_data: schemas.GetSchedulesResponseModel,
+    *,
+    max_gap: Optional[timedelta] = None,
+    calendar_timezone: str = "UTC",
 ) -> schemas.GetSchedulesResponseModel:
+    """
+    Basic data resampling of a response model, see `resample_series`.
+    """
+    return resample_series(
+        time_interval,
+        interpolation_method,
+        sampling_mode,
+        series.ScheduleSeries.from_response_model(response_data),
+        max_gap=max_gap,
+        calendar_timezone=calendar_timezone,
+    ).to_response_model()
+
+
+def resample_series(
+    time_interval: schemas.TimeInterval,
+    interpolation_method: schemas.InterpolationMethod,
+    sampling_mode: schemas.SamplingMode,
+    data: series.ScheduleSeries,
+    *,
+    max_gap: Optional[timedelta] = None,
+    calendar_timezone: str = "UTC",
+    executor: Optional[Executor] = None,
+    shards: int = 1,
+) -> series.ScheduleSeries:
     """
     Basic data resampling
 
+    Samples are placed on a real time axis so gaps in the stored data are accounted for.
+
+    - downsampling takes either the first known value or the time weighted average of each
+      calendar bucket (days, months or years in `calendar_timezone`). Each sample is weighted by
+      the time until the next known sample of the asset (one native interval for the last
+      sample), clipped to the bucket and to `max_gap`.
+    - upsampling fills the new timepoints from the nearest known samples of the asset, but only
+      when the samples used are at most `max_gap` apart (unbounded if not set).
+
     ## Warning
-    This implementation makes many assumptions which are probably not true about real data
+    This implementation makes assumptions which are probably not true about real data
     and is therefore *not* production ready. Do not rely on this being correct for your
     implementation.
 
-    - stored data is evenly sampled at *hourly* intervals
-    - there is no missing data
+    - stored data is sampled at *hourly* intervals (though there may be gaps)
     - no discrete variables are supported (eg. OPEN/CLOSED state of switches)
 
-    additionally no effort has been made to optimize for performance
+    When an `executor` is given the assets are split into `shards` (usually one per worker) which
+    are resampled concurrently.
+    """
+    # if there are no timestamp or no change of interval, don't try to resample
+    if len(data.times) == 0 or time_interval == schemas.TimeInterval.HOUR_1:
+        return data
+
+    resample = partial(
+        _resample_assets,
+        time_interval,
+        interpolation_method,
+        sampling_mode,
+        data.times,
+        max_gap=max_gap,
+        calendar_timezone=calendar_timezone,
+    )
+    shard_count = min(shards, len(data.assets))
+    if executor is None or shard_count < 2:
+        times, assets = resample(data.assets)
+    else:
+        names = list(data.assets)
+        partitions = [
+            {asset: data.assets[asset] for asset in names[shard::shard_count]}
+            for shard in range(shard_count)
+        ]
+        assets = {}
+        for times, shard_assets in executor.map(resample, partitions):
+            assets.update(shard_assets)
+        # keep the order of the assets
+        assets = {asset: assets[asset] for asset in names}
+
+    return series.ScheduleSeries(data.time_interval, times, assets)
+
+
+def _resample_assets(
+    time_interval: schemas.TimeInterval,
+    interpolation_method: schemas.InterpolationMethod,
+    sampling_mode: schemas.SamplingMode,
+    times: Sequence[float],
+    assets: Dict[schemas.AssetID, series.AssetSeries],
+    *,
+    max_gap: Optional[timedelta],
+    calendar_timezone: str,
+) -> Tuple["array[float]", Dict[schemas.AssetID, series.AssetSeries]]:
+    """resample some of the assets, this runs in the worker processes"""
+    new_times, resample_asset = asset_resampler(
+        time_interval,
+        interpolation_method,
+        sampling_mode,
+        times,
+        max_gap=max_gap,
+        calendar_timezone=calendar_timezone,
+    )
+    return new_times, {
+        asset: resample_asset(asset_series) for asset, asset_series in assets.items()
+    }
+
+
+def asset_resampler(
+    time_interval: schemas.TimeInterval,
+    interpolation_method: schemas.InterpolationMethod,
+    sampling_mode: schemas.SamplingMode,
+    times: Sequence[float],
+    *,
+    max_gap: Optional[timedelta] = None,
+    calendar_timezone: str = "UTC",
+) -> Tuple["array[float]", Callable[[series.AssetSeries], series.AssetSeries]]:
     """
-    # if there are no timestamp, don't try to resample
-    if len(response_data.time_stamps) == 0:
-        return response_data
+    Get the resampled time axis for the stored `times` and a function which resamples a single
+    asset onto it, so that assets can be resampled one at a time.
+
+    For each asset a plan of which stored values make up every resampled value is built from the
+    positions of its entries, then the plan is applied to each of its columns.
+    """
+    gap = _max_gap_seconds(max_gap)
+    if len(times) == 0 or time_interval == schemas.TimeInterval.HOUR_1:
+        return array("d", times), lambda asset: asset
 
     if time_interval > schemas.TimeInterval.HOUR_1:
-        delta = time_interval.get_delta()
-        # get the ranges of datapoints which would be merged
-        ranges: List[Tuple[int, int]] = []
-        start_idx = 0
-        for index in range(len(response_data.time_stamps)):
-            if response_data.time_stamps[index] >= response_data.time_stamps[start_idx] + delta:
-                ranges.append((start_idx, index))
-                start_idx = index
-        ranges.append((start_idx, len(response_data.time_stamps)))
-        # iterate through in reverse order to avoid index changes
-        for start_idx, stop_idx in reversed(ranges):
+        starts, ranges = _downsample_buckets(time_interval, times, calendar_timezone)
+
+        def downsample(asset: series.AssetSeries) -> series.AssetSeries:
+            plan = _downsample_plan(_known_samples(times, asset), ranges, gap)
             if sampling_mode == schemas.SamplingMode.WEIGHTED_AVERAGE:
-                for entries in response_data.assets.values():
-                    entries[start_idx] = _weighted_average(entries[start_idx:stop_idx])
-
-            del response_data.time_stamps[start_idx + 1 : stop_idx]
-            for entries in response_data.assets.values():
-                del entries[start_idx + 1 : stop_idx]
-    elif time_interval < schemas.TimeInterval.HOUR_1:
-        delta = time_interval.get_delta()
-
-        num_to_insert = round(60 / delta.minutes) - 1
-
-        # upsample
-        num_timepoints = len(response_data.time_stamps)
-        for index in range(num_timepoints):
-            pos_to_update = num_timepoints - index
-            for i in reversed(range(num_to_insert)):
-                response_data.time_stamps.insert(
-                    pos_to_update, response_data.time_stamps[pos_to_update - 1] + (i + 1) * delta
-                )
-                for entries in response_data.assets.values():
-                    if interpolation_method == schemas.InterpolationMethod.LOCF:
-                        entries.insert(pos_to_update, entries[pos_to_update - 1])
-                    elif interpolation_method == schemas.InterpolationMethod.NOCB:
-                        entries.insert(pos_to_update, entries[pos_to_update])
-                    else:
-                        # add empty values
-                        entries.insert(pos_to_update, {})
-
-            for entries in response_data.assets.values():
-                _linear_interpolate(entries)
-
-    return response_data
-
-
-def _weighted_average(entries_to_average: Sequence[schemas.ScheduleEntry]) -> schemas.ScheduleEntry:
-    new_entry: schemas.ScheduleEntry = {}
-    for variable in entries_to_average[0].keys():
-        values = [val[variable] for val in entries_to_average]
-        if isinstance(values[0], float):
-            balanced_values = cast(Sequence[float], values)
-            sum_of_values = sum(val for val in balanced_values)
-            new_entry[variable] = sum_of_values / len(entries_to_average)
-        elif isinstance(values[0], schemas.UnbalancedScheduleValue):
-            unbalanced_values = cast(Sequence[schemas.UnbalancedScheduleValue], values)
-            new_value = schemas.UnbalancedScheduleValue()
-            # or 0 is only safe if the no missing data assumption is true
-            new_value.A = sum(val.A or 0 for val in unbalanced_values) / len(entries_to_average)
-            new_value.B = sum(val.B or 0 for val in unbalanced_values) / len(entries_to_average)
-            new_value.C = sum(val.C or 0 for val in unbalanced_values) / len(entries_to_average)
-            new_entry[variable] = new_value
-
-    return new_entry
-
-
-def _linear_interpolate(entries: List[schemas.ScheduleEntry]) -> None:
-    for idx, entry in enumerate(entries):
-        if entry:
-            continue  # already have a value
-        try:
-            _previous = entries[idx - 1]
-        except IndexError:
-            continue  # cannot interpolate if no previous datapoint
-
-        try:
-            next_idx = idx
-            while not entries[next_idx]:
-                next_idx += 1
-            _next = entries[next_idx]
-        except IndexError:
-            continue  # cannot interpolate if no next datapoint
-
-        def lerp(_prev: float, _next: float) -> float:
-            return _prev + ((_next - _prev) / (next_idx - idx + 1))
-
-        new_entry: schemas.ScheduleEntry = {}
-        for variable in _previous.keys():
-            prev_value = _previous[variable]
-            next_value = _next[variable]
-
-            if isinstance(prev_value, schemas.UnbalancedScheduleValue) and isinstance(
-                next_value, schemas.UnbalancedScheduleValue
-            ):
-                new_value = schemas.UnbalancedScheduleValue()
-                if prev_value.A is not None and next_value.A is not None:
-                    new_value.A = lerp(prev_value.A, next_value.A)
-                if prev_value.B is not None and next_value.B is not None:
-                    new_value.B = lerp(prev_value.B, next_value.B)
-                if prev_value.C is not None and next_value.C is not None:
-                    new_value.C = lerp(prev_value.C, next_value.C)
-
-                new_entry[variable] = new_value
-
-            elif isinstance(next_value, float) and isinstance(prev_value, float):
-                new_entry[variable] = lerp(prev_value, next_value)
-            else:
-                new_entry[variable] = None
-
-        entries[idx] = new_entry
+                return asset.weighted_average(plan)
+            return asset.interpolate([samples[0][0] if samples else None for samples in plan])
+
+        return starts, downsample
+
+    slot_times = _upsample_axis(times, time_interval.get_delta())
+
+    def upsample(asset: series.AssetSeries) -> series.AssetSeries:
+        known = _known_samples(times, asset)
+        return asset.interpolate(_upsample_plan(slot_times, known, interpolation_method, gap))
+
+    return slot_times, upsample
+
+
+def _max_gap_seconds(max_gap: Optional[timedelta]) -> float:
+    return max_gap.total_seconds() if max_gap is not None else math.inf
+
+
+def _known_samples(times: Sequence[float], asset: series.AssetSeries) -> List[KnownSample]:
+    return [(times[position], position) for position in asset.known_positions()]
+
+
+def _downsample_buckets(
+    time_interval: schemas.TimeInterval, times: Sequence[float], calendar_timezone: str
+) -> Tuple["array[float]", List[Tuple[float, float]]]:
+    """
+    Get the start time and (start, end) range in seconds of every bucket which contains data.
+    Buckets are aligned to the calendar of `calendar_timezone`.
+    """
+    edges = buckets.bucket_edges(time_interval, times[0], times[-1], calendar_timezone)
+    occupied = buckets.occupied_buckets(edges, times)
+    starts = array("d", (start for _, start, _ in occupied))
+    return starts, [(start, end) for _, start, end in occupied]
+
+
+def _with_next_time(known: Sequence[KnownSample]) -> Iterator[Tuple[float, int, float]]:
+    """pair every sample with the time of the next sample (one native interval for the last)"""
+    for index, (time, position) in enumerate(known):
+        if index + 1 < len(known):
+            yield time, position, known[index + 1][0]
+        else:
+            yield time, position, time + NATIVE_INTERVAL.total_seconds()
+
+
+def _downsample_plan(
+    known: Sequence[KnownSample], ranges: List[Tuple[float, float]], max_gap: float
+) -> List[List[Tuple[int, float]]]:
+    """get the (position, weight) of the known samples in each bucket"""
+    hold_limit = max(max_gap, NATIVE_INTERVAL.total_seconds())
+    plan: List[List[Tuple[int, float]]] = [[] for _ in ranges]
+    bucket = 0
+    for time, position, next_time in _with_next_time(known):
+        while bucket < len(ranges) and time >= ranges[bucket][1]:
+            bucket += 1
+        if bucket == len(ranges):
+            break
+
+        bucket_start, bucket_end = ranges[bucket]
+        if time >= bucket_start:
+            hold = min(next_time - time, hold_limit)
+            plan[bucket].append((position, min(time + hold, bucket_end) - time))
+
+    return plan
+
+
+def _upsample_axis(times: Sequence[float], delta) -> "array[float]":
+    """get the upsampled times, each stored sample covers one native interval"""
+    step = (datetime(2000, 1, 1) + delta - datetime(2000, 1, 1)).total_seconds()
+    slot_times: "array[float]" = array("d")
+    for index, time in enumerate(times):
+        end = time + NATIVE_INTERVAL.total_seconds()
+        if index + 1 < len(times):
+            end = min(end, times[index + 1])
+
+        slot_times.append(time)
+        slot = 1
+        while time + step * slot < end:
+            slot_times.append(time + step * slot)
+            slot += 1
+
+    return slot_times
+
+
+def _upsample_plan(
+    slot_times: Sequence[float],
+    known: Sequence[KnownSample],
+    interpolation_method: schemas.InterpolationMethod,
+    max_gap: float,
+) -> series.InterpolationPlan:
+    """fill the timepoints without a known sample from the nearest known samples"""
+    plan: List[series.InterpolationStep] = []
+    next_index = 0
+    for slot_time in slot_times:
+        # the first known sample after this timepoint
+        while next_index < len(known) and known[next_index][0] <= slot_time:
+            next_index += 1
+        previous = known[next_index - 1] if next_index > 0 else None
+        following = known[next_index] if next_index < len(known) else None
+
+        step: series.InterpolationStep = None
+        if previous is not None and previous[0] == slot_time:
+            step = previous[1]
+        elif interpolation_method == schemas.InterpolationMethod.LOCF:
+            if previous is not None and slot_time - previous[0] <= max_gap:
+                step = previous[1]
+        elif interpolation_method == schemas.InterpolationMethod.NOCB:
+            if following is not None and following[0] - slot_time <= max_gap:
+                step = following[1]
+        elif previous is not None and following is not None:
+            if following[0] - previous[0] <= max_gap:
+                fraction = (slot_time - previous[0]) / (following[0] - previous[0])
+                step = (previous[1], following[1], fraction)
+
+        plan.append(step)
+
+    return plan
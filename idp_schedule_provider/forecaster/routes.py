@@ -2,15 +2,25 @@ from datetime import datetime
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm.session import Session
 
+from idp_schedule_provider import config, metrics
 from idp_schedule_provider.authentication.auth import validate_token
 from idp_schedule_provider.forecaster import controller as forecast_controller
-from idp_schedule_provider.forecaster import exceptions, schemas
-from idp_schedule_provider.forecaster.database import get_db_session
+from idp_schedule_provider.forecaster import (
+    exceptions,
+    pagination,
+    schemas,
+    seed_data,
+    streaming,
+)
+from idp_schedule_provider.forecaster.database import (
+    get_db_session,
+    get_read_db_session,
+)
 from idp_schedule_provider.forecaster.resources import load_resource
-from idp_schedule_provider.forecaster.seed_data import DUMMY_SOURCE, IEEE123_SOURCE
+from idp_schedule_provider.forecaster.seed_data import synthetic
 
 router = APIRouter()
 
@@ -28,10 +38,38 @@ async def seed_db(db: Session = Depends(get_db_session)):
     This exists for testing purposes only. It is not part of the external schedule implementation
     and does not need to be implemented as part of the specification.
     """
-    forecast_controller.insert_rows(db, DUMMY_SOURCE.scenarios)
-    forecast_controller.insert_rows(db, DUMMY_SOURCE.forecast_data)
-    forecast_controller.insert_rows(db, IEEE123_SOURCE.scenarios)
-    forecast_controller.insert_rows(db, IEEE123_SOURCE.forecast_data)
+    for source_name in seed_data.SOURCES:
+        seed_data.load(db, source_name)
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post(
+    "/seed_data/synthetic",
+    tags=["test-only"],
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+def seed_synthetic(
+    spec: schemas.SyntheticSeedRequestModel,
+    _: bool = Depends(validate_token),
+    db: Session = Depends(get_db_session),
+) -> Response:
+    """
+    Seeds the database with a generated scenario of up to 10 feeders of 100 assets and 31 days.
+    The same parameters always generate the same data. The existing data of the scenario is
+    replaced. Larger scenarios are generated with the `seed_synthetic` command.
+
+    ## Use Case
+    This exists for testing purposes only. It is not part of the external schedule implementation
+    and does not need to be implemented as part of the specification.
+    """
+    try:
+        synthetic.generate(db, spec)
+    except exceptions.DuplicateScenarioNameException as e:
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            f"Another scenario is named `{spec.scenario_id}`",
+        ) from e
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -106,7 +144,7 @@ async def delete_scenario(
     tags=["spec-required"],
 )
 async def get_scenarios(
-    _: bool = Depends(validate_token), db: Session = Depends(get_db_session)
+    _: bool = Depends(validate_token), db: Session = Depends(get_read_db_session)
 ) -> schemas.GetScenariosResponseModel:
     """
     Gets all scenarios currently available from the schedule provider.
@@ -135,7 +173,7 @@ async def get_schedule_timespans(
         None, description="The name of the asset for which the asset data should be retrieved."
     ),
     _: bool = Depends(validate_token),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
 ) -> schemas.GetTimeSpanModel:
     """
     Gets the range for which each asset in the scenario has data.
@@ -173,7 +211,7 @@ async def get_event_timespans(
         None, description="The name of the asset for which the asset data should be retrieved."
     ),
     _: bool = Depends(validate_token),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
 ) -> schemas.GetTimeSpanModel:
     """
     Gets the range for which each asset event in the scenario has data.
@@ -263,9 +301,31 @@ async def get_schedules(
     asset_name: Optional[str] = Query(
         None, description="The name of the asset for which the asset data should be retrieved."
     ),
+    variables: Optional[List[str]] = Query(
+        None,
+        description=(
+            "The variables to return (eg. `p` and `q`), all variables by default. Other variables "
+            "are left out of every entry."
+        ),
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description=(
+            "An opaque continuation cursor returned in the `X-Next-Cursor` header of a previous "
+            "response. When the data is paginated the header is present until the last page."
+        ),
+    ),
+    page_size: Optional[int] = Query(
+        None,
+        ge=1,
+        description=(
+            "The maximum number of stored datapoints to read for one page. Only available for "
+            "time intervals up to 1 hour."
+        ),
+    ),
     _: bool = Depends(validate_token),
-    db: Session = Depends(get_db_session),
-) -> schemas.GetSchedulesResponseModel:
+    db: Session = Depends(get_read_db_session),
+) -> Response:
     """
     Gets the asset schedule data for a single asset or all assets.
     """
@@ -281,7 +341,35 @@ async def get_schedules(
             status.HTTP_422_UNPROCESSABLE_ENTITY,
             "One of feeders or asset_name must be specified",
         )
+    # pages are cut on stored datapoints, so a bucket of an aggregated read would be split across
+    # pages, aggregated reads are always read in full
+    aggregated = time_interval > schemas.TimeInterval.HOUR_1
+    if aggregated and (cursor is not None or page_size is not None):
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            "Pagination is only available for time intervals up to 1 hour",
+        )
+    page = pagination.page_request(cursor, page_size) if not aggregated else None
     try:
+        # paginated reads are already bounded so only unpaginated reads are streamed
+        if page is None and config.get_settings().stream_schedules:
+            time_stamps, assets = forecast_controller.stream_asset_data(
+                db,
+                scenario,
+                start_datetime,
+                end_datetime,
+                time_interval,
+                interpolation_method,
+                sampling_mode,
+                asset_name=asset_name,
+                feeders=feeders,
+                variables=frozenset(variables) if variables else None,
+            )
+            return StreamingResponse(
+                streaming.schedule_json_chunks(time_interval, time_stamps, assets),
+                media_type="application/json",
+            )
+
         result = forecast_controller.get_asset_data(
             db,
             scenario,
@@ -292,12 +380,24 @@ async def get_schedules(
             sampling_mode,
             asset_name=asset_name,
             feeders=feeders,
+            variables=frozenset(variables) if variables else None,
+            page=page,
         )
     except exceptions.ScenarioNotFoundException as e:
         raise HTTPException(status.HTTP_404_NOT_FOUND, f"Scenario `{scenario}` not found") from e
     except exceptions.AssetNotFoundException as e:
         raise HTTPException(status.HTTP_404_NOT_FOUND, f"Asset `{asset_name}` not found.") from e
-    return result
+    except exceptions.InvalidCursorException as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid continuation cursor") from e
+
+    headers = {}
+    if page is not None and page.next_cursor is not None:
+        headers[pagination.NEXT_CURSOR_HEADER] = page.next_cursor
+
+    # serialize here rather than in fastapi so the serialization cost is measured separately
+    with metrics.SCHEDULE_STAGE_LATENCY.time("serialize"):
+        content = result.to_response_model().json()
+    return Response(content, media_type="application/json", headers=headers)
 
 
 @router.post(
@@ -331,6 +431,7 @@ async def add_events(
     tags=["spec-required"],
 )
 async def get_events(
+    response: Response,
     scenario: schemas.ScenarioID = Path(
         ...,
         description=(
@@ -356,8 +457,18 @@ async def get_events(
         None,
         description="The type of the event for which the asset data should be retrieved.",
     ),
+    cursor: Optional[str] = Query(
+        None,
+        description=(
+            "An opaque continuation cursor returned in the `X-Next-Cursor` header of a previous "
+            "response. When the data is paginated the header is present until the last page."
+        ),
+    ),
+    page_size: Optional[int] = Query(
+        None, ge=1, description="The maximum number of stored datapoints to read for one page."
+    ),
     _: bool = Depends(validate_token),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
 ) -> schemas.GetEventsResponseModel:
     """
     Gets the asset event data for a single asset or all assets.
@@ -368,6 +479,7 @@ async def get_events(
             "One of feeders or asset_name must be specified",
         )
 
+    page = pagination.page_request(cursor, page_size)
     try:
         result = forecast_controller.get_asset_events_data(
             db,
@@ -377,9 +489,15 @@ async def get_events(
             event_type=event_type,
             asset_name=asset_name,
             feeders=feeders,
+            page=page,
         )
     except exceptions.ScenarioNotFoundException as e:
         raise HTTPException(status.HTTP_404_NOT_FOUND, f"Scenario `{scenario}` not found") from e
     except exceptions.AssetNotFoundException as e:
         raise HTTPException(status.HTTP_404_NOT_FOUND, f"Asset {asset_name} not found.") from e
+    except exceptions.InvalidCursorException as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid continuation cursor") from e
+
+    if page is not None and page.next_cursor is not None:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = page.next_cursor
     return result
@@ -291,3 +291,74 @@ class AddNewEventsModel(BaseModel):
 
 class GetEventsResponseModel(AddNewEventsModel):
     ...
+
+
+class SeedVariableMix(Enum):
+    BALANCED = "balanced"
+    UNBALANCED = "unbalanced"
+    SOC = "soc"
+    COST_CURVE = "cost_curve"
+    DISCRETE = "discrete"
+
+
+class SyntheticSeedModel(BaseModel):
+    scenario_id: ScenarioID = Field(
+        default="synthetic", description="The scenario to generate, its existing data is replaced"
+    )
+    feeders: int = Field(default=1, ge=1, description="The number of feeders")
+    assets_per_feeder: int = Field(
+        default=10, ge=1, description="The number of assets of each feeder"
+    )
+    start_datetime: datetime = Field(
+        default=datetime(2000, 1, 1, tzinfo=timezone.utc), description="The first timestamp (UTC)"
+    )
+    days: int = Field(default=7, ge=1, description="The number of days of hourly schedule data")
+    variable_mix: List[SeedVariableMix] = Field(
+        default=list(SeedVariableMix),
+        min_items=1,
+        description="The kinds of schedule data, assigned to the assets of a feeder in turn",
+    )
+    events_per_day: float = Field(
+        default=0, ge=0, le=24, description="The average number of events of each asset per day"
+    )
+    seed: int = Field(default=0, description="The same seed and parameters generate the same data")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "scenario_id": "synthetic",
+                "feeders": 4,
+                "assets_per_feeder": 100,
+                "start_datetime": datetime(2000, 1, 1, tzinfo=timezone.utc),
+                "days": 365,
+                "variable_mix": ["balanced", "unbalanced", "soc"],
+                "events_per_day": 0.5,
+                "seed": 0,
+            }
+        }
+
+
+class SyntheticSeedRequestModel(SyntheticSeedModel):
+    """a scenario small enough to generate in a request, larger ones are generated by the CLI"""
+
+    feeders: int = Field(default=1, ge=1, le=10, description="The number of feeders")
+    assets_per_feeder: int = Field(
+        default=10, ge=1, le=100, description="The number of assets of each feeder"
+    )
+    days: int = Field(
+        default=7, ge=1, le=31, description="The number of days of hourly schedule data"
+    )
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "scenario_id": "synthetic",
+                "feeders": 4,
+                "assets_per_feeder": 100,
+                "start_datetime": datetime(2000, 1, 1, tzinfo=timezone.utc),
+                "days": 31,
+                "variable_mix": ["balanced", "unbalanced", "soc"],
+                "events_per_day": 0.5,
+                "seed": 0,
+            }
+        }
@@ -1,21 +1,22 @@
 from datetime import datetime, timezone
+from typing import Iterator
 
-from idp_schedule_provider.forecaster.models import Scenarios, ScheduleData
+from idp_schedule_provider.forecaster.bulk import Row
 
 scenarios = [
-    Scenarios(id="sce1", name="Scenario 1", description="Test Scenario 1"),
-    Scenarios(id="sce2", name="Scenario 2", description="Test Scenario 2"),
+    dict(id="sce1", name="Scenario 1", description="Test Scenario 1"),
+    dict(id="sce2", name="Scenario 2", description="Test Scenario 2"),
 ]
 
-forecast_data = []
-# seeds 1 year of data for 3 assets on scenario1. no data on scenario 2
-for asset in ["asset_1", "asset_2", "asset_3"]:
-    for month in range(1, 13):
-        for day in range(1, 29):  # 28 days for now
-            for hour in range(24):
-                timestamp = datetime(2000, month, day, hour, 0, 0, 0, timezone.utc)
-                forecast_data.append(
-                    ScheduleData(
+
+def schedules() -> Iterator[Row]:
+    # seeds 1 year of data for 3 assets on scenario1. no data on scenario 2
+    for asset in ["asset_1", "asset_2", "asset_3"]:
+        for month in range(1, 13):
+            for day in range(1, 29):  # 28 days for now
+                for hour in range(24):
+                    timestamp = datetime(2000, month, day, hour, 0, 0, 0, timezone.utc)
+                    yield dict(
                         scenario_id="sce1",
                         asset_name=asset,
                         feeder="f1",
@@ -25,4 +26,7 @@ for asset in ["asset_1", "asset_2", "asset_3"]:
                         },
                         timestamp=timestamp,
                     )
-                )
+
+
+def events() -> Iterator[Row]:
+    yield from []
@@ -0,0 +1,63 @@
+"""
+Seed data sets. Each source module defines its `scenarios` and generators of its `schedules` and
+`events`, plain rows with the scenario id and the asset and feeder names instead of their keys.
+
+Sources are only imported when they are loaded, so the service does not build them at startup.
+"""
+import importlib
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List
+
+from sqlalchemy.orm import Session
+
+from idp_schedule_provider.forecaster import bulk, dimensions, exceptions
+from idp_schedule_provider.forecaster.models import (
+    Assets,
+    EventData,
+    Feeders,
+    Scenarios,
+    ScheduleData,
+    new_revision,
+)
+
+SOURCES = ("DUMMY_SOURCE", "IEEE123_SOURCE")
+BATCH_SIZE = 10_000
+
+
+def load(db: Session, source_name: str) -> None:
+    """insert the scenarios, schedules and events of a source module"""
+    source: Any = importlib.import_module(f"{__name__}.{source_name}")
+    # the bulk writer does not fill in the defaults of columns on postgresql
+    scenarios = [dict(scenario, revision=new_revision()) for scenario in source.scenarios]
+    bulk.insert(db, Scenarios.__table__, scenarios)
+    tables = ((ScheduleData.__table__, source.schedules()), (EventData.__table__, source.events()))
+    for table, rows in tables:
+        for batch in _batches(rows):
+            bulk.insert(db, table, _with_keys(db, batch))
+
+
+def _batches(rows: Iterable[bulk.Row]) -> Iterator[List[bulk.Row]]:
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, BATCH_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+def _with_keys(db: Session, rows: List[bulk.Row]) -> List[bulk.Row]:
+    """replace the scenario id and the asset and feeder names of rows with their keys"""
+    scenarios = dimensions.lookup(db, Scenarios.id, (row["scenario_id"] for row in rows))
+    assets = dimensions.intern(db, Assets.name, (row["asset_name"] for row in rows))
+    feeders = dimensions.intern(db, Feeders.name, (row["feeder"] for row in rows))
+    keyed: List[Dict[str, Any]] = []
+    for row in rows:
+        row = dict(row)
+        scenario_id = row.pop("scenario_id")
+        if scenario_id not in scenarios:
+            raise exceptions.ScenarioNotFoundException()
+        row["scenario_key"] = scenarios[scenario_id]
+        row["asset_key"] = assets[row.pop("asset_name")]
+        row["feeder_key"] = feeders[row.pop("feeder")]
+        keyed.append(row)
+    return keyed
@@ -0,0 +1,238 @@
+"""
+Synthetic scenarios of any size, for load tests and benchmarks with production sized data.
+
+    python -m idp_schedule_provider.forecaster.seed_data.synthetic --feeders 10 \\
+        --assets-per-feeder 500 --days 365 --events-per-day 0.5 --seed 1
+
+The data of each asset comes from its own random generator, seeded with the seed and the asset
+name, so the same parameters always generate the same rows. Rows are written with the bulk writer
+in batches, without the ORM.
+"""
+import argparse
+import math
+import random
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from idp_schedule_provider.forecaster import bulk, controller, dimensions, schemas
+from idp_schedule_provider.forecaster.database import SessionLocal
+from idp_schedule_provider.forecaster.models import (
+    Assets,
+    EventData,
+    EventType,
+    Feeders,
+    ScheduleData,
+    init_db,
+)
+
+BATCH_SIZE = 50_000
+EVENT_HOURS = (1, 6)
+
+Entry = Dict[str, Any]
+
+
+def generate(db: Session, spec: schemas.SyntheticSeedModel) -> Tuple[int, int]:
+    """write the scenario of `spec` over its existing data, get the schedule and event row counts"""
+    controller.delete_scenario(db, spec.scenario_id)
+    controller.create_or_update_scenario(
+        db,
+        spec.scenario_id,
+        schemas.ScenarioModel(
+            name=spec.scenario_id, description=f"Synthetic scenario (seed {spec.seed})"
+        ),
+    )
+    scenario_model = controller.get_scenario(db, scenario_id=spec.scenario_id)
+    assert scenario_model is not None  # nosec
+
+    feeders = [f"{spec.scenario_id}_feeder_{feeder}" for feeder in range(spec.feeders)]
+    assets = {
+        feeder: [
+            (f"{feeder}_{mix.value}_{asset}", mix)
+            for asset, mix in zip(range(spec.assets_per_feeder), _cycle(spec.variable_mix))
+        ]
+        for feeder in feeders
+    }
+    feeder_keys = dimensions.intern(db, Feeders.name, feeders)
+    asset_keys = dimensions.intern(
+        db, Assets.name, (name for feeder in feeders for name, _ in assets[feeder])
+    )
+
+    hours = spec.days * 24
+    time_stamps = [spec.start_datetime + timedelta(hours=hour) for hour in range(hours)]
+    # daily profile of loads and generation, lowest at 6 in the morning
+    profile = [0.6 - 0.4 * math.cos(2 * math.pi * (hour % 24 - 6) / 24) for hour in range(hours)]
+
+    schedule_writer = _BatchWriter(db, ScheduleData)
+    event_writer = _BatchWriter(db, EventData)
+    for feeder in feeders:
+        for name, mix in assets[feeder]:
+            keys = dict(
+                scenario_key=scenario_model.key,
+                feeder_key=feeder_keys[feeder],
+                asset_key=asset_keys[name],
+            )
+            generator = random.Random(f"{spec.seed}:{name}")
+            for time_stamp, entry in zip(time_stamps, VALUES[mix](generator, profile)):
+                schedule_writer.add(dict(keys, timestamp=time_stamp, data=entry))
+            for start, end, entry in _events(generator, spec.events_per_day, hours):
+                event_writer.add(
+                    dict(
+                        keys,
+                        event_type=entry["event_type"],
+                        start_timestamp=spec.start_datetime + timedelta(hours=start),
+                        end_timestamp=spec.start_datetime + timedelta(hours=end),
+                        data=entry,
+                    )
+                )
+    return schedule_writer.flush(), event_writer.flush()
+
+
+class _BatchWriter:
+    """inserts rows in batches of `BATCH_SIZE` rows"""
+
+    def __init__(self, db: Session, model: Any) -> None:
+        self.db = db
+        self.table = model.__table__
+        self.rows: List[bulk.Row] = []
+        self.written = 0
+
+    def add(self, row: bulk.Row) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> int:
+        """write the remaining rows, get the number of rows written"""
+        bulk.insert(self.db, self.table, self.rows)
+        self.written += len(self.rows)
+        self.rows = []
+        return self.written
+
+
+def _cycle(mix: List[schemas.SeedVariableMix]) -> Iterator[schemas.SeedVariableMix]:
+    while True:
+        yield from mix
+
+
+def _balanced(generator: random.Random, profile: List[float]) -> Iterator[Entry]:
+    size = generator.uniform(10, 500)
+    power_factor = generator.uniform(0.85, 0.99)
+    ratio = math.tan(math.acos(power_factor))
+    for factor in profile:
+        p = size * factor * generator.gauss(1, 0.05)
+        yield {"p": p, "q": p * ratio}
+
+
+def _unbalanced(generator: random.Random, profile: List[float]) -> Iterator[Entry]:
+    phases = {phase: generator.uniform(0.8, 1.2) for phase in "ABC"}
+    for entry in _balanced(generator, profile):
+        yield {
+            variable: {phase: value * weight / 3 for phase, weight in phases.items()}
+            for variable, value in entry.items()
+        }
+
+
+def _soc(generator: random.Random, profile: List[float]) -> Iterator[Entry]:
+    capacity = generator.uniform(50, 1000)
+    min_soc = generator.choice((0.05, 0.1, 0.2))
+    max_soc = generator.choice((0.8, 0.9, 1.0))
+    for factor in profile:
+        # charges when the load is low and discharges when it is high
+        yield {"p": capacity * (0.6 - factor), "q": 0.0, "min_SOC": min_soc, "max_SOC": max_soc}
+
+
+def _cost_curve(generator: random.Random, profile: List[float]) -> Iterator[Entry]:
+    capacity = generator.uniform(100, 2000)
+    price = generator.uniform(20, 80)
+    for factor in profile:
+        hourly_price = price * factor * generator.gauss(1, 0.1)
+        yield {
+            "p": capacity * factor,
+            "q": 0.0,
+            "active_energy_cost": [
+                {"x": capacity * step / 2, "y": hourly_price * (1 + step / 10)} for step in range(3)
+            ],
+        }
+
+
+def _discrete(generator: random.Random, profile: List[float]) -> Iterator[Entry]:
+    variable = generator.choice(("status", "state"))
+    value = 1.0
+    for _ in profile:
+        if generator.random() < 0.02:
+            value = 1.0 - value
+        yield {variable: value}
+
+
+VALUES: Dict[schemas.SeedVariableMix, Callable[[random.Random, List[float]], Iterator[Entry]]] = {
+    schemas.SeedVariableMix.BALANCED: _balanced,
+    schemas.SeedVariableMix.UNBALANCED: _unbalanced,
+    schemas.SeedVariableMix.SOC: _soc,
+    schemas.SeedVariableMix.COST_CURVE: _cost_curve,
+    schemas.SeedVariableMix.DISCRETE: _discrete,
+}
+
+
+def _events(
+    generator: random.Random, events_per_day: float, hours: int
+) -> Iterator[Tuple[int, int, Entry]]:
+    """(start hour, end hour, data) of events which do not overlap"""
+    if not events_per_day:
+        return
+    mean_gap = 24 / events_per_day
+    end = 0
+    while True:
+        start = end + round(generator.expovariate(1 / mean_gap))
+        end = start + generator.randint(*EVENT_HOURS)
+        if end > hours:
+            return
+        if generator.random() < 0.5:
+            yield start, end, {
+                "event_type": EventType.EV_CHARGING.value,
+                "pf": 0.9,
+                "p_max": generator.choice((3600.0, 7200.0, 11000.0)),
+                "start_soc": generator.uniform(0.1, 0.8),
+                "total_battery_capacity": generator.choice((40000.0, 60000.0, 75000.0)),
+            }
+        else:
+            yield start, end, {
+                "event_type": EventType.CONTROL_MODE.value,
+                "control_mode": generator.choice(("global", "local")),
+            }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    defaults = schemas.SyntheticSeedModel()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--scenario-id", default=defaults.scenario_id)
+    parser.add_argument("--feeders", type=int, default=defaults.feeders)
+    parser.add_argument("--assets-per-feeder", type=int, default=defaults.assets_per_feeder)
+    parser.add_argument(
+        "--start-datetime", type=datetime.fromisoformat, default=defaults.start_datetime
+    )
+    parser.add_argument("--days", type=int, default=defaults.days)
+    parser.add_argument(
+        "--variable-mix",
+        default=",".join(mix.value for mix in defaults.variable_mix),
+        help="comma separated kinds of schedule data: "
+        + ", ".join(mix.value for mix in schemas.SeedVariableMix),
+    )
+    parser.add_argument("--events-per-day", type=float, default=defaults.events_per_day)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args(argv)
+    spec = schemas.SyntheticSeedModel(**dict(vars(args), variable_mix=args.variable_mix.split(",")))
+
+    init_db(reset=False)
+    db = SessionLocal()
+    try:
+        schedules, events = generate(db, spec)
+        db.commit()
+    finally:
+        db.close()
+    print(f"{spec.scenario_id}: {schedules} schedule rows, {events} event rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+"""
+A compact columnar (struct of arrays) representation of schedule data.
+
+Every variable of an asset is a column aligned to a shared time axis. Balanced values are stored
+in an array of doubles, unbalanced values in one array per phase and anything else (eg. cost
+curves) as a list of objects. The state of every value (absent, a value or null) is kept in a
+byte per timepoint so that the entries of the public models can be rebuilt exactly.
+"""
+import math
+from abc import ABC, abstractmethod
+from array import array
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
+
+from pydantic import parse_obj_as
+
+from idp_schedule_provider.forecaster import schemas
+
+# the state of a variable at a timepoint
+ABSENT = 0  # the entry does not have the variable
+VALUE = 1
+NULL = 2
+
+# per timepoint: absent (None), a copy of a position or an interpolation between two positions
+# (previous, following, fraction)
+InterpolationStep = Union[None, int, Tuple[int, int, float]]
+InterpolationPlan = Sequence[InterpolationStep]
+# per timepoint: the (position, weight) of the values to average
+AveragePlan = Sequence[Sequence[Tuple[int, float]]]
+
+
+class Column(ABC):
+    """the values of one variable of an asset"""
+
+    def __init__(self, length: int):
+        self.states = bytearray(length)
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    @abstractmethod
+    def accepts(self, value: Any) -> bool:
+        ...
+
+    @abstractmethod
+    def set(self, position: int, value: Any) -> None:
+        """set a (not null) value"""
+
+    @abstractmethod
+    def get(self, position: int) -> schemas.ScheduleValue:
+        ...
+
+    @abstractmethod
+    def interpolate(self, plan: InterpolationPlan) -> "Column":
+        ...
+
+    @abstractmethod
+    def weighted_average(self, plan: AveragePlan) -> "Column":
+        ...
+
+    def copy_from(self, position: int, column: "Column", start: int, end: int) -> None:
+        """copy the positions `start:end` of a column of the same type to `position` onwards"""
+        self.states[position : position + end - start] = column.states[start:end]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # columns of a memory mapped snapshot are copied when they are sent to another process
+        return {name: _copy_buffers(value) for name, value in self.__dict__.items()}
+
+
+def _copy_buffers(value: Any) -> Any:
+    if isinstance(value, tuple):
+        return tuple(_copy_buffers(item) for item in value)
+    if isinstance(value, memoryview):
+        return bytearray(value) if value.format == "B" else array(value.format, value.tobytes())
+    return value
+
+
+class BalancedColumn(Column):
+    def __init__(self, length: int):
+        super().__init__(length)
+        self.values = array("d", [math.nan]) * length
+
+    def accepts(self, value: Any) -> bool:
+        return isinstance(value, (int, float))
+
+    def set(self, position: int, value: Any) -> None:
+        self.states[position] = VALUE
+        self.values[position] = float(value)
+
+    def get(self, position: int) -> schemas.ScheduleValue:
+        return self.values[position] if self.states[position] == VALUE else None
+
+    def copy_from(self, position: int, column: Column, start: int, end: int) -> None:
+        super().copy_from(position, column, start, end)
+        self.values[position : position + end - start] = cast(BalancedColumn, column).values[
+            start:end
+        ]
+
+    def interpolate(self, plan: InterpolationPlan) -> "BalancedColumn":
+        column = BalancedColumn(len(plan))
+        states, values = self.states, self.values
+        for index, step in enumerate(plan):
+            if step is None:
+                continue
+            if isinstance(step, int):
+                column.states[index] = states[step]
+                column.values[index] = values[step]
+                continue
+
+            previous, following, fraction = step
+            if states[previous] == VALUE and states[following] == VALUE:
+                column.set(
+                    index, values[previous] + (values[following] - values[previous]) * fraction
+                )
+            elif states[previous] != ABSENT:
+                column.states[index] = NULL
+        return column
+
+    def weighted_average(self, plan: AveragePlan) -> "BalancedColumn":
+        column = BalancedColumn(len(plan))
+        states, values = self.states, self.values
+        for index, samples in enumerate(plan):
+            total = total_weight = 0.0
+            for position, weight in samples:
+                if states[position] == VALUE:
+                    total += values[position] * weight
+                    total_weight += weight
+            if total_weight:
+                column.set(index, total / total_weight)
+        return column
+
+
+class UnbalancedColumn(Column):
+    def __init__(self, length: int):
+        super().__init__(length)
+        self.phases = tuple(array("d", [math.nan]) * length for _ in range(3))
+
+    def accepts(self, value: Any) -> bool:
+        return isinstance(value, (dict, schemas.UnbalancedScheduleValue))
+
+    def set(self, position: int, value: Any) -> None:
+        if isinstance(value, schemas.UnbalancedScheduleValue):
+            phase_values = (value.A, value.B, value.C)
+        else:
+            phase_values = (value.get("A"), value.get("B"), value.get("C"))
+
+        self.states[position] = VALUE
+        for phase, phase_value in zip(self.phases, phase_values):
+            phase[position] = math.nan if phase_value is None else float(phase_value)
+
+    def get(self, position: int) -> schemas.ScheduleValue:
+        if self.states[position] != VALUE:
+            return None
+        a, b, c = (None if math.isnan(value) else value for value in self._phase_values(position))
+        return schemas.UnbalancedScheduleValue.construct(A=a, B=b, C=c)
+
+    def copy_from(self, position: int, column: Column, start: int, end: int) -> None:
+        super().copy_from(position, column, start, end)
+        for phase, source in zip(self.phases, cast(UnbalancedColumn, column).phases):
+            phase[position : position + end - start] = source[start:end]
+
+    def _phase_values(self, position: int) -> Tuple[float, float, float]:
+        a, b, c = self.phases
+        return a[position], b[position], c[position]
+
+    def interpolate(self, plan: InterpolationPlan) -> "UnbalancedColumn":
+        column = UnbalancedColumn(len(plan))
+        states = self.states
+        for index, step in enumerate(plan):
+            if step is None:
+                continue
+            if isinstance(step, int):
+                column.states[index] = states[step]
+                for phase, source in zip(column.phases, self.phases):
+                    phase[index] = source[step]
+                continue
+
+            previous, following, fraction = step
+            if states[previous] == VALUE and states[following] == VALUE:
+                column.states[index] = VALUE
+                # a phase which is missing at either end is nan and stays nan
+                for phase, source in zip(column.phases, self.phases):
+                    phase[index] = source[previous] + (source[following] - source[previous]) * (
+                        fraction
+                    )
+            elif states[previous] != ABSENT:
+                column.states[index] = NULL
+        return column
+
+    def weighted_average(self, plan: AveragePlan) -> "UnbalancedColumn":
+        column = UnbalancedColumn(len(plan))
+        states = self.states
+        for index, samples in enumerate(plan):
+            values = [sample for sample in samples if states[sample[0]] == VALUE]
+            if not values:
+                continue
+
+            column.states[index] = VALUE
+            for phase, source in zip(column.phases, self.phases):
+                total = total_weight = 0.0
+                for position, weight in values:
+                    if not math.isnan(source[position]):
+                        total += source[position] * weight
+                        total_weight += weight
+                phase[index] = total / total_weight if total_weight else math.nan
+        return column
+
+
+class ObjectColumn(Column):
+    """values which are not numbers (eg. cost curves) or variables with mixed types of values"""
+
+    def __init__(self, length: int):
+        super().__init__(length)
+        self.values: List[schemas.ScheduleValue] = [None] * length
+
+    def accepts(self, value: Any) -> bool:
+        return True
+
+    def set(self, position: int, value: Any) -> None:
+        if not isinstance(value, (float, schemas.UnbalancedScheduleValue)):
+            value = parse_obj_as(schemas.ScheduleValue, value)  # type: ignore
+        self.states[position] = VALUE
+        self.values[position] = value
+
+    def get(self, position: int) -> schemas.ScheduleValue:
+        return self.values[position]
+
+    def copy_from(self, position: int, column: Column, start: int, end: int) -> None:
+        super().copy_from(position, column, start, end)
+        self.values[position : position + end - start] = cast(ObjectColumn, column).values[
+            start:end
+        ]
+
+    def interpolate(self, plan: InterpolationPlan) -> "ObjectColumn":
+        column = ObjectColumn(len(plan))
+        states, values = self.states, self.values
+        for index, step in enumerate(plan):
+            if step is None:
+                continue
+            if isinstance(step, int):
+                column.states[index] = states[step]
+                column.values[index] = values[step]
+                continue
+
+            # values other than numbers cannot be interpolated
+            previous, following, fraction = step
+            previous_value, following_value = values[previous], values[following]
+            if isinstance(previous_value, float) and isinstance(following_value, float):
+                column.set(index, previous_value + (following_value - previous_value) * fraction)
+            elif states[previous] != ABSENT:
+                column.states[index] = NULL
+        return column
+
+    def weighted_average(self, plan: AveragePlan) -> "ObjectColumn":
+        # values which cannot be averaged hold the first value
+        column = ObjectColumn(len(plan))
+        for index, samples in enumerate(plan):
+            for position, _ in samples:
+                if self.states[position] == VALUE:
+                    column.states[index] = VALUE
+                    column.values[index] = self.values[position]
+                    break
+        return column
+
+
+def _new_column(value: Any, length: int) -> Column:
+    if value is None or isinstance(value, (int, float)):
+        return BalancedColumn(length)
+    if isinstance(value, (dict, schemas.UnbalancedScheduleValue)):
+        return UnbalancedColumn(length)
+    return ObjectColumn(length)
+
+
+# a range of positions of a column and the positions of its values in a gathered column
+GatherPart = Tuple[Column, int, int, Sequence[int]]
+
+
+def gather_columns(length: int, parts: Sequence[GatherPart]) -> Optional[Column]:
+    """
+    Gather the values of the (column, start, end, positions) parts into a column of `length`,
+    typed as if the values were set one by one. None if the parts have no entries.
+    """
+    column_types: Set[Type[Column]] = set()
+    has_entry = False
+    for column, start, end, _ in parts:
+        states = column.states[start:end]
+        if isinstance(column, ObjectColumn):
+            column_types.update(
+                type(_new_column(column.values[start + index], 0))
+                for index, state in enumerate(states)
+                if state == VALUE
+            )
+        elif VALUE in states:
+            column_types.add(type(column))
+        has_entry = has_entry or any(states)
+    if not has_entry:
+        return None
+
+    # a variable with several types of values keeps them as objects, one with only nulls is balanced
+    column_type: Type[Column] = BalancedColumn
+    if len(column_types) == 1:
+        column_type = column_types.pop()
+    elif column_types:
+        column_type = ObjectColumn
+
+    gathered = column_type(length)
+    for column, start, end, positions in parts:
+        if type(column) is column_type and positions[-1] - positions[0] == end - start - 1:
+            gathered.copy_from(positions[0], column, start, end)
+            continue
+        for source, position in zip(range(start, end), positions):
+            state = column.states[source]
+            if state == NULL:
+                gathered.states[position] = NULL
+            elif state == VALUE and isinstance(gathered, ObjectColumn):
+                # the values are valid already
+                gathered.states[position] = VALUE
+                gathered.values[position] = column.get(source)
+            elif state == VALUE:
+                gathered.set(position, column.get(source))
+    return gathered
+
+
+class AssetSeries:
+    """the schedule of one asset, as one column per variable"""
+
+    def __init__(self, length: int, columns: Optional[Dict[schemas.VariableName, Column]] = None):
+        self.length = length
+        self.columns = columns if columns is not None else {}
+
+    def set(self, position: int, variable: schemas.VariableName, value: Any) -> None:
+        column = self.columns.get(variable)
+        if column is None:
+            column = self.columns[variable] = _new_column(value, self.length)
+
+        if value is None:
+            column.states[position] = NULL
+            return
+
+        if not column.accepts(value):
+            column = self.columns[variable] = self._retype(column, value)
+        column.set(position, value)
+
+    def set_entry(self, position: int, entry: Mapping[schemas.VariableName, Any]) -> None:
+        for variable, value in entry.items():
+            self.set(position, variable, value)
+
+    def _retype(self, column: Column, value: Any) -> Column:
+        if VALUE in column.states:
+            # a variable with several types of values keeps them as objects
+            new_column: Column = ObjectColumn(self.length)
+            for position, state in enumerate(column.states):
+                if state == VALUE:
+                    new_column.set(position, column.get(position))
+        else:
+            # only nulls so far
+            new_column = _new_column(value, self.length)
+        new_column.states[:] = column.states
+        return new_column
+
+    def known_positions(self) -> List[int]:
+        """get the positions where the asset has an entry"""
+        known = bytearray(self.length)
+        for column in self.columns.values():
+            for position, state in enumerate(column.states):
+                if state:
+                    known[position] = 1
+        return [position for position, has_entry in enumerate(known) if has_entry]
+
+    def entry(self, position: int) -> schemas.ScheduleEntry:
+        return {
+            variable: column.get(position)
+            for variable, column in self.columns.items()
+            if column.states[position] != ABSENT
+        }
+
+    def entries(self) -> Iterator[schemas.ScheduleEntry]:
+        for position in range(self.length):
+            yield self.entry(position)
+
+    def interpolate(self, plan: InterpolationPlan) -> "AssetSeries":
+        return AssetSeries(
+            len(plan),
+            {variable: column.interpolate(plan) for variable, column in self.columns.items()},
+        )
+
+    def weighted_average(self, plan: AveragePlan) -> "AssetSeries":
+        return AssetSeries(
+            len(plan),
+            {variable: column.weighted_average(plan) for variable, column in self.columns.items()},
+        )
+
+
+class ScheduleSeries:
+    """schedule data of several assets on a shared time axis (in seconds since the epoch)"""
+
+    def __init__(
+        self,
+        time_interval: schemas.TimeInterval,
+        times: "array[float]",
+        assets: Dict[schemas.AssetID, AssetSeries],
+    ):
+        self.time_interval = time_interval
+        self.times = times
+        self.assets = assets
+
+    @property
+    def time_stamps(self) -> List[datetime]:
+        return to_datetimes(self.times)
+
+    @property
+    def size(self) -> int:
+        """the number of values (including absent ones)"""
+        return len(self.times) * sum(len(asset.columns) for asset in self.assets.values())
+
+    @staticmethod
+    def from_response_model(response: schemas.GetSchedulesResponseModel) -> "ScheduleSeries":
+        length = len(response.time_stamps)
+        assets = {}
+        for asset, entries in response.assets.items():
+            assets[asset] = asset_series = AssetSeries(length)
+            for position, entry in enumerate(entries):
+                if entry:
+                    asset_series.set_entry(position, entry)
+
+        return ScheduleSeries(response.time_interval, to_times(response.time_stamps), assets)
+
+    def to_response_model(self) -> schemas.GetSchedulesResponseModel:
+        # the values are already valid so the model is not validated again
+        return schemas.GetSchedulesResponseModel.construct(
+            time_stamps=self.time_stamps,
+            assets={asset: list(series.entries()) for asset, series in self.assets.items()},
+            time_interval=self.time_interval,
+        )
+
+
+def to_times(time_stamps: Sequence[datetime]) -> "array[float]":
+    return array("d", (time_stamp.timestamp() for time_stamp in time_stamps))
+
+
+def to_datetimes(times: Sequence[float]) -> List[datetime]:
+    return [datetime.fromtimestamp(time, timezone.utc) for time in times]
@@ -0,0 +1,329 @@
+"""
+A cache of the decoded schedule data of each asset, so that reads of other windows or time
+intervals of the same data do not read and decode it again.
+
+The schedule of an asset on a feeder is cached in chunks of `CHUNK_SECONDS`, each the asset's own
+timestamps and an `series.AssetSeries` of its entries. A read gathers the chunks of its assets
+which overlap its window onto the time axis of the read, and reads only the missing chunks from
+the database. The chunks of all scenarios share a budget of SERIES_CACHE_BYTES per process, the
+least recently used chunks are evicted first.
+
+Chunks are cached by the scenario id and its `Scenarios.revision`, which changes whenever its
+schedules change, so a worker never reads the chunks of another revision. Writing schedules to a
+scenario also drops its chunks from the cache of the worker which wrote them.
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import groupby
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    Hashable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import NoResultFound
+
+from idp_schedule_provider import config, metrics
+from idp_schedule_provider.forecaster import codec, exceptions, schemas, series
+from idp_schedule_provider.forecaster.models import (
+    Assets,
+    Feeders,
+    Scenarios,
+    ScheduleData,
+)
+
+CHUNK_SECONDS = 7 * 24 * 3600
+# estimated bytes of the objects of a chunk, and of a value of an object column
+CHUNK_OVERHEAD = 512
+OBJECT_VALUE_SIZE = 128
+# larger sets of keys are not filtered by the query but when the rows are read
+MAX_FILTER_KEYS = 500
+
+
+# (scenario id, revision) and what is cached for the scenario
+CacheKey = Tuple[Tuple[schemas.ScenarioID, int], Hashable]
+
+
+class CatalogEntry(NamedTuple):
+    feeder_key: int
+    feeder: schemas.FeederID
+    asset_key: int
+    asset_name: schemas.AssetID
+
+
+class Chunk(NamedTuple):
+    """the entries of an asset in a chunk of time, at each of its own times"""
+
+    times: "array[float]"
+    data: series.AssetSeries
+
+
+class SeriesCache:
+    """values of an estimated size, the least recently used are evicted to stay within a budget"""
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.size = 0
+        self._entries: "OrderedDict[CacheKey, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: CacheKey, value: Any, size: int) -> None:
+        if size > self.budget:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.budget:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def discard(self, scenario_id: schemas.ScenarioID) -> None:
+        """drop the entries of every revision of a scenario"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0][0] == scenario_id]:
+                self.size -= self._entries.pop(key)[1]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@lru_cache()
+def _cache(budget: int) -> SeriesCache:
+    return SeriesCache(budget)
+
+
+def get_cache() -> Optional[SeriesCache]:
+    """the cache of this process, None if it is disabled"""
+    budget = config.get_settings().series_cache_bytes
+    return _cache(budget) if budget > 0 else None
+
+
+def discard(scenario_id: schemas.ScenarioID) -> None:
+    """drop the cached data of a scenario, eg. because its schedules changed"""
+    cache = get_cache()
+    if cache is not None:
+        cache.discard(scenario_id)
+
+
+def read(
+    db: Session,
+    scenario_id: schemas.ScenarioID,
+    start_time: datetime,
+    end_time: datetime,
+    time_interval: schemas.TimeInterval,
+    *,
+    asset_name: Optional[str] = None,
+    feeders: Optional[Collection[str]] = None,
+    variables: Optional[Collection[schemas.VariableName]] = None,
+) -> Optional[series.ScheduleSeries]:
+    """
+    The stored series of the assets between the times, as read from the database by
+    `controller.get_asset_data`. None if the cache is disabled or cannot serve the read.
+    """
+    cache = get_cache()
+    if cache is None:
+        return None
+    start_lookup = time.perf_counter()
+    with metrics.SCHEDULE_STAGE_LATENCY.time("scenario_check"):
+        try:
+            scenario_key, revision = (
+                db.query(Scenarios.key, Scenarios.revision)
+                .filter(Scenarios.id == scenario_id)
+                .one()
+            )
+        except NoResultFound:
+            raise exceptions.ScenarioNotFoundException()
+    scope = (scenario_id, revision)
+
+    catalog = cache.get((scope, "catalog"))
+    if catalog is None:
+        catalog = _catalog(db, scenario_key)
+        cache.put((scope, "catalog"), catalog, CHUNK_OVERHEAD + 64 * len(catalog))
+    selected = [
+        entry
+        for entry in catalog
+        if (asset_name is None or entry.asset_name == asset_name)
+        and (feeders is None or entry.feeder in feeders)
+    ]
+    if len({entry.asset_name for entry in selected}) < len(selected):
+        # an asset on several feeders, see `snapshots.Snapshot.read`
+        return None
+
+    start, end = start_time.timestamp(), end_time.timestamp()
+    indexes = range(int(start // CHUNK_SECONDS), int(end // CHUNK_SECONDS) + 1)
+    chunks: Dict[Tuple[int, int, int], Chunk] = {}
+    missing: Set[Tuple[int, int, int]] = set()
+    for entry in selected:
+        for index in indexes:
+            key = (entry.feeder_key, entry.asset_key, index)
+            chunk = cache.get((scope, key))
+            if chunk is None:
+                missing.add(key)
+            else:
+                chunks[key] = chunk
+    metrics.CACHE_REQUESTS.inc("series", "hit", amount=len(chunks))
+    metrics.CACHE_REQUESTS.inc("series", "miss", amount=len(missing))
+
+    if missing:
+        with metrics.SCHEDULE_STAGE_LATENCY.time("query"):
+            loaded = _load(db, scenario_key, missing)
+        for key, chunk in loaded.items():
+            cache.put((scope, key), chunk, _size(chunk))
+        chunks.update(loaded)
+
+    with metrics.SCHEDULE_STAGE_LATENCY.time("build_response"):
+        parts = {
+            entry.asset_name: [
+                (chunk, bisect_left(chunk.times, start), bisect_right(chunk.times, end))
+                for chunk in (chunks[entry.feeder_key, entry.asset_key, index] for index in indexes)
+            ]
+            for entry in selected
+        }
+        data = _gather(parts, time_interval, variables)
+    # hits and misses are counted by chunk, the latency by read
+    metrics.CACHE_LATENCY.observe(
+        time.perf_counter() - start_lookup, "series", "miss" if missing else "hit"
+    )
+    return data
+
+
+def _catalog(db: Session, scenario_key: int) -> List[CatalogEntry]:
+    """the feeders and assets with schedules in the scenario"""
+    rows = (
+        db.query(ScheduleData.feeder_key, ScheduleData.asset_key)
+        .filter(ScheduleData.scenario_key == scenario_key)
+        .distinct()
+        .subquery()
+    )
+    return [
+        CatalogEntry(*row)
+        for row in db.query(rows.c.feeder_key, Feeders.name, rows.c.asset_key, Assets.name)
+        .join(Feeders, Feeders.key == rows.c.feeder_key)
+        .join(Assets, Assets.key == rows.c.asset_key)
+        .order_by(Assets.name, Feeders.name)
+    ]
+
+
+def _load(
+    db: Session, scenario_key: int, missing: Set[Tuple[int, int, int]]
+) -> Dict[Tuple[int, int, int], Chunk]:
+    """read and decode the missing (feeder key, asset key, chunk index) chunks"""
+    indexes = [index for _, _, index in missing]
+    feeder_keys = {feeder_key for feeder_key, _, _ in missing}
+    asset_keys = {asset_key for _, asset_key, _ in missing}
+    query = db.query(
+        ScheduleData.feeder_key, ScheduleData.asset_key, ScheduleData.timestamp, ScheduleData.data
+    ).filter(
+        ScheduleData.scenario_key == scenario_key,
+        ScheduleData.timestamp >= _datetime(min(indexes) * CHUNK_SECONDS),
+        ScheduleData.timestamp < _datetime((max(indexes) + 1) * CHUNK_SECONDS),
+    )
+    if len(feeder_keys) <= MAX_FILTER_KEYS:
+        query = query.filter(ScheduleData.feeder_key.in_(feeder_keys))
+    if len(asset_keys) <= MAX_FILTER_KEYS:
+        query = query.filter(ScheduleData.asset_key.in_(asset_keys))
+    rows = query.order_by(
+        ScheduleData.feeder_key, ScheduleData.asset_key, ScheduleData.timestamp
+    ).all()
+    metrics.ROWS_READ.inc(ScheduleData.__tablename__, amount=len(rows))
+
+    empty = Chunk(array("d"), series.AssetSeries(0))
+    loaded = {key: empty for key in missing}
+    for (feeder_key, asset_key, index), chunk_rows in groupby(
+        rows,
+        key=lambda row: (
+            row.feeder_key,
+            row.asset_key,
+            int(row.timestamp.timestamp() // CHUNK_SECONDS),
+        ),
+    ):
+        key = (feeder_key, asset_key, index)
+        if key not in missing:
+            continue
+        entries = list(chunk_rows)
+        data = series.AssetSeries(len(entries))
+        for position, row in enumerate(entries):
+            data.set_entry(position, codec.select(row.data))
+        loaded[key] = Chunk(series.to_times([row.timestamp for row in entries]), data)
+    return loaded
+
+
+def _gather(
+    parts: Dict[schemas.AssetID, List[Tuple[Chunk, int, int]]],
+    time_interval: schemas.TimeInterval,
+    variables: Optional[Collection[schemas.VariableName]],
+) -> series.ScheduleSeries:
+    """the read of the (chunk, start, end) parts of each asset, on the times of all of them"""
+    times = array(
+        "d",
+        sorted(
+            {
+                time
+                for asset_parts in parts.values()
+                for chunk, start, end in asset_parts
+                for time in chunk.times[start:end]
+            }
+        ),
+    )
+    positions = {time: position for position, time in enumerate(times)}
+
+    assets: Dict[schemas.AssetID, series.AssetSeries] = {}
+    for asset_name, asset_parts in parts.items():
+        asset_parts = [part for part in asset_parts if part[2] > part[1]]
+        if not asset_parts:
+            continue
+        column_parts: Dict[schemas.VariableName, List[series.GatherPart]] = {}
+        for chunk, start, end in asset_parts:
+            targets = [positions[time] for time in chunk.times[start:end]]
+            for variable, column in chunk.data.columns.items():
+                if variables is None or variable in variables:
+                    column_parts.setdefault(variable, []).append((column, start, end, targets))
+
+        columns = {}
+        for variable, variable_parts in column_parts.items():
+            gathered = series.gather_columns(len(times), variable_parts)
+            if gathered is not None:
+                columns[variable] = gathered
+        assets[asset_name] = series.AssetSeries(len(times), columns)
+    return series.ScheduleSeries(time_interval, times, assets)
+
+
+def _size(chunk: Chunk) -> int:
+    """the estimated bytes of a chunk"""
+    length = len(chunk.times)
+    size = CHUNK_OVERHEAD + 8 * length
+    for column in chunk.data.columns.values():
+        if isinstance(column, series.BalancedColumn):
+            size += 9 * length
+        elif isinstance(column, series.UnbalancedColumn):
+            size += 25 * length
+        else:
+            size += (1 + OBJECT_VALUE_SIZE) * length
+    return size
+
+
+def _datetime(time: float) -> datetime:
+    return datetime.fromtimestamp(time, timezone.utc)
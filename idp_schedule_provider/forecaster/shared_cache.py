@@ -0,0 +1,260 @@
+"""
+A cache of resampled schedule reads shared by the workers of a host, so that a read which one
+worker resampled is served to the other workers without reading or resampling it again.
+
+Results are stored in the SQLite database at SHARED_CACHE_PATH, one row per read. A result is
+published by committing its row, so other workers see either all of it or nothing, and the
+database is in write-ahead-log mode so that lookups do not wait for a worker which is publishing.
+The oldest results are deleted when the results of all workers exceed SHARED_CACHE_BYTES.
+
+Results are keyed by the parameters of the read and the `Scenarios.revision` of its scenario, so a
+scenario whose schedules change is read again. Writing schedules to a scenario also deletes its
+results. A lookup which fails, eg. because the database is busy, is a miss rather than an error.
+
+A result is stored as the columns of its `series.ScheduleSeries`, arrays are in the byte order of
+the host and are followed by a JSON header with their offsets:
+
+    FORMAT
+    times                 float64 per timestamp
+    per asset and column  states, a byte per timestamp, and the values
+                            balanced: float64 per timestamp
+                            unbalanced: float64 per timestamp for each phase
+                            object: in the header, as JSON
+    header                JSON with the offsets of the sections
+    uint64 header offset, uint64 header length
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import struct
+import threading
+import time
+from array import array
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, cast
+
+from pydantic.json import pydantic_encoder
+from sqlalchemy.orm import Session
+
+from idp_schedule_provider import config, metrics
+from idp_schedule_provider.forecaster import exceptions, schemas, series
+from idp_schedule_provider.forecaster.models import Scenarios
+
+logger = logging.getLogger(__name__)
+
+# results of another format (eg. of an earlier version) are misses
+FORMAT = b"IDPSHRD1"
+_FOOTER = struct.Struct("<QQ")
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, scenario_id TEXT NOT NULL, "
+    "size INTEGER NOT NULL, value BLOB NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS results_scenario_id ON results (scenario_id)",
+)
+
+
+class SharedCache:
+    """results stored in a SQLite database, the oldest are deleted to stay within a budget"""
+
+    def __init__(self, path: str, budget: int):
+        self.path = path
+        self.budget = budget
+        # the results are only readable by the user of the workers
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        # connections cannot be shared by the threads of a worker
+        self._local = threading.local()
+        connection = self._connection()
+        for statement in SCHEMA:
+            connection.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # transactions are started explicitly
+            connection = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            row = (
+                self._connection()
+                .execute("SELECT value FROM results WHERE key = ?", (key,))
+                .fetchone()
+            )
+        except sqlite3.Error:
+            logger.warning("shared cache lookup failed", exc_info=True)
+            return None
+        return row[0] if row is not None else None
+
+    def put(self, key: str, scenario_id: schemas.ScenarioID, value: bytes) -> None:
+        if len(value) > self.budget:
+            return
+        connection = self._connection()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                    (key, scenario_id, len(value), value),
+                )
+                (size,) = connection.execute("SELECT SUM(size) FROM results").fetchone()
+                if size > self.budget:
+                    # rows are replaced rather than updated, the oldest have the lowest rowid
+                    oldest = connection.execute("SELECT rowid, size FROM results ORDER BY rowid")
+                    for rowid, row_size in oldest.fetchall():
+                        if size <= self.budget:
+                            break
+                        connection.execute("DELETE FROM results WHERE rowid = ?", (rowid,))
+                        size -= row_size
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            logger.warning("shared cache publication failed", exc_info=True)
+
+    def discard(self, scenario_id: schemas.ScenarioID) -> None:
+        try:
+            self._connection().execute("DELETE FROM results WHERE scenario_id = ?", (scenario_id,))
+        except sqlite3.Error:
+            # the results are of an old revision of the scenario and are not read anyway
+            logger.warning("shared cache invalidation failed", exc_info=True)
+
+
+@lru_cache()
+def _cache(path: str, budget: int) -> SharedCache:
+    return SharedCache(path, budget)
+
+
+def get_cache() -> Optional[SharedCache]:
+    """the shared cache, None if it is disabled"""
+    settings = config.get_settings()
+    if not settings.shared_cache_path:
+        return None
+    return _cache(settings.shared_cache_path, settings.shared_cache_bytes)
+
+
+def discard(scenario_id: schemas.ScenarioID) -> None:
+    """delete the results of a scenario, eg. because its schedules changed"""
+    cache = get_cache()
+    if cache is not None:
+        cache.discard(scenario_id)
+
+
+def read_through(
+    db: Session,
+    scenario_id: schemas.ScenarioID,
+    parameters: List[Any],
+    read: Callable[[], series.ScheduleSeries],
+) -> series.ScheduleSeries:
+    """
+    The cached result of the read of the scenario with the (JSON) parameters, or the result of
+    `read`, which is then published to the other workers. The read is not cached if the cache is
+    disabled.
+    """
+    cache = get_cache()
+    if cache is None:
+        return read()
+
+    # not the "scenario_check" stage, which the read itself records again on a miss
+    with metrics.SCHEDULE_STAGE_LATENCY.time("shared_cache_revision"):
+        revision = db.query(Scenarios.revision).filter(Scenarios.id == scenario_id).scalar()
+    if revision is None:
+        raise exceptions.ScenarioNotFoundException()
+    key = hashlib.sha256(
+        json.dumps([scenario_id, revision, parameters], separators=(",", ":")).encode()
+    ).hexdigest()
+
+    start = time.perf_counter()
+    value = cache.get(key)
+    data = loads(value) if value is not None else None
+    result = "hit" if data is not None else "miss"
+    metrics.CACHE_REQUESTS.inc("shared", result)
+    metrics.CACHE_LATENCY.observe(time.perf_counter() - start, "shared", result)
+    if data is not None:
+        return data
+
+    data = read()
+    cache.put(key, scenario_id, dumps(data))
+    return data
+
+
+def dumps(data: series.ScheduleSeries) -> bytes:
+    """the stored form of a result"""
+    sections = [FORMAT]
+    offset = len(FORMAT)
+
+    def section(buffer: Any) -> int:
+        nonlocal offset
+        sections.append(bytes(buffer))
+        start, offset = offset, offset + len(sections[-1])
+        return start
+
+    assets: Dict[str, Dict[str, Any]] = {}
+    header = {
+        "time_interval": data.time_interval.value,
+        "length": len(data.times),
+        "times": section(data.times),
+        "assets": assets,
+    }
+    for asset_name, asset_series in data.assets.items():
+        columns: Dict[str, Any] = {}
+        assets[asset_name] = columns
+        for variable, column in asset_series.columns.items():
+            stored: Dict[str, Any] = {"states": section(column.states)}
+            if isinstance(column, series.BalancedColumn):
+                stored.update(type="balanced", values=section(column.values))
+            elif isinstance(column, series.UnbalancedColumn):
+                stored.update(type="unbalanced", phases=[section(phase) for phase in column.phases])
+            else:
+                stored.update(type="object", values=cast(series.ObjectColumn, column).values)
+            columns[variable] = stored
+
+    encoded = json.dumps(header, default=pydantic_encoder, separators=(",", ":")).encode()
+    sections.extend([encoded, _FOOTER.pack(offset, len(encoded))])
+    return b"".join(sections)
+
+
+def loads(value: bytes) -> Optional[series.ScheduleSeries]:
+    """the result stored as `value`, None if it has another format"""
+    if not value.startswith(FORMAT) or len(value) < len(FORMAT) + _FOOTER.size:
+        return None
+    header_offset, header_length = _FOOTER.unpack(value[-_FOOTER.size :])
+    header = json.loads(value[header_offset : header_offset + header_length])
+    length = header["length"]
+    view = memoryview(value)
+
+    def doubles(offset: int) -> "array[float]":
+        values = array("d")
+        values.frombytes(view[offset : offset + length * values.itemsize])
+        return values
+
+    assets = {}
+    for asset_name, columns in header["assets"].items():
+        assets[asset_name] = asset_series = series.AssetSeries(length)
+        for variable, stored in columns.items():
+            states = bytearray(view[stored["states"] : stored["states"] + length])
+            column: series.Column
+            if stored["type"] == "balanced":
+                column = series.BalancedColumn(0)
+                column.values = doubles(stored["values"])
+            elif stored["type"] == "unbalanced":
+                column = series.UnbalancedColumn(0)
+                column.phases = tuple(doubles(phase) for phase in stored["phases"])
+            else:
+                # validated again, which also gives the values their type
+                column = series.ObjectColumn(length)
+                for position, state in enumerate(states):
+                    if state == series.VALUE:
+                        column.set(position, stored["values"][position])
+            column.states = states
+            asset_series.columns[variable] = column
+
+    return series.ScheduleSeries(
+        schemas.TimeInterval(header["time_interval"]), doubles(header["times"]), assets
+    )
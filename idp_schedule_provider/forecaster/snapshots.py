@@ -0,0 +1,385 @@
+"""
+Read-only snapshots of the schedule data of a scenario, so that the schedule reads of a scenario
+which no longer changes don't use the database.
+
+    python -m idp_schedule_provider.forecaster.snapshots freeze sce1 [--url sqlite:///./forecast.db]
+
+A snapshot is a file in SNAPSHOT_DIR which every worker maps into memory, so the workers of a host
+share it through the page cache. The columns of a read are views of the file rather than copies.
+Writing schedules to the scenario or deleting it discards its snapshot. A snapshot holds the
+`Scenarios.revision` it was frozen from and is only read while the scenario has that revision, so
+the snapshot of a scenario which was deleted or seeded again by other means is not read.
+
+The file holds the columns of `series.AssetSeries`, one per variable of each asset and feeder,
+aligned to the timestamps of the whole scenario. Sections start at multiples of 8 bytes and arrays
+are in the byte order of the host.
+
+    MAGIC
+    times                 float64 per timestamp of the scenario (seconds since the epoch), sorted
+    per asset and feeder  known: uint32 count of the timestamps with an entry before each position
+                          per column: states, a byte per timestamp, and the values
+                            balanced: float64 per timestamp
+                            unbalanced: float64 per timestamp for each phase
+                            object: uint64 offsets (one per timestamp and the end) of JSON values
+    header                JSON with the offsets of the sections
+    uint64 header offset, uint64 header length, MAGIC
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from itertools import groupby
+from operator import attrgetter
+from typing import Any, Collection, Dict, List, Optional, Tuple, Type
+from urllib.parse import quote
+
+from pydantic.json import pydantic_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from idp_schedule_provider import config
+from idp_schedule_provider.forecaster import codec, exceptions, schemas, series
+from idp_schedule_provider.forecaster.models import (
+    Assets,
+    Feeders,
+    Scenarios,
+    ScheduleData,
+)
+
+MAGIC = b"IDPSNAP1"
+_FOOTER = struct.Struct("<QQ")
+
+# the open snapshots of this process by path, with the identity of the file they were read from
+_snapshots: Dict[str, Tuple[Tuple[int, int, int], "Snapshot"]] = {}
+_lock = threading.Lock()
+
+
+class Snapshot:
+    """a memory mapped snapshot file"""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self.view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        if self.view[: len(MAGIC)] != MAGIC or self.view[-len(MAGIC) :] != MAGIC:
+            raise ValueError(f"{path} is not a snapshot")
+        header_offset, header_length = _FOOTER.unpack(
+            self.view[-len(MAGIC) - _FOOTER.size : -len(MAGIC)]
+        )
+        header = json.loads(bytes(self.view[header_offset : header_offset + header_length]))
+        # snapshots of earlier versions have no revision and are never read
+        self.revision: Optional[int] = header.get("revision")
+        self.length: int = header["length"]
+        self.times = self._array(header["times"], "d", self.length)
+        self.assets: List[Dict[str, Any]] = header["assets"]
+        self.assets_by_name: Dict[str, List[Dict[str, Any]]] = {}
+        for asset in self.assets:
+            self.assets_by_name.setdefault(asset["name"], []).append(asset)
+
+    def read(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        time_interval: schemas.TimeInterval,
+        *,
+        asset_name: Optional[str] = None,
+        feeders: Optional[Collection[str]] = None,
+        variables: Optional[Collection[schemas.VariableName]] = None,
+    ) -> Optional[series.ScheduleSeries]:
+        """
+        The stored series of the assets between the times, as read from the database by
+        `controller.get_asset_data`. None if it cannot be read from the snapshot.
+        """
+        start = bisect_left(self.times, start_time.timestamp())
+        end = bisect_right(self.times, end_time.timestamp())
+
+        candidates = self.assets if asset_name is None else self.assets_by_name.get(asset_name, [])
+        selected = []
+        for asset in candidates:
+            if feeders is not None and asset["feeder"] not in feeders:
+                continue
+            known = self._array(asset["known"], "I", self.length + 1)
+            if known[end] - known[start]:
+                selected.append((asset, known))
+        if len({asset["name"] for asset, _ in selected}) < len(selected):
+            # the rows of an asset on several feeders are merged by the database read, which
+            # interleaves them by timestamp, so such a read falls back to the database (the series
+            # cache does the same)
+            return None
+        if not selected:
+            return series.ScheduleSeries(time_interval, array("d"), {})
+
+        times = array("d", self.times[start:end].tobytes())
+        assets = {asset["name"]: self._asset(asset, start, end, variables) for asset, _ in selected}
+        # the time axis of a read only has the timestamps where one of its assets has an entry,
+        # usually one asset has an entry at every timestamp and the views are used as they are
+        if not any(known[end] - known[start] == end - start for _, known in selected):
+            positions = [
+                position
+                for position in range(start, end)
+                if any(known[position + 1] - known[position] for _, known in selected)
+            ]
+            plan = [position - start for position in positions]
+            times = array("d", (times[index] for index in plan))
+            assets = {name: asset_series.interpolate(plan) for name, asset_series in assets.items()}
+        return series.ScheduleSeries(time_interval, times, assets)
+
+    def _asset(
+        self,
+        asset: Dict[str, Any],
+        start: int,
+        end: int,
+        variables: Optional[Collection[schemas.VariableName]],
+    ) -> series.AssetSeries:
+        columns: Dict[schemas.VariableName, series.Column] = {}
+        decoded = series.AssetSeries(end - start)
+        for variable, column in asset["columns"].items():
+            if variables is not None and variable not in variables:
+                continue
+            states = self._array(column["states"], "B", self.length)[start:end]
+            if column["type"] == "balanced":
+                values = self._array(column["values"], "d", self.length)[start:end]
+                columns[variable] = _mapped(series.BalancedColumn, states, values=values)
+            elif column["type"] == "unbalanced":
+                phases = tuple(
+                    self._array(phase, "d", self.length)[start:end] for phase in column["phases"]
+                )
+                columns[variable] = _mapped(series.UnbalancedColumn, states, phases=phases)
+            else:
+                # decoded and set as the rows of the database, which also gives the same type
+                offsets = self._array(column["offsets"], "Q", self.length + 1)
+                parsed: Dict[bytes, Any] = {}
+                for index, state in enumerate(states):
+                    if state == series.NULL:
+                        decoded.set(index, variable, None)
+                    elif state == series.VALUE:
+                        position = start + index
+                        value = bytes(self.view[offsets[position] : offsets[position + 1]])
+                        object_column = decoded.columns.get(variable)
+                        if value in parsed and isinstance(object_column, series.ObjectColumn):
+                            # a value seen before, which does not need to be validated again
+                            object_column.states[index] = series.VALUE
+                            object_column.values[index] = parsed[value]
+                            continue
+                        decoded.set(index, variable, json.loads(value))
+                        object_column = decoded.columns[variable]
+                        if isinstance(object_column, series.ObjectColumn):
+                            parsed[value] = object_column.values[index]
+                if variable in decoded.columns:
+                    columns[variable] = decoded.columns[variable]
+        return series.AssetSeries(end - start, columns)
+
+    def _array(self, offset: int, typecode: str, count: int) -> memoryview:
+        return self.view[offset : offset + count * array(typecode).itemsize].cast(typecode)
+
+
+def _mapped(column_type: Type[series.Column], states: memoryview, **buffers: Any) -> series.Column:
+    # the buffers of the snapshot instead of new arrays
+    column = column_type.__new__(column_type)
+    column.__dict__.update(buffers, states=states)
+    return column
+
+
+def path(scenario_id: schemas.ScenarioID, directory: Optional[str] = None) -> Optional[str]:
+    """the path of the snapshot of a scenario, None if snapshots are not enabled"""
+    directory = directory or config.get_settings().snapshot_dir
+    if not directory:
+        return None
+    return os.path.join(directory, f"{quote(scenario_id, safe='')}.snapshot")
+
+
+def get(scenario_id: schemas.ScenarioID) -> Optional[Snapshot]:
+    """the snapshot of a scenario, None if it has none"""
+    snapshot_path = path(scenario_id)
+    if snapshot_path is None:
+        return None
+    try:
+        stat = os.stat(snapshot_path)
+    except FileNotFoundError:
+        with _lock:
+            _snapshots.pop(snapshot_path, None)
+        return None
+
+    identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        cached = _snapshots.get(snapshot_path)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+    # the file is replaced as a whole, a snapshot which is still in use stays mapped
+    snapshot = Snapshot(snapshot_path)
+    with _lock:
+        _snapshots[snapshot_path] = (identity, snapshot)
+    return snapshot
+
+
+def discard(scenario_id: schemas.ScenarioID, directory: Optional[str] = None) -> None:
+    """delete the snapshot of a scenario, eg. because its schedules changed"""
+    snapshot_path = path(scenario_id, directory)
+    if snapshot_path is not None:
+        try:
+            os.unlink(snapshot_path)
+        except FileNotFoundError:
+            pass
+
+
+def freeze(db: Session, scenario_id: schemas.ScenarioID, directory: Optional[str] = None) -> str:
+    """write the snapshot of a scenario, get its path"""
+    snapshot_path = path(scenario_id, directory)
+    if snapshot_path is None:
+        raise ValueError("SNAPSHOT_DIR is not set")
+    scenario = db.query(Scenarios).filter(Scenarios.id == scenario_id).one_or_none()
+    if scenario is None:
+        raise exceptions.ScenarioNotFoundException()
+
+    filters = [ScheduleData.scenario_key == scenario.key]
+    time_stamps = [
+        row.timestamp
+        for row in db.query(ScheduleData.timestamp)
+        .filter(*filters)
+        .distinct()
+        .order_by(ScheduleData.timestamp)
+    ]
+    positions = {time_stamp: position for position, time_stamp in enumerate(time_stamps)}
+    rows = (
+        db.query(
+            Assets.name.label("asset_name"),
+            Feeders.name.label("feeder"),
+            ScheduleData.timestamp,
+            ScheduleData.data,
+        )
+        .select_from(ScheduleData)
+        .join(Assets, ScheduleData.asset_key == Assets.key)
+        .join(Feeders, ScheduleData.feeder_key == Feeders.key)
+        .filter(*filters)
+        .order_by(Assets.name, Feeders.name, ScheduleData.timestamp)
+        .yield_per(10_000)
+    )
+
+    # written next to the snapshot and renamed, so readers see either the old or the new file
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    temporary_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, "wb") as f:
+            writer = _Writer(f)
+            writer.write(MAGIC)
+            header: Dict[str, Any] = {
+                "scenario_id": scenario_id,
+                "revision": scenario.revision,
+                "length": len(time_stamps),
+                "times": writer.write(series.to_times(time_stamps).tobytes()),
+                "assets": [],
+            }
+            for (asset_name, feeder), asset_rows in groupby(
+                rows, key=attrgetter("asset_name", "feeder")
+            ):
+                asset_series = series.AssetSeries(len(time_stamps))
+                for row in asset_rows:
+                    asset_series.set_entry(positions[row.timestamp], codec.select(row.data))
+                header["assets"].append(
+                    dict(name=asset_name, feeder=feeder, **_write_asset(writer, asset_series))
+                )
+
+            header_bytes = json.dumps(header, separators=(",", ":")).encode()
+            header_offset = writer.write(header_bytes)
+            f.write(_FOOTER.pack(header_offset, len(header_bytes)) + MAGIC)
+        os.replace(temporary_path, snapshot_path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.unlink(temporary_path)
+    return snapshot_path
+
+
+class _Writer:
+    """writes sections which start at multiples of 8 bytes"""
+
+    def __init__(self, f: Any) -> None:
+        self.f = f
+        self.offset = 0
+
+    def write(self, data: bytes) -> int:
+        """write the data, get its offset"""
+        offset = self.offset
+        padding = -len(data) % 8
+        self.f.write(data + bytes(padding))
+        self.offset += len(data) + padding
+        return offset
+
+
+def _write_asset(writer: _Writer, asset_series: series.AssetSeries) -> Dict[str, Any]:
+    known = array("I", [0])
+    for state in _has_entry(asset_series):
+        known.append(known[-1] + state)
+
+    columns: Dict[str, Any] = {}
+    for variable, column in asset_series.columns.items():
+        states = writer.write(bytes(column.states))
+        if isinstance(column, series.BalancedColumn):
+            columns[variable] = {
+                "type": "balanced",
+                "states": states,
+                "values": writer.write(column.values.tobytes()),
+            }
+        elif isinstance(column, series.UnbalancedColumn):
+            columns[variable] = {
+                "type": "unbalanced",
+                "states": states,
+                "phases": [writer.write(phase.tobytes()) for phase in column.phases],
+            }
+        else:
+            values = [
+                json.dumps(
+                    column.get(position), default=pydantic_encoder, separators=(",", ":")
+                ).encode()
+                if state == series.VALUE
+                else b""
+                for position, state in enumerate(column.states)
+            ]
+            # the offsets are from the start of the file
+            start = writer.offset + (len(values) + 1) * 8
+            offsets = array("Q", [start])
+            for value in values:
+                offsets.append(offsets[-1] + len(value))
+            columns[variable] = {
+                "type": "object",
+                "states": states,
+                "offsets": writer.write(offsets.tobytes()),
+            }
+            writer.write(b"".join(values))
+    return {"known": writer.write(known.tobytes()), "columns": columns}
+
+
+def _has_entry(asset_series: series.AssetSeries) -> bytearray:
+    has_entry = bytearray(asset_series.length)
+    for position in asset_series.known_positions():
+        has_entry[position] = 1
+    return has_entry
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--url", default=os.environ.get("SQLALCHEMY_DATABASE_URL", "sqlite:///./forecast.db")
+    )
+    parser.add_argument("--dir", help="defaults to SNAPSHOT_DIR")
+    parser.add_argument("command", choices=("freeze", "discard"))
+    parser.add_argument("scenario_id")
+    args = parser.parse_args(argv)
+    if path(args.scenario_id, args.dir) is None:
+        parser.error("set SNAPSHOT_DIR or --dir")
+
+    if args.command == "discard":
+        discard(args.scenario_id, args.dir)
+        return
+    db = Session(bind=create_engine(args.url))
+    try:
+        print(freeze(db, args.scenario_id, args.dir))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Incremental JSON serialization of schedule responses.
+"""
+import json
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple
+
+from pydantic.json import pydantic_encoder
+
+from idp_schedule_provider.forecaster import schemas
+
+# responses are sent in chunks of at least this many characters
+CHUNK_SIZE = 64 * 1024
+
+
+def schedule_json_chunks(
+    time_interval: schemas.TimeInterval,
+    time_stamps: Sequence[datetime],
+    assets: Iterable[Tuple[schemas.AssetID, Iterable[schemas.ScheduleEntry]]],
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Serialize a schedule response as it is produced, in the same format as
+    `GetSchedulesResponseModel.json()`.
+    """
+    buffer: List[str] = []
+    length = 0
+    for piece in _schedule_json_pieces(time_interval, time_stamps, assets):
+        buffer.append(piece)
+        length += len(piece)
+        if length >= chunk_size:
+            yield "".join(buffer).encode()
+            buffer = []
+            length = 0
+
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def _schedule_json_pieces(
+    time_interval: schemas.TimeInterval,
+    time_stamps: Sequence[datetime],
+    assets: Iterable[Tuple[schemas.AssetID, Iterable[schemas.ScheduleEntry]]],
+) -> Iterator[str]:
+    # fields are in the order they are declared on the model
+    yield '{"time_stamps": ' + _dumps(time_stamps) + ', "assets": {'
+    for asset_index, (asset, entries) in enumerate(assets):
+        yield (", " if asset_index else "") + _dumps(asset) + ": ["
+        for entry_index, entry in enumerate(entries):
+            yield (", " if entry_index else "") + _dumps(entry)
+        yield "]"
+    yield '}, "time_interval": ' + _dumps(time_interval.value) + "}"
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=pydantic_encoder)
@@ -0,0 +1,474 @@
+"""
+Offline import and export of a scenario as a directory of files, one file of schedules and one of
+events per feeder, without going through the HTTP API.
+
+    python -m idp_schedule_provider.forecaster.transfer export sce1 ./sce1 [--format csv] [--jobs 4]
+    python -m idp_schedule_provider.forecaster.transfer import ./sce1 [--scenario-id sce1]
+
+    <directory>/scenario.json            id, name, description and the row count of every file
+    <directory>/schedules/<feeder>.csv   feeder, asset_name, timestamp, data
+    <directory>/events/<feeder>.csv      feeder, asset_name, event_type, start_timestamp,
+                                         end_timestamp, data
+
+Files are csv (data as JSON text), ndjson (one JSON object per row) or parquet (needs pyarrow).
+Feeders are read or written in parallel by `--jobs` forked processes. On import the rows are
+encoded in the processes and written with the bulk writer in a single transaction, since the
+database has a single writer, and an existing scenario with the same id is replaced. Row counts
+are checked against scenario.json and the database on import, and against the database on export.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import re
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import URL
+from sqlalchemy.orm import Session
+
+from idp_schedule_provider.forecaster import (
+    bulk,
+    codec,
+    controller,
+    dimensions,
+    exceptions,
+    schemas,
+)
+from idp_schedule_provider.forecaster.models import (
+    Assets,
+    Base,
+    EventData,
+    Feeders,
+    ScheduleData,
+)
+
+MANIFEST = "scenario.json"
+BATCH_SIZE = 10_000
+
+# the files of each kind of data: (model, columns of the files)
+KINDS: Dict[str, Tuple[Any, Tuple[str, ...]]] = {
+    "schedules": (ScheduleData, ("feeder", "asset_name", "timestamp", "data")),
+    "events": (
+        EventData,
+        ("feeder", "asset_name", "event_type", "start_timestamp", "end_timestamp", "data"),
+    ),
+}
+TIMESTAMP_COLUMNS = ("timestamp", "start_timestamp", "end_timestamp")
+
+
+class FileFormat(ABC):
+    """
+    Rows stored in files of a format. Rows are written as tuples of the values of the columns, the
+    timestamps as datetimes and the data as JSON text, and read as dicts with the data decoded.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def write(self, path: str, columns: Tuple[str, ...], rows: Iterable[Tuple]) -> int:
+        """write the rows, get their number"""
+
+    @abstractmethod
+    def read(self, path: str) -> Iterator[bulk.Row]:
+        ...
+
+
+class CsvFormat(FileFormat):
+    name = "csv"
+
+    def write(self, path: str, columns: Tuple[str, ...], rows: Iterable[Tuple]) -> int:
+        timestamps = [column in TIMESTAMP_COLUMNS for column in columns]
+        written = 0
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow(
+                    [
+                        value.isoformat() if timestamp else value
+                        for value, timestamp in zip(row, timestamps)
+                    ]
+                )
+                written += 1
+        return written
+
+    def read(self, path: str) -> Iterator[bulk.Row]:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                row["data"] = json.loads(row["data"]) if row["data"] else None
+                if "event_type" in row:
+                    row["event_type"] = row["event_type"] or None
+                yield row
+
+
+class NdjsonFormat(FileFormat):
+    name = "ndjson"
+
+    def write(self, path: str, columns: Tuple[str, ...], rows: Iterable[Tuple]) -> int:
+        # the data is written as it is, the other values as JSON strings
+        keys = [f'"{column}":' for column in columns]
+        formats: List[Callable[[Any], str]] = [
+            _iso_json if column in TIMESTAMP_COLUMNS else _str if column == "data" else _dumps
+            for column in columns
+        ]
+        written = 0
+        with open(path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(
+                    "{"
+                    + ",".join(
+                        key + format_value(value)
+                        for key, format_value, value in zip(keys, formats, row)
+                    )
+                    + "}\n"
+                )
+                written += 1
+        return written
+
+    def read(self, path: str) -> Iterator[bulk.Row]:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class ParquetFormat(FileFormat):
+    """parquet files with the data as JSON text, written and read in batches with pyarrow"""
+
+    name = "parquet"
+
+    def write(self, path: str, columns: Tuple[str, ...], rows: Iterable[Tuple]) -> int:
+        pyarrow, parquet = _pyarrow()
+        schema = pyarrow.schema(
+            [
+                (column, pyarrow.timestamp("us", tz="UTC"))
+                if column in TIMESTAMP_COLUMNS
+                else (column, pyarrow.string())
+                for column in columns
+            ]
+        )
+        written = 0
+        with parquet.ParquetWriter(path, schema) as writer:
+            iterator = iter(rows)
+            while True:
+                batch = list(islice(iterator, BATCH_SIZE))
+                if not batch:
+                    return written
+                arrays = [list(values) for values in zip(*batch)]
+                writer.write_table(pyarrow.table(arrays, schema=schema))
+                written += len(batch)
+
+    def read(self, path: str) -> Iterator[bulk.Row]:
+        _, parquet = _pyarrow()
+        for batch in parquet.ParquetFile(path).iter_batches(batch_size=BATCH_SIZE):
+            for row in batch.to_pylist():
+                row["data"] = json.loads(row["data"]) if row["data"] else None
+                if "event_type" in row:
+                    row["event_type"] = row["event_type"] or None
+                yield row
+
+
+FORMATS: Dict[str, FileFormat] = {
+    file_format.name: file_format for file_format in (CsvFormat(), NdjsonFormat(), ParquetFormat())
+}
+
+
+def export_scenario(
+    engine: Engine, scenario_id: str, directory: str, file_format: str = "csv", jobs: int = 1
+) -> Dict[str, int]:
+    """write the scenario to files in the directory, get the row count of each kind of data"""
+    db = Session(bind=engine)
+    try:
+        scenario = controller.get_scenario(db, scenario_id=scenario_id)
+        if scenario is None:
+            raise exceptions.ScenarioNotFoundException()
+        # the row count of every feeder of each kind
+        expected = {
+            kind: db.query(Feeders.key, Feeders.name, func.count(model.id))
+            .join(model, model.feeder_key == Feeders.key)
+            .filter(model.scenario_key == scenario.key)
+            .group_by(Feeders.key, Feeders.name)
+            .order_by(Feeders.name)
+            .all()
+            for kind, (model, _) in KINDS.items()
+        }
+        manifest: Dict[str, Any] = {
+            "id": scenario.id,
+            "name": scenario.name,
+            "description": scenario.description,
+            "files": {},
+        }
+    finally:
+        db.close()
+
+    tasks = []
+    for kind, feeders in expected.items():
+        os.makedirs(os.path.join(directory, kind), exist_ok=True)
+        for index, (feeder_key, feeder, count) in enumerate(feeders):
+            name = f"{kind}/{_file_name(index, feeder)}.{file_format}"
+            tasks.append((name, kind, feeder_key, count))
+
+    counts = dict.fromkeys(KINDS, 0)
+    arguments = [
+        (engine.url, scenario.key, feeder_key, kind, os.path.join(directory, name), file_format)
+        for name, kind, feeder_key, _ in tasks
+    ]
+    for (name, kind, _, count), written in zip(tasks, _map(_export_file, arguments, jobs)):
+        if written != count:
+            raise exceptions.TransferException(f"{name}: wrote {written} of {count} rows")
+        manifest["files"][name] = written
+        counts[kind] += written
+
+    # written last, an export without it did not finish
+    with open(os.path.join(directory, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return counts
+
+
+def import_scenario(
+    engine: Engine, directory: str, scenario_id: Optional[str] = None, jobs: int = 1
+) -> Dict[str, int]:
+    """replace the scenario with the one in the directory, get the row count of each kind"""
+    manifest = _read_manifest(directory)
+    scenario_id = scenario_id or manifest.get("id")
+    if not scenario_id:
+        raise exceptions.TransferException(f"no {MANIFEST} in {directory}, give a scenario id")
+
+    files = _data_files(directory)
+    missing = set(manifest.get("files", {})) - {name for name, _ in files}
+    if missing:
+        raise exceptions.TransferException(f"missing files: {', '.join(sorted(missing))}")
+
+    # the names of scenarios are unique, a copy under another id is named after its id
+    name = manifest.get("name") if scenario_id == manifest.get("id") else None
+    db = Session(bind=engine)
+    try:
+        controller.delete_scenario(db, scenario_id)
+        controller.create_or_update_scenario(
+            db,
+            scenario_id,
+            schemas.ScenarioModel(
+                name=name or scenario_id, description=manifest.get("description")
+            ),
+        )
+        scenario = controller.get_scenario(db, scenario_id=scenario_id)
+        assert scenario is not None  # nosec
+
+        counts = dict.fromkeys(KINDS, 0)
+        arguments = [(os.path.join(directory, name), kind) for name, kind in files]
+        for (name, kind), rows in zip(files, _map(_read_file, arguments, jobs)):
+            count = manifest.get("files", {}).get(name)
+            if count is not None and count != len(rows):
+                raise exceptions.TransferException(f"{name}: read {len(rows)} of {count} rows")
+            table = KINDS[kind][0].__table__
+            for start in range(0, len(rows), BATCH_SIZE):
+                bulk.insert(
+                    db, table, _with_keys(db, scenario.key, rows[start : start + BATCH_SIZE])
+                )
+            counts[kind] += len(rows)
+
+        for kind, (model, _) in KINDS.items():
+            stored = db.query(func.count(model.id)).filter(model.scenario_key == scenario.key)
+            if stored.scalar() != counts[kind]:
+                raise exceptions.TransferException(
+                    f"{kind}: stored {stored.scalar()} of {counts[kind]} rows"
+                )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return counts
+
+
+def _export_file(
+    url: URL, scenario_key: int, feeder_key: int, kind: str, path: str, file_format: str
+) -> int:
+    model, columns = KINDS[kind]
+    table = model.__table__
+    assets = Assets.__table__
+    # in the order of the columns of the files, the feeder is added to each row
+    query = (
+        select([assets.c.name] + [table.c[column] for column in columns[2:]])
+        .select_from(table.join(assets, table.c.asset_key == assets.c.key))
+        .where(table.c.scenario_key == scenario_key)
+        .where(table.c.feeder_key == feeder_key)
+        .order_by(table.c.id)
+    )
+    with _engine(url).connect() as connection:
+        feeder = connection.execute(
+            select([Feeders.__table__.c.name]).where(Feeders.__table__.c.key == feeder_key)
+        ).scalar()
+        result = connection.execution_options(stream_results=True).execute(query)
+        rows = ((feeder, *row[:-1], _data_text(row[-1])) for row in result.yield_per(BATCH_SIZE))
+        return FORMATS[file_format].write(path, columns, rows)
+
+
+def _read_file(path: str, kind: str) -> List[bulk.Row]:
+    """the rows of a file with their data encoded"""
+    file_format = FORMATS[os.path.splitext(path)[1][1:]]
+    rows = []
+    for row in file_format.read(path):
+        for column in TIMESTAMP_COLUMNS:
+            if column in row:
+                row[column] = _timestamp(row[column])
+        if row["data"] is not None:
+            # stored as they are by the data column
+            row["data"] = codec.LazyEntry(codec.encode(row["data"]))
+        rows.append(row)
+    return rows
+
+
+def _with_keys(db: Session, scenario_key: int, rows: List[bulk.Row]) -> List[bulk.Row]:
+    assets = dimensions.intern(db, Assets.name, (row["asset_name"] for row in rows))
+    feeders = dimensions.intern(db, Feeders.name, (row["feeder"] for row in rows))
+    keyed = []
+    for row in rows:
+        row = dict(row, scenario_key=scenario_key)
+        row["asset_key"] = assets[row.pop("asset_name")]
+        row["feeder_key"] = feeders[row.pop("feeder")]
+        keyed.append(row)
+    return keyed
+
+
+def _map(function: Callable[..., Any], arguments: Sequence[tuple], jobs: int) -> Iterator[Any]:
+    """the results of the function for each of the arguments, computed by up to `jobs` processes"""
+    if jobs < 2 or "fork" not in multiprocessing.get_all_start_methods():
+        for argument in arguments:
+            yield function(*argument)
+        return
+
+    # forked, so that the workers do not import the application again
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(jobs, mp_context=context) as executor:
+        # at most one result waits for each process, so that all files are not held in memory
+        pending: Deque[Future] = deque()
+        for argument in arguments:
+            pending.append(executor.submit(function, *argument))
+            if len(pending) > jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+@lru_cache()
+def _engine(url: URL) -> Engine:
+    # an engine of each process, connections cannot be shared with forked processes
+    return create_engine(url)
+
+
+def _pyarrow() -> Tuple[Any, Any]:
+    try:
+        import pyarrow  # type: ignore
+        import pyarrow.parquet  # type: ignore
+    except ImportError:
+        raise exceptions.TransferException(
+            "parquet files need pyarrow (pip install pyarrow)"
+        ) from None
+    return pyarrow, pyarrow.parquet
+
+
+def _read_manifest(directory: str) -> Dict[str, Any]:
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _data_files(directory: str) -> List[Tuple[str, str]]:
+    """(name relative to the directory, kind) of the data files in the directory"""
+    files = []
+    for kind in KINDS:
+        if os.path.isdir(os.path.join(directory, kind)):
+            for file_name in sorted(os.listdir(os.path.join(directory, kind))):
+                if os.path.splitext(file_name)[1][1:] in FORMATS:
+                    files.append((f"{kind}/{file_name}", kind))
+    return files
+
+
+def _file_name(index: int, feeder: str) -> str:
+    # feeder names can be anything, the index keeps the names of the files distinct
+    return f"{index:04d}_{re.sub(r'[^A-Za-z0-9_.-]', '_', feeder)}"
+
+
+def _data_text(entry: Optional[Mapping[str, Any]]) -> Optional[str]:
+    if entry is None:
+        return None
+    if isinstance(entry, codec.LazyEntry) and codec.codec_of(entry.payload) == "json":
+        # JSON rows are written without decoding them
+        payload = entry.payload
+        return payload if isinstance(payload, str) else payload.decode()
+    return _dumps(codec.select(entry))
+
+
+_dumps = json.JSONEncoder(separators=(",", ":"), check_circular=False).encode
+
+
+def _iso_json(value: Any) -> str:
+    return f'"{value.isoformat()}"'
+
+
+def _str(value: Any) -> str:
+    return "null" if value is None else value
+
+
+def _timestamp(value: Any) -> datetime:
+    if isinstance(value, str):
+        # fromisoformat does not take a Z before python 3.11
+        value = datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    if value.tzinfo is None:
+        # as the database, naive timestamps are utc
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--url", default=os.environ.get("SQLALCHEMY_DATABASE_URL", "sqlite:///./forecast.db")
+    )
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="processes")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="write a scenario to a directory")
+    export_parser.add_argument("scenario_id")
+    export_parser.add_argument("directory")
+    export_parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+    import_parser = commands.add_parser("import", help="replace a scenario with a directory")
+    import_parser.add_argument("directory")
+    import_parser.add_argument("--scenario-id", help="defaults to the id in scenario.json")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.url)
+    if args.command == "export":
+        counts = export_scenario(engine, args.scenario_id, args.directory, args.format, args.jobs)
+    else:
+        Base.metadata.create_all(engine)
+        counts = import_scenario(engine, args.directory, args.scenario_id, args.jobs)
+    print(", ".join(f"{count} {kind} rows" for kind, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,49 @@
-from fastapi import FastAPI
+import cProfile
+import hmac
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Callable, Optional
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
+from idp_schedule_provider import metrics, startup
 from idp_schedule_provider.authentication import routes as authentication_routes
+from idp_schedule_provider.config import get_settings
+from idp_schedule_provider.forecaster import models, process_pool
 from idp_schedule_provider.forecaster import routes as forecaster_routes
+from idp_schedule_provider.forecaster.database import QueryStats, query_stats
 
 app = FastAPI(
     title="IDP Schedule Provider",
     description="A reference implementation of a provider for the IDP external schedule interface",
 )
-app.include_router(authentication_routes.router)
-app.include_router(forecaster_routes.router)
+with startup.step("routes"):
+    app.include_router(authentication_routes.router)
+    app.include_router(forecaster_routes.router)
+
+
+@app.on_event("startup")
+def initialize() -> None:
+    # invalid settings fail the start of the worker rather than its requests
+    get_settings()
+    # the schema is not created on import, so that tools and tests can import the application
+    # without touching the database
+    with startup.step("init_db"):
+        models.init_db()
+    metrics.REGISTRY.start_publishing()
+    startup.report()
+
+
+@app.on_event("shutdown")
+def shut_down() -> None:
+    process_pool.shutdown()
 
 
 class AboutResponseModel(BaseModel):
@@ -27,3 +61,102 @@ async def about() -> AboutResponseModel:
         docs_url=app.docs_url,
         redoc_url=app.redoc_url,
     )
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["monitoring"])
+async def get_metrics() -> PlainTextResponse:
+    """
+    Request, database and schedule processing metrics in the Prometheus text format.
+    """
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@lru_cache()
+def _route_path(endpoint: Callable) -> str:
+    for route in app.routes:
+        if getattr(route, "endpoint", None) is endpoint:
+            return getattr(route, "path")
+    return "unmatched"
+
+
+def _record_request(request: Request, start: float, response: Optional[Response]) -> None:
+    # use the route template rather than the raw path to keep the label cardinality bounded
+    endpoint = request.scope.get("endpoint")
+    route = _route_path(endpoint) if endpoint is not None else "unmatched"
+    status_code = response.status_code if response is not None else 500
+
+    metrics.REQUEST_LATENCY.observe(time.perf_counter() - start, request.method, route)
+    metrics.REQUEST_COUNT.inc(request.method, route, str(status_code))
+    if response is not None and "content-length" in response.headers:
+        metrics.RESPONSE_SIZE.observe(
+            int(response.headers["content-length"]), request.method, route
+        )
+    metrics.REGISTRY.maybe_publish()
+
+
+_profiler_lock = threading.Lock()
+_request_id_pattern = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def _should_profile(request: Request) -> bool:
+    token = get_settings().profiling_token
+    header = request.headers.get("X-Profile")
+    # compared as bytes, the strings of headers which are not ascii cannot be compared
+    return (
+        token is not None
+        and header is not None
+        and hmac.compare_digest(header.encode(), token.encode())
+    )
+
+
+async def _call_profiled(request: Request, call_next: Callable) -> Response:
+    """
+    Run the request under cProfile and store the pstats dump as `<request id>.prof`.
+
+    cProfile profiles the whole thread, so while a request is being profiled any other coroutine
+    running on the event loop is also captured. Only one request is profiled at a time.
+    """
+    if not _profiler_lock.acquire(blocking=False):
+        return await call_next(request)
+
+    try:
+        request_id = request.headers.get("X-Request-ID", "")
+        if not _request_id_pattern.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = await call_next(request)
+        finally:
+            profiler.disable()
+
+        profile_dir = get_settings().profile_dir or tempfile.gettempdir()
+        profiler.dump_stats(os.path.join(profile_dir, f"{request_id}.prof"))
+    finally:
+        _profiler_lock.release()
+
+    response.headers["X-Profile-Id"] = request_id
+    return response
+
+
+@app.middleware("http")
+async def instrument_request(request: Request, call_next: Callable) -> Response:
+    start = time.perf_counter()
+    stats = QueryStats()
+    query_stats.set(stats)
+    try:
+        if _should_profile(request):
+            response = await _call_profiled(request, call_next)
+        else:
+            response = await call_next(request)
+    except Exception:
+        _record_request(request, start, None)
+        raise
+
+    _record_request(request, start, response)
+    if get_settings().debug:
+        response.headers[
+            "Server-Timing"
+        ] = f'db;desc="{stats.count} queries";dur={stats.duration * 1000:.3f}'
+    return response
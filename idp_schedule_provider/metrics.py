@@ -0,0 +1,305 @@
+"""
+A minimal in-process metrics registry which renders the Prometheus text exposition format.
+
+Every worker process records into its own registry. When `METRICS_DIR` is configured each worker
+periodically publishes a snapshot of its registry to that directory, and `/metrics` merges all
+of the published snapshots so that the output is aggregated across gunicorn workers. A worker
+deletes its snapshot when it exits, and the snapshots of workers which were killed are left out
+once they are out of date.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from idp_schedule_provider import config
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+DEFAULT_SIZE_BUCKETS = tuple(float(4**exponent) for exponent in range(4, 14))
+
+
+class Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def samples(self) -> Dict[LabelValues, Any]:
+        ...
+
+    @abstractmethod
+    def merge(self, values: Dict[LabelValues, Any], samples: Dict[LabelValues, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def render(self, values: Dict[LabelValues, Any]) -> List[str]:
+        ...
+
+    def _labels(self, values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, values))
+        if extra is not None:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        escaped = (
+            name + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+            for name, value in pairs
+        )
+        return "{" + ",".join(escaped) + "}"
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, values: Dict[LabelValues, float], samples: Dict[LabelValues, float]) -> None:
+        for labels, value in samples.items():
+            values[labels] = values.get(labels, 0) + value
+
+    def render(self, values: Dict[LabelValues, float]) -> List[str]:
+        return [f"{self.name}{self._labels(labels)} {value}" for labels, value in values.items()]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket (the last is +Inf)..., sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            try:
+                counts = self._values[labels]
+            except KeyError:
+                counts = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def samples(self) -> Dict[LabelValues, List[float]]:
+        with self._lock:
+            return {labels: list(counts) for labels, counts in self._values.items()}
+
+    def merge(
+        self, values: Dict[LabelValues, List[float]], samples: Dict[LabelValues, List[float]]
+    ) -> None:
+        for labels, counts in samples.items():
+            if labels not in values:
+                values[labels] = list(counts)
+            else:
+                values[labels] = [a + b for a, b in zip(values[labels], counts)]
+
+    def render(self, values: Dict[LabelValues, List[float]]) -> List[str]:
+        lines = []
+        for labels, counts in values.items():
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{self._labels(labels, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {counts[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self, flush_interval: float = 5.0, stale_after: float = 30.0):
+        self.metrics: Dict[str, Metric] = {}
+        self.flush_interval = flush_interval
+        # snapshots which were not published for this long are of workers which stopped
+        self.stale_after = stale_after
+        self._last_flush = 0.0
+        self._published_path: Optional[str] = None
+
+    def register(self, metric: Metric) -> Any:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> Dict[str, Dict[LabelValues, Any]]:
+        return {name: metric.samples() for name, metric in self.metrics.items()}
+
+    def render(self) -> str:
+        merged: Dict[str, Dict[LabelValues, Any]] = {name: {} for name in self.metrics}
+        for snapshot in [self.snapshot(), *self._published_snapshots()]:
+            for name, samples in snapshot.items():
+                if name in self.metrics:
+                    self.metrics[name].merge(merged[name], samples)
+
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render(merged[name]))
+        return "\n".join(lines) + "\n"
+
+    def maybe_publish(self) -> None:
+        """publish this worker's snapshot if the flush interval has elapsed"""
+        directory = config.get_settings().metrics_dir
+        now = time.monotonic()
+        if directory is None or now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+
+        snapshot = {
+            name: [[list(labels), value] for labels, value in samples.items()]
+            for name, samples in self.snapshot().items()
+        }
+        # write then rename so that readers never see a partially written snapshot
+        fd, path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(snapshot, f)
+        published_path = os.path.join(directory, f"metrics_{os.getpid()}.json")
+        os.replace(path, published_path)
+        if self._published_path != published_path:
+            self._published_path = published_path
+            atexit.register(self._unpublish, published_path)
+
+    def start_publishing(self) -> None:
+        """publish this worker's snapshot every flush interval, also when it is idle"""
+        if config.get_settings().metrics_dir is not None:
+            threading.Thread(target=self._publish, name="metrics", daemon=True).start()
+
+    def _publish(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.maybe_publish()
+            except OSError:
+                continue  # eg. the directory is not there, publish again the next time
+
+    def _unpublish(self, published_path: str) -> None:
+        try:
+            os.unlink(published_path)
+        except OSError:
+            pass
+
+    def _published_snapshots(self) -> Iterator[Dict[str, Dict[LabelValues, Any]]]:
+        directory = config.get_settings().metrics_dir
+        if directory is None:
+            return
+        own_snapshot = f"metrics_{os.getpid()}.json"
+        for filename in os.listdir(directory):
+            if not filename.startswith("metrics_") or filename == own_snapshot:
+                continue
+            path = os.path.join(directory, filename)
+            try:
+                if time.time() - os.stat(path).st_mtime > self.stale_after:
+                    continue  # the worker was killed and could not delete its snapshot
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue  # the worker may be replacing its snapshot
+            yield {
+                name: {tuple(labels): value for labels, value in samples}
+                for name, samples in snapshot.items()
+            }
+
+
+REGISTRY = Registry()
+
+REQUEST_COUNT: Counter = REGISTRY.register(
+    Counter(
+        "idp_http_requests_total",
+        "Total number of HTTP requests",
+        ["method", "route", "status"],
+    )
+)
+REQUEST_LATENCY: Histogram = REGISTRY.register(
+    Histogram(
+        "idp_http_request_duration_seconds",
+        "HTTP request latency in seconds",
+        ["method", "route"],
+    )
+)
+RESPONSE_SIZE: Histogram = REGISTRY.register(
+    Histogram(
+        "idp_http_response_size_bytes",
+        "HTTP response payload size in bytes",
+        ["method", "route"],
+        buckets=DEFAULT_SIZE_BUCKETS,
+    )
+)
+SCHEDULE_STAGE_LATENCY: Histogram = REGISTRY.register(
+    Histogram(
+        "idp_schedule_stage_duration_seconds",
+        "Latency of the internal stages of an asset schedule read in seconds",
+        ["stage"],
+    )
+)
+CACHE_REQUESTS: Counter = REGISTRY.register(
+    Counter(
+        "idp_cache_requests_total",
+        "Number of cache lookups by cache and result (hit or miss)",
+        ["cache", "result"],
+    )
+)
+CACHE_LATENCY: Histogram = REGISTRY.register(
+    Histogram(
+        "idp_cache_lookup_duration_seconds",
+        "Latency of cache lookups in seconds by cache and result (hit or miss)",
+        ["cache", "result"],
+    )
+)
+ROWS_READ: Counter = REGISTRY.register(
+    Counter("idp_db_rows_read_total", "Number of rows read from the database", ["table"])
+)
+ROWS_WRITTEN: Counter = REGISTRY.register(
+    Counter("idp_db_rows_written_total", "Number of rows written to the database", ["table"])
+)
+DB_QUERY_LATENCY: Histogram = REGISTRY.register(
+    Histogram("idp_db_query_duration_seconds", "Database statement latency in seconds")
+)
@@ -0,0 +1,33 @@
+"""
+Timings of the init steps of a worker. With PROFILE_STARTUP set every step is reported on stderr
+when the worker is ready, next to the import times printed by `python -X importtime`.
+
+`python -m benchmarks.bench_startup` starts the service in this mode and reports both, together
+with the time from process start to the first response of `/`.
+"""
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+from idp_schedule_provider.config import get_settings
+
+# (step, seconds) of the steps run by this process, in order
+STEPS: List[Tuple[str, float]] = []
+
+
+@contextmanager
+def step(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STEPS.append((name, time.perf_counter() - start))
+
+
+def report() -> None:
+    """print the init steps in the format of `-X importtime`, in microseconds"""
+    if not get_settings().profile_startup:
+        return
+    for name, duration in STEPS:
+        print(f"startup step: {duration * 1e6:>10.0f} | {name}", file=sys.stderr, flush=True)
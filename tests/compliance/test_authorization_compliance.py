@@ -5,13 +5,22 @@ import jwt
 import pytest
 from fastapi.testclient import TestClient
 
+from idp_schedule_provider.authentication.auth import (
+    VerifiedTokenCache,
+    verified_tokens,
+)
+from idp_schedule_provider.config import get_settings
+
 # tests for compliance of the authorization token API and authorization system.
 
 
 @pytest.fixture(autouse=True, scope="module")
 def enable_auth():
+    # auth settings are resolved once so they need to be reloaded
     with mock.patch.dict(os.environ, {"AUTH": "TRUE"}):
+        get_settings.cache_clear()
         yield
+    get_settings.cache_clear()
 
 
 @pytest.fixture(scope="module")
@@ -81,3 +90,42 @@ def test_we_correctly_return_401(test_client: TestClient, expected_jwt_error):
             headers={"authorization": "Bearer token"},
         )
         assert response.status_code == 401
+
+
+def test_verified_token_is_cached(test_client: TestClient, auth_token: str):
+    verified_tokens.clear()
+    with mock.patch(
+        "idp_schedule_provider.authentication.auth.jwt.decode", wraps=jwt.decode
+    ) as decode:
+        for _ in range(3):
+            response = test_client.get(
+                "/scenarios", headers={"authorization": f"Bearer {auth_token}"}
+            )
+            assert response.status_code == 200
+    assert decode.call_count == 1
+
+
+def test_verified_token_cache_expiry():
+    cache = VerifiedTokenCache(maxsize=2, ttl=60)
+    with mock.patch("idp_schedule_provider.authentication.auth.time.time", return_value=1000):
+        cache.add("expired", {"exp": 1000})
+        cache.add("token_1", {"exp": 2000})
+        cache.add("token_2", {})
+        cache.add("token_3", {})
+
+        # entries expire at the token exp and the least recently used is evicted
+        assert "expired" not in cache
+        assert "token_1" not in cache
+        assert "token_2" in cache
+        assert "token_3" in cache
+
+    with mock.patch("idp_schedule_provider.authentication.auth.time.time", return_value=1060):
+        # entries expire after the ttl even if the token has no exp
+        assert "token_2" not in cache
+
+
+@pytest.mark.parametrize("value", ["true", "1", "yes", ""])
+def test_auth_is_only_enabled_by_true(test_client: TestClient, settings_env, value):
+    settings_env(AUTH=value)
+    response = test_client.get("/scenarios")
+    assert response.status_code == 200
@@ -351,3 +351,31 @@ def test_get_event_data_by_event_type(
             "EV": expected,
         },
     }
+
+
+def test_get_event_data_paginated(test_client: TestClient, data_seed):
+    params = {
+        "start_datetime": datetime(2000, 1, 1, tzinfo=timezone.utc),
+        "end_datetime": datetime(2000, 1, 1, 23, 59, 59, 999999, tzinfo=timezone.utc),
+        "feeders": ["global_ev"],
+        "page_size": 2,
+    }
+    response = test_client.get("/sce1/asset_events", params=params)
+    assert response.status_code == 200
+    first_page = response.json()["assets"]["EV"]
+    assert [event["event_type"] for event in first_page] == ["electric_vehicle_charge"] * 2
+
+    # the remaining event starts at the same time as the last event of the first page
+    response = test_client.get(
+        "/sce1/asset_events", params={**params, "cursor": response.headers["X-Next-Cursor"]}
+    )
+    assert response.status_code == 200
+    assert "X-Next-Cursor" not in response.headers
+    assert response.json()["assets"]["EV"] == [
+        {
+            "start_datetime": "2000-01-01T23:00:00+00:00",
+            "end_datetime": "2000-01-01T23:29:59.000059+00:00",
+            "control_mode": "global",
+            "event_type": "control_mode",
+        }
+    ]
@@ -1,10 +1,13 @@
 # tests for compliance of the asset schedules API
+import os
 from datetime import datetime, timezone
+from unittest import mock
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm.session import Session
 
+from idp_schedule_provider.config import get_settings
 from idp_schedule_provider.forecaster.controller import insert_rows
 from idp_schedule_provider.forecaster.models import ScheduleData
 from idp_schedule_provider.forecaster.schemas import (
@@ -14,6 +17,17 @@ from idp_schedule_provider.forecaster.schemas import (
 )
 
 
+@pytest.fixture(autouse=True, params=["materialized", "streamed", "cached", "shared"])
+def read_path(request, settings_env, tmp_path):
+    """run every test against the materialized, the streaming and the cached read paths"""
+    settings_env(
+        STREAM_SCHEDULES=str(request.param == "streamed"),
+        SERIES_CACHE_BYTES=str(2**20 if request.param in ("cached", "shared") else 0),
+        SHARED_CACHE_PATH=str(tmp_path / "cache.db") if request.param == "shared" else "",
+    )
+    return request.param
+
+
 @pytest.fixture()
 def feeder_seed():
     return ["20KV", "11KV"]
@@ -234,6 +248,31 @@ def test_get_schedule_data_hourly_by_asset(
     }
 
 
+def test_get_schedule_data_variables(
+    test_client: TestClient, data_seed, scenario_seed, feeder_seed
+):
+    response = test_client.get(
+        f"/{scenario_seed.id}/asset_schedules",
+        params={
+            "start_datetime": datetime(2000, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+            "end_datetime": datetime(2000, 1, 1, 23, 59, 59, 999999, tzinfo=timezone.utc),
+            "time_interval": TimeInterval.HOUR_1.value,
+            "interpolation_method": InterpolationMethod.LINEAR.value,
+            "sampling_mode": SamplingMode.HOLD_FIRST.value,
+            "asset_name": feeder_seed[1],
+            "variables": ["load", "generation_pf"],
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["assets"] == {
+        "11KV": [
+            {"generation_pf": 0.9, "load": 1400},
+            {"generation_pf": 0.9, "load": 1400 + 10},
+            {"generation_pf": 0.9, "load": 1400 + 20},
+        ]
+    }
+
+
 def test_get_schedule_data_datetime_filter(
     test_client: TestClient, scenario_seed, data_seed, feeder_seed
 ):
@@ -540,3 +579,103 @@ def test_get_cost_schedule_data(
         },
     )
     assert response.json() == expected
+
+
+def test_get_schedule_data_paginated(
+    test_client: TestClient, data_seed, scenario_seed, feeder_seed
+):
+    params = {
+        "start_datetime": datetime(2000, 1, 1, tzinfo=timezone.utc),
+        "end_datetime": datetime(2000, 1, 1, 23, 59, 59, 999999, tzinfo=timezone.utc),
+        "time_interval": TimeInterval.HOUR_1.value,
+        "interpolation_method": InterpolationMethod.LINEAR.value,
+        "sampling_mode": SamplingMode.HOLD_FIRST.value,
+        "feeders": feeder_seed,
+        "page_size": 2,
+    }
+    pages = []
+    cursor = None
+    while True:
+        response = test_client.get(
+            f"/{scenario_seed.id}/asset_schedules", params={**params, "cursor": cursor}
+        )
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    # pages are keyed by (asset_key, timestamp) so assets are returned in the order they were added
+    assert [page["time_stamps"] for page in pages] == [
+        ["2000-01-01T00:00:00+00:00", "2000-01-01T01:00:00+00:00"],
+        ["2000-01-01T01:00:00+00:00", "2000-01-01T02:00:00+00:00"],
+    ]
+    assert sorted(pages[1]["assets"]) == ["11KV", "Switch 1"]
+    assert pages[1]["assets"]["11KV"][0] == {}
+    assert pages[1]["assets"]["Switch 1"] == [{"status": 1.0}, {}]
+
+
+@pytest.mark.parametrize("interval", [TimeInterval.DAY_1, TimeInterval.MONTH_1])
+def test_get_schedule_data_aggregated_is_not_paginated(
+    test_client: TestClient, data_seed, scenario_seed, feeder_seed, settings_env, interval
+):
+    params = {
+        "start_datetime": datetime(2000, 1, 1, tzinfo=timezone.utc),
+        "end_datetime": datetime(2000, 1, 1, 23, 59, 59, 999999, tzinfo=timezone.utc),
+        "time_interval": interval.value,
+        "interpolation_method": InterpolationMethod.LINEAR.value,
+        "sampling_mode": SamplingMode.HOLD_FIRST.value,
+        "feeders": feeder_seed,
+    }
+    response = test_client.get(
+        f"/{scenario_seed.id}/asset_schedules", params={**params, "page_size": 2}
+    )
+    assert response.status_code == 400
+
+    # a day is never split across pages by the budget of the server
+    expected = test_client.get(f"/{scenario_seed.id}/asset_schedules", params=params).json()
+    settings_env(PAGE_MAX_ROWS="2")
+    response = test_client.get(f"/{scenario_seed.id}/asset_schedules", params=params)
+    assert response.status_code == 200
+    assert "X-Next-Cursor" not in response.headers
+    assert response.json() == expected
+
+
+def test_get_schedule_data_paginated_by_bytes(
+    test_client: TestClient, data_seed, scenario_seed, feeder_seed
+):
+    with mock.patch.dict(os.environ, {"PAGE_MAX_BYTES": "1"}):
+        get_settings.cache_clear()
+        response = test_client.get(
+            f"/{scenario_seed.id}/asset_schedules",
+            params={
+                "start_datetime": datetime(2000, 1, 1, tzinfo=timezone.utc),
+                "end_datetime": datetime(2000, 1, 1, 23, 59, 59, 999999, tzinfo=timezone.utc),
+                "time_interval": TimeInterval.HOUR_1.value,
+                "interpolation_method": InterpolationMethod.LINEAR.value,
+                "sampling_mode": SamplingMode.HOLD_FIRST.value,
+                "feeders": feeder_seed,
+            },
+        )
+    get_settings.cache_clear()
+
+    # a page always holds at least one datapoint even if it exceeds the budget
+    assert response.status_code == 200
+    assert response.json()["time_stamps"] == ["2000-01-01T00:00:00+00:00"]
+    assert "X-Next-Cursor" in response.headers
+
+
+def test_get_schedule_data_invalid_cursor(test_client: TestClient, scenario_seed, feeder_seed):
+    response = test_client.get(
+        f"/{scenario_seed.id}/asset_schedules",
+        params={
+            "start_datetime": datetime(2000, 1, 1, tzinfo=timezone.utc),
+            "end_datetime": datetime(2000, 1, 1, 23, 59, 59, 999999, tzinfo=timezone.utc),
+            "time_interval": TimeInterval.HOUR_1.value,
+            "interpolation_method": InterpolationMethod.LINEAR.value,
+            "sampling_mode": SamplingMode.HOLD_FIRST.value,
+            "feeders": feeder_seed,
+            "cursor": "not-a-cursor",
+        },
+    )
+    assert response.status_code == 400
@@ -3,14 +3,27 @@ from unittest import mock
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
 from sqlalchemy.orm import Session
 
+from idp_schedule_provider.config import get_settings
+from idp_schedule_provider.forecaster import schemas
 from idp_schedule_provider.forecaster.controller import insert_rows
-from idp_schedule_provider.forecaster.database import get_db_session
-from idp_schedule_provider.forecaster.models import Scenarios
+from idp_schedule_provider.forecaster.database import (
+    get_db_session,
+    get_read_db_session,
+)
+from idp_schedule_provider.forecaster.models import Base, Scenarios, init_db
+from idp_schedule_provider.forecaster.seed_data import synthetic
 from idp_schedule_provider.main import app
 
 
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    # the test client does not run the startup handlers which create the schema
+    init_db()
+
+
 @pytest.fixture(scope="module")
 def test_client():
     yield TestClient(app)
@@ -31,6 +44,7 @@ def database_client(db_session: Session):
 
     # use the test session
     app.dependency_overrides[get_db_session] = get_test_session
+    app.dependency_overrides[get_read_db_session] = get_test_session
     with db_session.begin() as xact:
         yield db_session
         xact.rollback()
@@ -42,3 +56,45 @@ def scenario_seed(database_client: Session):
     scenario = Scenarios(id="sce1", name="Scenario 1", description="Test Scenario 1")
     insert_rows(database_client, [scenario])
     yield scenario
+
+
+@pytest.fixture()
+def seed_spec():
+    """the parameters of the synthetic scenario of `seeded_engine`, override it to change them"""
+    return {}
+
+
+@pytest.fixture()
+def seeded_engine(tmp_path, seed_spec):
+    """a sqlite database file with the synthetic scenario `sce1`"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'forecast.db'}")
+    Base.metadata.create_all(engine)
+    spec = schemas.SyntheticSeedModel(**{"scenario_id": "sce1", "events_per_day": 0, **seed_spec})
+    with Session(bind=engine) as db:
+        synthetic.generate(db, spec)
+        db.commit()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def seeded_db(seeded_engine):
+    with Session(bind=seeded_engine) as db:
+        yield db
+
+
+@pytest.fixture()
+def settings_env():
+    """patch environment variables and reload the settings for the duration of a test"""
+
+    def patch_env(**env):
+        patcher = mock.patch.dict(os.environ, env)
+        patcher.start()
+        get_settings.cache_clear()
+        return patcher
+
+    patchers = []
+    yield lambda **env: patchers.append(patch_env(**env))
+    for patcher in reversed(patchers):
+        patcher.stop()
+    get_settings.cache_clear()
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from idp_schedule_provider.forecaster import buckets, resampler
+from idp_schedule_provider.forecaster.schemas import (
+    GetSchedulesResponseModel,
+    InterpolationMethod,
+    SamplingMode,
+    TimeInterval,
+)
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def test_month_edges_cover_range():
+    edges = buckets.bucket_edges(TimeInterval.MONTH_1, _utc(2000, 11, 15), _utc(2001, 2, 1))
+    assert list(edges) == [
+        _utc(2000, 11, 1),
+        _utc(2000, 12, 1),
+        _utc(2001, 1, 1),
+        _utc(2001, 2, 1),
+        _utc(2001, 3, 1),
+    ]
+
+
+def test_year_edges():
+    edges = buckets.bucket_edges(TimeInterval.YEAR_1, _utc(2000, 6, 1), _utc(2002, 6, 1))
+    assert list(edges) == [_utc(2000, 1, 1), _utc(2001, 1, 1), _utc(2002, 1, 1), _utc(2003, 1, 1)]
+
+
+def test_local_day_edges_follow_dst():
+    tz = ZoneInfo("America/New_York")
+    first = datetime(2021, 3, 13, 12, tzinfo=tz).timestamp()
+    last = datetime(2021, 3, 14, 12, tzinfo=tz).timestamp()
+    edges = buckets.bucket_edges(TimeInterval.DAY_1, first, last, "America/New_York")
+    assert list(edges) == [
+        datetime(2021, 3, 13, tzinfo=tz).timestamp(),
+        datetime(2021, 3, 14, tzinfo=tz).timestamp(),
+        datetime(2021, 3, 15, tzinfo=tz).timestamp(),
+    ]
+    # the day the clocks go forward is only 23 hours long
+    assert edges[2] - edges[1] == timedelta(hours=23).total_seconds()
+
+
+def test_sub_day_interval_is_not_calendar():
+    with pytest.raises(ValueError):
+        buckets.bucket_edges(TimeInterval.HOUR_1, _utc(2000, 1, 1), _utc(2000, 1, 2))
+
+
+def test_assign_buckets():
+    edges = [0.0, 10.0, 20.0, 30.0]
+    assert buckets.assign_buckets(edges, [10.0, 11.0, 25.0, 29.0]) == [1, 1, 2, 2]
+    assert buckets.occupied_buckets(edges, [1.0, 25.0]) == [(0, 0.0, 10.0), (2, 20.0, 30.0)]
+
+
+def test_downsample_aligns_to_calendar():
+    time_stamps = [
+        datetime(2000, 1, 31, 23, tzinfo=timezone.utc),
+        datetime(2000, 2, 1, tzinfo=timezone.utc),
+        datetime(2000, 4, 10, tzinfo=timezone.utc),
+    ]
+    result = resampler.resample_data(
+        TimeInterval.MONTH_1,
+        InterpolationMethod.LINEAR,
+        SamplingMode.HOLD_FIRST,
+        GetSchedulesResponseModel(
+            time_interval=TimeInterval.HOUR_1,
+            time_stamps=time_stamps,
+            assets={"asset": [{"p": 1.0}, {"p": 2.0}, {"p": 3.0}]},
+        ),
+    )
+    # empty months are skipped
+    assert result.time_stamps == [
+        datetime(2000, 1, 1, tzinfo=timezone.utc),
+        datetime(2000, 2, 1, tzinfo=timezone.utc),
+        datetime(2000, 4, 1, tzinfo=timezone.utc),
+    ]
+    assert result.assets["asset"] == [{"p": 1.0}, {"p": 2.0}, {"p": 3.0}]
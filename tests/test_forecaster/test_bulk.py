@@ -0,0 +1,86 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+from idp_schedule_provider.forecaster import controller, schemas
+from idp_schedule_provider.forecaster.models import Assets, EventData, ScheduleData
+
+
+def _hours(*hours):
+    return [datetime(2000, 1, 1, hour, tzinfo=timezone.utc) for hour in hours]
+
+
+def test_add_schedules_inserts_and_updates(database_client: Session, scenario_seed):
+    controller.add_schedules(
+        database_client,
+        scenario_seed.id,
+        "20KV",
+        schemas.AddNewSchedulesModel(
+            time_stamps=_hours(0, 1), assets={"asset_1": [{"p": 1.0}, {"p": 2.0}]}
+        ),
+    )
+    controller.add_schedules(
+        database_client,
+        scenario_seed.id,
+        "20KV",
+        schemas.AddNewSchedulesModel(
+            time_stamps=_hours(1, 2), assets={"asset_1": [{"p": 3.0}, {"p": 4.0}]}
+        ),
+    )
+
+    rows = database_client.query(ScheduleData).order_by(ScheduleData.timestamp).all()
+    assert [(row.timestamp, row.data) for row in rows] == list(
+        zip(_hours(0, 1, 2), [{"p": 1.0}, {"p": 3.0}, {"p": 4.0}])
+    )
+
+
+def test_add_events_rejects_unknown_event_type(database_client: Session, scenario_seed):
+    start, end = _hours(0, 1)
+    events = {"start_datetime": start, "end_datetime": end}
+
+    controller.add_events(
+        database_client,
+        scenario_seed.id,
+        "20KV",
+        schemas.AddNewEventsModel(assets={"EV": [{**events, "event_type": "control_mode"}]}),
+    )
+    with pytest.raises(ValueError):
+        controller.add_events(
+            database_client,
+            scenario_seed.id,
+            "20KV",
+            schemas.AddNewEventsModel(assets={"EV": [{**events, "event_type": "unknown"}]}),
+        )
+
+    rows = database_client.query(Assets.name, EventData.event_type, EventData.start_timestamp).join(
+        Assets, EventData.asset_key == Assets.key
+    )
+    assert rows.all() == [("EV", "control_mode", start)]
+
+
+def test_add_events_replaces_reposted_events(database_client: Session, scenario_seed):
+    start, end = _hours(0, 1)
+    events = {"start_datetime": start, "end_datetime": end}
+
+    for soc in (10, 20):
+        controller.add_events(
+            database_client,
+            scenario_seed.id,
+            "20KV",
+            schemas.AddNewEventsModel(
+                assets={
+                    "EV": [
+                        {**events, "event_type": "electric_vehicle_charge", "start_soc": soc},
+                        {**events, "start_soc": soc},
+                        {**events, "start_soc": soc + 1},
+                    ]
+                }
+            ),
+        )
+
+    rows = database_client.query(EventData).order_by(EventData.event_type).all()
+    assert [(row.event_type, row.data["start_soc"]) for row in rows] == [
+        (None, 21),
+        ("electric_vehicle_charge", 20),
+    ]
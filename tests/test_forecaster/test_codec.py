@@ -0,0 +1,83 @@
+import json
+import sqlite3
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import create_engine
+
+from idp_schedule_provider import config
+from idp_schedule_provider.forecaster import codec, recode
+from idp_schedule_provider.forecaster.models import Base
+
+ENTRIES = [
+    {"p": 1.0, "q": 0.5},
+    {"p": 1.0, "q": {"A": 1.0, "B": None, "C": 3.0}},
+    {"active_energy_cost": [{"x": 10.0, "y": 10.0}, {"x": 20.0, "y": 15.0}], "p": 1.0},
+    {"p": 500, "active_energy_cost": [{"x": 10.0, "y": 10.0}, {"x": 1, "y": 1}]},
+    {"event_type": "control_mode", "control_mode": "global", "enabled": True, "name": "ü"},
+    {},
+]
+
+
+@pytest.mark.parametrize("codec_name", sorted(codec.CODECS))
+@pytest.mark.parametrize("entry", ENTRIES)
+def test_round_trip(codec_name, entry):
+    payload = codec.encode(entry, codec_name)
+
+    assert codec.codec_of(payload) == codec_name
+    assert codec.decode(payload) == entry
+    assert codec.LazyEntry(payload) == entry
+
+
+def test_packed_is_smaller_than_json():
+    entry = {"p": 1234.56789, "q": {"A": 0.123456789, "B": 0.987654321, "C": 101.25}}
+
+    assert len(codec.encode(entry, "packed")) < len(json.dumps(entry))
+
+
+def test_decode_selected_variables():
+    entry = {"p": 1.0, "pf": 0.9, "active_energy_cost": [{"x": 1.0, "y": 2.0}], "other": "x"}
+
+    for payload in (codec.encode(entry, "packed"), json.dumps(entry)):
+        assert codec.decode(payload, {"pf", "other"}) == {"pf": 0.9, "other": "x"}
+        assert codec.LazyEntry(payload).decode({"p"}) == {"p": 1.0}
+
+
+def test_unserializable_value():
+    with pytest.raises(TypeError):
+        codec.encode({"p": object()}, "packed")
+
+
+def test_unknown_codec_setting(settings_env):
+    settings_env(DATA_CODEC="packd")
+    with pytest.raises(ValidationError):
+        config.get_settings()
+
+
+def test_recode_legacy_json_rows(tmp_path):
+    path = tmp_path / "forecast.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with sqlite3.connect(path) as connection:
+        # rows as they were written to the JSON column
+        connection.executemany(
+            "INSERT INTO schedule_data (id, data) VALUES (?, ?)",
+            [(row_id, json.dumps(entry)) for row_id, entry in enumerate(ENTRIES, 1)],
+        )
+
+    assert recode.recode(engine, "schedule_data", "packed", batch_size=2) == len(ENTRIES)
+    assert recode.recode(engine, "schedule_data", "packed") == 0
+
+    with sqlite3.connect(path) as connection:
+        payloads = [data for (data,) in connection.execute("SELECT data FROM schedule_data")]
+    assert [codec.codec_of(payload) for payload in payloads] == ["packed"] * len(ENTRIES)
+    assert [codec.decode(payload) for payload in payloads] == ENTRIES
+
+
+def test_select_row_data():
+    entry = {"p": 1.0, "q": 0.5}
+
+    assert codec.select(None, {"p"}) == {}
+    assert codec.select(entry) == entry
+    assert codec.select(entry, {"q"}) == {"q": 0.5}
+    assert codec.select(codec.LazyEntry(codec.encode(entry, "packed")), {"q"}) == {"q": 0.5}
@@ -0,0 +1,20 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import InvalidRequestError
+
+from idp_schedule_provider.forecaster import database
+from idp_schedule_provider.forecaster.models import Base, Scenarios
+
+
+def test_read_session_refuses_writes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'forecast.db'}")
+    Base.metadata.create_all(engine)
+    session = database.ReadSessionLocal(bind=engine)
+    try:
+        assert session.query(Scenarios).all() == []
+
+        session.add(Scenarios(id="sce1", name="Scenario 1"))
+        with pytest.raises(InvalidRequestError):
+            session.flush()
+    finally:
+        session.close()
@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+from idp_schedule_provider.forecaster import dimensions, exceptions
+from idp_schedule_provider.forecaster.controller import insert_rows
+from idp_schedule_provider.forecaster.models import Assets, Feeders, ScheduleData
+
+
+def _row(scenario_id, asset_name, hour):
+    return ScheduleData(
+        scenario_id=scenario_id,
+        asset_name=asset_name,
+        feeder="20KV",
+        data={"p": 1.0},
+        timestamp=datetime(2000, 1, 1, hour, tzinfo=timezone.utc),
+    )
+
+
+def test_rows_constructed_with_names(database_client: Session, scenario_seed):
+    insert_rows(database_client, [_row("sce1", "asset_1", 0), _row("sce1", "asset_2", 0)])
+    insert_rows(database_client, [_row("sce1", "asset_1", 1)])
+
+    # each name is stored once, the rows only hold its key
+    assets = dimensions.lookup(database_client, Assets.name, ["asset_1", "asset_2"])
+    assert database_client.query(Assets).count() == 2
+    assert database_client.query(Feeders).count() == 1
+    rows = database_client.query(ScheduleData).order_by(ScheduleData.id).all()
+    assert [row.asset_key for row in rows] == [
+        assets["asset_1"],
+        assets["asset_2"],
+        assets["asset_1"],
+    ]
+    assert {row.scenario_key for row in rows} == {scenario_seed.key}
+
+
+def test_names_are_not_attributes_of_rows(database_client: Session, scenario_seed):
+    insert_rows(database_client, [_row("sce1", "asset_1", 0)])
+    database_client.expunge_all()
+
+    row = database_client.query(ScheduleData).one()
+    with pytest.raises(AttributeError):
+        row.asset_name
+
+
+def test_rows_of_unknown_scenario(database_client: Session):
+    with pytest.raises(exceptions.ScenarioNotFoundException):
+        insert_rows(database_client, [_row("unknown", "asset_1", 0)])
+
+
+def test_intern_adds_missing_names(database_client: Session):
+    first = dimensions.intern(database_client, Feeders.name, ["f1"])
+    both = dimensions.intern(database_client, Feeders.name, ["f1", "f2", "f2"])
+
+    assert both["f1"] == first["f1"]
+    assert set(both) == {"f1", "f2"}
+    assert dimensions.lookup(database_client, Feeders.name, ["f2", "f3"]) == {"f2": both["f2"]}
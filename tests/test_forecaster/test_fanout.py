@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+from unittest import mock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from idp_schedule_provider.forecaster import controller, fanout
+from idp_schedule_provider.forecaster.database import Base
+from idp_schedule_provider.forecaster.models import Scenarios, ScheduleData
+from idp_schedule_provider.forecaster.schemas import (
+    InterpolationMethod,
+    SamplingMode,
+    TimeInterval,
+)
+
+FEEDERS = ["f1", "f2", "f3", "f4", "f5"]
+
+
+@pytest.fixture()
+def committed_session(tmp_path):
+    # the shard sessions only see committed data, so use a database of its own
+    engine = create_engine(f"sqlite:///{tmp_path / 'fanout.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Scenarios(id="sce1", name="Scenario 1"))
+        session.add_all(
+            ScheduleData(
+                scenario_id="sce1",
+                asset_name=f"{feeder}_asset",
+                feeder=feeder,
+                data={"p": float(index + hour)},
+                timestamp=datetime(2000, 1, 1, hour, tzinfo=timezone.utc),
+            )
+            for index, feeder in enumerate(FEEDERS)
+            for hour in range(index, 24)
+        )
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+def test_split():
+    assert fanout.split(FEEDERS, 2) == [["f1", "f2", "f3"], ["f4", "f5"]]
+    assert fanout.split(FEEDERS[:2], 8) == [["f1"], ["f2"]]
+
+
+def test_fan_out_matches_single_query(committed_session, settings_env):
+    def read():
+        return (
+            controller.get_asset_data(
+                committed_session,
+                "sce1",
+                datetime(2000, 1, 1, tzinfo=timezone.utc),
+                datetime(2000, 1, 2, tzinfo=timezone.utc),
+                TimeInterval.MIN_30,
+                InterpolationMethod.LINEAR,
+                SamplingMode.WEIGHTED_AVERAGE,
+                feeders=FEEDERS,
+            )
+            .to_response_model()
+            .json()
+        )
+
+    expected = read()
+    settings_env(FANOUT_SHARDS="3")
+    with mock.patch.object(fanout, "fan_out", wraps=fanout.fan_out) as fan_out:
+        assert read() == expected
+    assert fan_out.call_count == 1
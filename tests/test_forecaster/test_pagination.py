@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from idp_schedule_provider.forecaster import controller, exceptions, pagination
+from idp_schedule_provider.forecaster.schemas import (
+    InterpolationMethod,
+    SamplingMode,
+    TimeInterval,
+)
+
+START = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture()
+def seed_spec():
+    return dict(feeders=2, assets_per_feeder=4, days=2, seed=5)
+
+
+def _read_page(db, page, **kwargs):
+    return controller.get_asset_data(
+        db,
+        "sce1",
+        START,
+        START + timedelta(hours=47),
+        TimeInterval.HOUR_1,
+        InterpolationMethod.LINEAR,
+        SamplingMode.WEIGHTED_AVERAGE,
+        page=page,
+        **kwargs,
+    )
+
+
+def _page_statements(db, page, **kwargs):
+    """the statements (with their parameters) which read the schedule rows of a page"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM schedule_data" in statement:
+            statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        _read_page(db, page, **kwargs)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+@pytest.mark.parametrize("asset", [False, True])
+def test_pages_are_index_range_scans(seeded_db, asset):
+    kwargs = {"asset_name": max(_read_page(seeded_db, None).assets)} if asset else {}
+    page = pagination.Page(max_rows=10)
+    _read_page(seeded_db, page, **kwargs)
+    assert page.next_cursor is not None
+
+    statements = _page_statements(
+        seeded_db, pagination.Page(cursor=page.next_cursor, max_rows=10), **kwargs
+    )
+    assert statements
+    connection = seeded_db.connection()
+    for statement, parameters in statements:
+        plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        details = [row[-1] for row in plan]
+        assert not any("TEMP B-TREE" in detail for detail in details), details
+        assert any("ix_schedule_data_scenario_asset_timestamp" in detail for detail in details)
+
+
+def test_cursors_keyed_by_asset_name_are_rejected(seeded_db):
+    cursor = pagination.encode_cursor("schedule", [min(_read_page(seeded_db, None).assets), START])
+    with pytest.raises(exceptions.InvalidCursorException):
+        _read_page(seeded_db, pagination.Page(cursor=cursor, max_rows=10))
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from idp_schedule_provider.forecaster import process_pool, resampler, series
+from idp_schedule_provider.forecaster.schemas import (
+    GetSchedulesResponseModel,
+    InterpolationMethod,
+    SamplingMode,
+    TimeInterval,
+)
+
+
+def _schedules(hours, values, time_interval=TimeInterval.HOUR_1):
+    return GetSchedulesResponseModel(
+        time_interval=time_interval,
+        time_stamps=[datetime(2000, 1, 1, hour, tzinfo=timezone.utc) for hour in hours],
+        assets={"asset": [{"p": value} if value is not None else {} for value in values]},
+    )
+
+
+@pytest.mark.parametrize(
+    "max_gap, expected",
+    [
+        # the sample before the gap is held until the next sample
+        (None, (10 + 20 * 5 + 40) / 7),
+        # but no longer than the max gap
+        (timedelta(hours=2), (10 + 20 * 2 + 40) / 4),
+    ],
+)
+def test_downsample_time_weighted(max_gap, expected):
+    result = resampler.resample_data(
+        TimeInterval.DAY_1,
+        InterpolationMethod.LINEAR,
+        SamplingMode.WEIGHTED_AVERAGE,
+        _schedules([0, 1, 6], [10.0, 20.0, 40.0]),
+        max_gap=max_gap,
+    )
+    assert result.time_stamps == [datetime(2000, 1, 1, tzinfo=timezone.utc)]
+    assert result.assets["asset"][0]["p"] == pytest.approx(expected)
+
+
+def test_downsample_hold_first_skips_missing():
+    result = resampler.resample_data(
+        TimeInterval.DAY_1,
+        InterpolationMethod.LINEAR,
+        SamplingMode.HOLD_FIRST,
+        _schedules([0, 1, 2], [None, 20.0, 40.0]),
+    )
+    assert result.assets["asset"] == [{"p": 20.0}]
+
+
+@pytest.mark.parametrize(
+    "method, max_gap, expected",
+    [
+        # interpolated by time rather than by position
+        (InterpolationMethod.LINEAR, None, [{"p": 0.0}, {"p": 5.0}, {"p": 20.0}, {}]),
+        (InterpolationMethod.LINEAR, timedelta(hours=1), [{"p": 0.0}, {}, {"p": 20.0}, {}]),
+        (InterpolationMethod.LOCF, None, [{"p": 0.0}, {"p": 0.0}, {"p": 20.0}, {"p": 20.0}]),
+        (InterpolationMethod.NOCB, None, [{"p": 0.0}, {"p": 20.0}, {"p": 20.0}, {}]),
+        (InterpolationMethod.NOCB, timedelta(hours=1), [{"p": 0.0}, {}, {"p": 20.0}, {}]),
+    ],
+)
+def test_upsample_across_gap(method, max_gap, expected):
+    result = resampler.resample_data(
+        TimeInterval.MIN_30,
+        method,
+        SamplingMode.HOLD_FIRST,
+        _schedules([0, 2], [0.0, 20.0]),
+        max_gap=max_gap,
+    )
+    assert [time_stamp.strftime("%H:%M") for time_stamp in result.time_stamps] == [
+        "00:00",
+        "00:30",
+        "02:00",
+        "02:30",
+    ]
+    assert result.assets["asset"] == expected
+
+
+def test_upsample_fills_missing_samples():
+    result = resampler.resample_data(
+        TimeInterval.MIN_30,
+        InterpolationMethod.LINEAR,
+        SamplingMode.HOLD_FIRST,
+        _schedules([0, 1, 2], [0.0, None, 20.0]),
+    )
+    assert [entry.get("p") for entry in result.assets["asset"]] == [0, 5, 10, 15, 20, None]
+
+
+def test_resample_in_process_pool(settings_env):
+    settings_env(RESAMPLE_WORKERS="2")
+    data = series.ScheduleSeries.from_response_model(
+        GetSchedulesResponseModel(
+            time_interval=TimeInterval.HOUR_1,
+            time_stamps=[datetime(2000, 1, 1, hour, tzinfo=timezone.utc) for hour in range(24)],
+            assets={
+                f"asset_{asset}": [{"p": float(asset + hour)} for hour in range(24)]
+                for asset in range(5)
+            },
+        )
+    )
+    arguments = (TimeInterval.MIN_15, InterpolationMethod.LINEAR, SamplingMode.HOLD_FIRST, data)
+
+    expected = resampler.resample_series(*arguments).to_response_model()
+    executor = process_pool.get_process_pool()
+    assert executor is not None
+    try:
+        result = resampler.resample_series(*arguments, executor=executor, shards=2)
+    finally:
+        process_pool.shutdown()
+
+    assert list(result.assets) == list(data.assets)
+    assert result.to_response_model().json() == expected.json()
@@ -0,0 +1,85 @@
+from datetime import datetime, timezone
+
+from idp_schedule_provider.forecaster import series
+from idp_schedule_provider.forecaster.schemas import (
+    GetSchedulesResponseModel,
+    TimeInterval,
+)
+
+
+def _response(assets):
+    return GetSchedulesResponseModel(
+        time_interval=TimeInterval.HOUR_1,
+        time_stamps=[datetime(2000, 1, 1, hour, tzinfo=timezone.utc) for hour in range(3)],
+        assets=assets,
+    )
+
+
+def test_round_trip():
+    response = _response(
+        {
+            "asset_1": [{"p": 1, "q": {"A": 1, "B": None}}, {}, {"p": None, "q": None}],
+            "asset_2": [
+                {"cost": [{"x": 1, "y": 2}, {"x": 3, "y": 4}]},
+                {"cost": None},
+                {"p": 2.5},
+            ],
+        }
+    )
+
+    data = series.ScheduleSeries.from_response_model(response)
+
+    assert isinstance(data.assets["asset_1"].columns["p"], series.BalancedColumn)
+    assert isinstance(data.assets["asset_1"].columns["q"], series.UnbalancedColumn)
+    assert isinstance(data.assets["asset_2"].columns["cost"], series.ObjectColumn)
+    assert data.assets["asset_1"].known_positions() == [0, 2]
+    assert data.to_response_model().json() == response.json()
+
+
+def test_variable_changing_type():
+    asset = series.AssetSeries(3)
+    asset.set(0, "p", None)
+    asset.set(1, "p", {"A": 1.0, "B": 2.0, "C": 3.0})
+    # a column with only nulls takes the type of the first value
+    assert isinstance(asset.columns["p"], series.UnbalancedColumn)
+
+    asset.set(2, "p", 4.0)
+    assert isinstance(asset.columns["p"], series.ObjectColumn)
+    assert [entry.get("p") for entry in asset.entries()] == [
+        None,
+        {"A": 1.0, "B": 2.0, "C": 3.0},
+        4.0,
+    ]
+
+
+def test_gather_columns():
+    numbers = series.AssetSeries(3)
+    for position, value in enumerate([1.0, None, 2.0]):
+        numbers.set(position, "p", value)
+    mixed = series.AssetSeries(3)
+    for position, value in enumerate([3.0, 4.0, [{"x": 1, "y": 2}, {"x": 2, "y": 3}]]):
+        mixed.set(position, "p", value)
+    assert isinstance(mixed.columns["p"], series.ObjectColumn)
+
+    # the numbers of an object column are gathered into a balanced column
+    column = series.gather_columns(
+        5, [(numbers.columns["p"], 0, 3, [0, 1, 2]), (mixed.columns["p"], 0, 2, [3, 4])]
+    )
+    assert isinstance(column, series.BalancedColumn)
+    assert [column.get(position) for position in range(5)] == [1.0, None, 2.0, 3.0, 4.0]
+    assert column.states[1] == series.NULL
+
+    column = series.gather_columns(
+        4, [(numbers.columns["p"], 1, 3, [0, 2]), (mixed.columns["p"], 2, 3, [3])]
+    )
+    assert isinstance(column, series.ObjectColumn)
+    assert [column.get(position) for position in range(4)] == [
+        None,
+        None,
+        2.0,
+        [{"x": 1, "y": 2}, {"x": 2, "y": 3}],
+    ]
+    assert list(column.states) == [series.NULL, series.ABSENT, series.VALUE, series.VALUE]
+
+    assert series.gather_columns(2, [(numbers.columns["p"], 1, 2, [1])]).states[1] == series.NULL
+    assert series.gather_columns(2, [(numbers.columns["p"], 1, 1, [])]) is None
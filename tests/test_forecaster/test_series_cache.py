@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+
+from idp_schedule_provider import metrics
+from idp_schedule_provider.forecaster import (
+    controller,
+    exceptions,
+    schemas,
+    series_cache,
+)
+from idp_schedule_provider.forecaster.schemas import (
+    InterpolationMethod,
+    SamplingMode,
+    TimeInterval,
+)
+
+START = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture()
+def seed_spec():
+    return dict(feeders=2, assets_per_feeder=4, days=10, seed=7)
+
+
+@pytest.fixture()
+def db(seeded_db):
+    # an asset with an entry every 5 hours, which has numbers and then cost curves
+    for hour in range(1, 240, 5):
+        value = float(hour) if hour < 120 else [{"x": 1, "y": hour}, {"x": 2, "y": hour}]
+        new_schedules = schemas.AddNewSchedulesModel(
+            time_stamps=[START + timedelta(hours=hour)],
+            assets={"Sparse 1": [{"p": value, "mode": None}]},
+        )
+        controller.add_schedules(seeded_db, "sce1", "sce1_feeder_0", new_schedules)
+    seeded_db.commit()
+    return seeded_db
+
+
+@pytest.fixture()
+def cache(settings_env):
+    settings_env(SERIES_CACHE_BYTES=str(2**24))
+    series_cache._cache.cache_clear()
+    return series_cache.get_cache()
+
+
+def _read(db, start_hour, end_hour, time_interval=TimeInterval.HOUR_1, **kwargs):
+    return controller.get_asset_data(
+        db,
+        "sce1",
+        START + timedelta(hours=start_hour),
+        START + timedelta(hours=end_hour),
+        time_interval,
+        InterpolationMethod.LINEAR,
+        SamplingMode.WEIGHTED_AVERAGE,
+        **kwargs,
+    ).to_response_model()
+
+
+def _requests(result):
+    return metrics.CACHE_REQUESTS.samples().get(("series", result), 0)
+
+
+@pytest.mark.parametrize(
+    "time_interval", [TimeInterval.MIN_15, TimeInterval.HOUR_1, TimeInterval.DAY_1]
+)
+@pytest.mark.parametrize(
+    "start_hour, end_hour, kwargs",
+    [
+        (0, 239, {}),
+        (30, 200, {"feeders": ["sce1_feeder_1"]}),
+        (0, 239, {"variables": ["p", "q"]}),
+        (2, 100, {"asset_name": "Sparse 1"}),
+        (100, 150, {"asset_name": "Sparse 1"}),
+        (500, 600, {}),
+    ],
+)
+def test_cached_reads_match_database(db, settings_env, time_interval, start_hour, end_hour, kwargs):
+    stored = _read(db, start_hour, end_hour, time_interval, **kwargs)
+
+    settings_env(SERIES_CACHE_BYTES=str(2**24))
+    # read once to fill the cache from the database, and once from the cache
+    assert _read(db, start_hour, end_hour, time_interval, **kwargs) == stored
+    hits = _requests("hit")
+    assert _read(db, start_hour, end_hour, time_interval, **kwargs) == stored
+    assert _requests("hit") > hits
+
+
+def test_overlapping_reads_reuse_chunks(db, cache):
+    _read(db, 0, 239)
+    misses = _requests("miss")
+
+    _read(db, 20, 100, TimeInterval.MIN_30)
+    _read(db, 150, 239, TimeInterval.DAY_1, asset_name="Sparse 1")
+    assert _requests("miss") == misses
+    assert cache.size <= cache.budget
+
+
+def test_least_recently_used_chunks_are_evicted(db, settings_env):
+    settings_env(SERIES_CACHE_BYTES=str(2**14))
+    series_cache._cache.cache_clear()
+    cache = series_cache.get_cache()
+    stored = _read(db, 0, 239)
+
+    assert cache.size <= cache.budget
+    assert _read(db, 0, 239) == stored
+
+
+def test_add_schedules_invalidates(db, cache):
+    _read(db, 0, 23, asset_name="Sparse 1")
+    new_schedules = schemas.AddNewSchedulesModel(
+        time_stamps=[START + timedelta(hours=2)], assets={"Sparse 1": [{"p": 100.0}]}
+    )
+    controller.add_schedules(db, "sce1", "sce1_feeder_0", new_schedules)
+    assert len(cache) == 0
+
+    assert _read(db, 2, 2, asset_name="Sparse 1").assets["Sparse 1"] == [{"p": 100.0}]
+
+
+def test_writes_of_other_workers_invalidate(db, cache):
+    _read(db, 0, 23, asset_name="Sparse 1")
+    new_schedules = schemas.AddNewSchedulesModel(
+        time_stamps=[START + timedelta(hours=2)], assets={"Sparse 1": [{"p": 100.0}]}
+    )
+    # a worker whose cache is not discarded sees the new revision of the scenario
+    with mock.patch.object(series_cache, "discard"):
+        controller.add_schedules(db, "sce1", "sce1_feeder_0", new_schedules)
+    assert len(cache) > 0
+
+    assert _read(db, 2, 2, asset_name="Sparse 1").assets["Sparse 1"] == [{"p": 100.0}]
+
+
+def test_deleted_scenario_is_not_found(db, cache):
+    _read(db, 0, 23)
+    controller.delete_scenario(db, "sce1")
+
+    assert len(cache) == 0
+    with pytest.raises(exceptions.ScenarioNotFoundException):
+        _read(db, 0, 23)
@@ -0,0 +1,180 @@
+import os
+import stat
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+
+from idp_schedule_provider import metrics
+from idp_schedule_provider.forecaster import (
+    controller,
+    exceptions,
+    schemas,
+    series,
+    shared_cache,
+)
+from idp_schedule_provider.forecaster.schemas import (
+    GetSchedulesResponseModel,
+    InterpolationMethod,
+    SamplingMode,
+    TimeInterval,
+)
+
+START = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture()
+def seed_spec():
+    return dict(feeders=2, assets_per_feeder=4, days=3, seed=9)
+
+
+@pytest.fixture()
+def cache_path(tmp_path, settings_env):
+    path = str(tmp_path / "cache.db")
+    settings_env(SHARED_CACHE_PATH=path)
+    return path
+
+
+def _read(db, time_interval=TimeInterval.HOUR_1, **kwargs):
+    return controller.get_asset_data(
+        db,
+        "sce1",
+        START,
+        START + timedelta(hours=71),
+        time_interval,
+        InterpolationMethod.LINEAR,
+        SamplingMode.WEIGHTED_AVERAGE,
+        **kwargs,
+    ).to_response_model()
+
+
+def _requests(result):
+    return metrics.CACHE_REQUESTS.samples().get(("shared", result), 0)
+
+
+def _stages(stage):
+    return sum(metrics.SCHEDULE_STAGE_LATENCY.samples().get((stage,), [0])[:-1])
+
+
+@pytest.mark.parametrize(
+    "time_interval", [TimeInterval.MIN_15, TimeInterval.HOUR_1, TimeInterval.DAY_1]
+)
+def test_shared_reads_match_database(seeded_db, settings_env, tmp_path, time_interval):
+    stored = _read(seeded_db, time_interval)
+
+    settings_env(SHARED_CACHE_PATH=str(tmp_path / "cache.seeded_db"))
+    hits = _requests("hit")
+    assert _read(seeded_db, time_interval) == stored
+    assert _read(seeded_db, time_interval) == stored
+    assert _requests("hit") == hits + 1
+
+
+def test_revision_lookup_is_its_own_stage(seeded_db, cache_path):
+    checks, lookups = _stages("scenario_check"), _stages("shared_cache_revision")
+    _read(seeded_db)
+    assert _stages("scenario_check") == checks + 1
+    assert _stages("shared_cache_revision") == lookups + 1
+
+    _read(seeded_db)
+    assert _stages("scenario_check") == checks + 1
+    assert _stages("shared_cache_revision") == lookups + 2
+
+
+def test_results_are_shared_by_workers(seeded_db, cache_path):
+    stored = _read(seeded_db)
+
+    # another worker has its own connection to the cache
+    shared_cache._cache.cache_clear()
+    with mock.patch.object(controller, "_resampled_asset_data") as read:
+        assert _read(seeded_db) == stored
+    read.assert_not_called()
+
+
+def test_failed_lookups_are_misses(seeded_db, cache_path):
+    stored = _read(seeded_db)
+    shared_cache.get_cache()._connection().execute("DROP TABLE results")
+
+    misses = _requests("miss")
+    assert _read(seeded_db) == stored
+    assert _requests("miss") == misses + 1
+
+
+def test_add_schedules_invalidates(seeded_db, cache_path):
+    stored = _read(seeded_db)
+    asset_name = next(iter(stored.assets))
+    new_schedules = schemas.AddNewSchedulesModel(
+        time_stamps=[START], assets={asset_name: [{"p": 100.0}]}
+    )
+    controller.add_schedules(seeded_db, "sce1", "sce1_feeder_0", new_schedules)
+    assert shared_cache.get_cache()._connection().execute(
+        "SELECT COUNT(*) FROM results"
+    ).fetchone() == (0,)
+
+    assert _read(seeded_db).assets[asset_name][0]["p"] == 100.0
+
+
+def test_writes_of_other_workers_invalidate(seeded_db, cache_path):
+    stored = _read(seeded_db)
+    asset_name = next(iter(stored.assets))
+    new_schedules = schemas.AddNewSchedulesModel(
+        time_stamps=[START], assets={asset_name: [{"p": 100.0}]}
+    )
+    # the results of the old revision are not read even when they are not deleted
+    with mock.patch.object(shared_cache, "discard"):
+        controller.add_schedules(seeded_db, "sce1", "sce1_feeder_0", new_schedules)
+
+    assert _read(seeded_db).assets[asset_name][0]["p"] == 100.0
+
+
+def test_deleted_scenario_is_not_found(seeded_db, cache_path):
+    _read(seeded_db)
+    controller.delete_scenario(seeded_db, "sce1")
+
+    with pytest.raises(exceptions.ScenarioNotFoundException):
+        _read(seeded_db)
+
+
+def test_oldest_results_are_deleted(tmp_path):
+    cache = shared_cache.SharedCache(str(tmp_path / "cache.seeded_db"), budget=250)
+    for key in ("a", "b", "c"):
+        cache.put(key, "sce1", bytes(100))
+    cache.put("d", "sce2", bytes(1000))
+
+    assert cache.get("a") is None
+    assert cache.get("b") == cache.get("c") == bytes(100)
+    assert cache.get("d") is None
+
+    cache.discard("sce1")
+    assert cache.get("b") is None
+
+
+def test_results_round_trip():
+    response = GetSchedulesResponseModel(
+        time_interval=TimeInterval.HOUR_1,
+        time_stamps=[START + timedelta(hours=hour) for hour in range(3)],
+        assets={
+            "asset_1": [{"p": 1, "q": {"A": 1, "B": None}}, {}, {"p": None, "q": None}],
+            "asset_2": [
+                {"cost": [{"x": 1, "y": 2}, {"x": 3, "y": 4}]},
+                {"cost": None},
+                {"cost": 2.5},
+            ],
+        },
+    )
+    data = series.ScheduleSeries.from_response_model(response)
+
+    stored = shared_cache.loads(shared_cache.dumps(data))
+    assert stored is not None
+    assert stored.to_response_model().json() == response.json()
+    assert {
+        variable: type(column) for variable, column in stored.assets["asset_1"].columns.items()
+    } == {"p": series.BalancedColumn, "q": series.UnbalancedColumn}
+    assert isinstance(stored.assets["asset_2"].columns["cost"], series.ObjectColumn)
+
+    assert shared_cache.loads(b"not a result") is None
+
+
+def test_cache_is_private(tmp_path):
+    path = str(tmp_path / "cache.db")
+    shared_cache.SharedCache(path, budget=250)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
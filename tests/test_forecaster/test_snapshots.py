@@ -0,0 +1,155 @@
+import os
+import pickle
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from idp_schedule_provider.forecaster import controller, exceptions, schemas, snapshots
+from idp_schedule_provider.forecaster.models import Base
+from idp_schedule_provider.forecaster.schemas import (
+    InterpolationMethod,
+    SamplingMode,
+    TimeInterval,
+)
+from idp_schedule_provider.forecaster.seed_data import synthetic
+
+START = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture()
+def seed_spec():
+    return dict(feeders=2, assets_per_feeder=4, days=2, seed=5)
+
+
+@pytest.fixture()
+def db(seeded_db, tmp_path, settings_env):
+    settings_env(SNAPSHOT_DIR=str(tmp_path / "snapshots"))
+    # an asset with an entry every 5 hours and cost curves
+    for hour in range(1, 48, 5):
+        new_schedules = schemas.AddNewSchedulesModel(
+            time_stamps=[START + timedelta(hours=hour)],
+            assets={"Sparse 1": [{"p": hour, "cost": [{"x": 1, "y": hour}], "mode": None}]},
+        )
+        controller.add_schedules(seeded_db, "sce1", "feeder_0", new_schedules)
+    seeded_db.commit()
+    return seeded_db
+
+
+def _read(db, start_time, end_time, time_interval, **kwargs):
+    return controller.get_asset_data(
+        db,
+        "sce1",
+        start_time,
+        end_time,
+        time_interval,
+        InterpolationMethod.LINEAR,
+        SamplingMode.WEIGHTED_AVERAGE,
+        **kwargs,
+    ).to_response_model()
+
+
+@pytest.mark.parametrize(
+    "time_interval", [TimeInterval.MIN_15, TimeInterval.HOUR_1, TimeInterval.DAY_1]
+)
+@pytest.mark.parametrize(
+    "start_hour, end_hour, kwargs",
+    [
+        (0, 47, {}),
+        (3, 20, {"feeders": ["feeder_1"]}),
+        (0, 47, {"variables": ["p", "cost"]}),
+        (2, 30, {"asset_name": "Sparse 1"}),
+        (100, 120, {}),
+    ],
+)
+def test_snapshot_reads_match_database(db, time_interval, start_hour, end_hour, kwargs):
+    start_time = START + timedelta(hours=start_hour)
+    end_time = START + timedelta(hours=end_hour)
+    stored = _read(db, start_time, end_time, time_interval, **kwargs)
+
+    snapshots.freeze(db, "sce1")
+    snapshot = snapshots.get("sce1")
+    assert snapshot is not None
+    assert snapshot.read(start_time, end_time, time_interval, **kwargs) is not None
+    assert _read(db, start_time, end_time, time_interval, **kwargs) == stored
+
+
+def test_snapshot_reads_other_time_zones(db):
+    time_zone = timezone(timedelta(hours=10))
+    start_time = datetime(2000, 1, 1, 12, tzinfo=time_zone)
+    end_time = datetime(2000, 1, 2, 3, tzinfo=time_zone)
+    stored = _read(db, start_time, end_time, TimeInterval.HOUR_1)
+
+    snapshots.freeze(db, "sce1")
+    assert _read(db, start_time, end_time, TimeInterval.HOUR_1) == stored
+    assert stored.time_stamps[0] == start_time
+
+
+def test_snapshot_columns_are_views(db):
+    snapshots.freeze(db, "sce1")
+    data = snapshots.get("sce1").read(START, START + timedelta(hours=47), TimeInterval.HOUR_1)
+    column = data.assets["Sparse 1"].columns["p"]
+    assert isinstance(column.values, memoryview)
+    # process pool workers get copies of the views
+    copied = pickle.loads(pickle.dumps(data))
+    assert copied.assets["Sparse 1"].entry(1) == data.assets["Sparse 1"].entry(1)
+
+
+def test_snapshot_is_reopened_after_freeze(db):
+    path = snapshots.freeze(db, "sce1")
+    first = snapshots.get("sce1")
+    assert snapshots.get("sce1") is first
+
+    os.utime(path, ns=(0, 0))
+    assert snapshots.get("sce1") is not first
+
+
+def test_add_schedules_discards_snapshot(db):
+    path = snapshots.freeze(db, "sce1")
+    new_schedules = schemas.AddNewSchedulesModel(
+        time_stamps=[START], assets={"Sparse 1": [{"p": 100.0}]}
+    )
+    controller.add_schedules(db, "sce1", "feeder_0", new_schedules)
+
+    assert not os.path.exists(path)
+    assert snapshots.get("sce1") is None
+    response = _read(db, START, START, TimeInterval.HOUR_1, asset_name="Sparse 1")
+    assert response.assets["Sparse 1"][0]["p"] == 100.0
+
+
+def test_delete_scenario_discards_snapshot(db):
+    path = snapshots.freeze(db, "sce1")
+    controller.delete_scenario(db, "sce1")
+    assert not os.path.exists(path)
+
+
+def test_snapshot_of_dropped_scenario_is_not_read(db):
+    snapshots.freeze(db, "sce1")
+    Base.metadata.drop_all(db.get_bind())
+    Base.metadata.create_all(db.get_bind())
+
+    with pytest.raises(exceptions.ScenarioNotFoundException):
+        _read(db, START, START + timedelta(hours=47), TimeInterval.HOUR_1)
+
+
+def test_snapshot_of_seeded_again_scenario_is_not_read(db):
+    snapshots.freeze(db, "sce1")
+    db.close()
+    Base.metadata.drop_all(db.get_bind())
+    Base.metadata.create_all(db.get_bind())
+    spec = schemas.SyntheticSeedModel(
+        scenario_id="sce1", feeders=1, assets_per_feeder=1, days=2, events_per_day=0, seed=6
+    )
+    synthetic.generate(db, spec)
+    db.commit()
+
+    response = _read(db, START, START + timedelta(hours=47), TimeInterval.HOUR_1)
+    assert len(response.assets) == 1
+    # the file is kept until the scenario is frozen again or its snapshot is discarded
+    assert snapshots.get("sce1") is not None
+
+
+def test_freeze_requires_snapshot_dir(db, settings_env):
+    settings_env(SNAPSHOT_DIR="")
+    with pytest.raises(ValueError):
+        snapshots.freeze(db, "sce1")
+    assert snapshots.get("sce1") is None
@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+
+from idp_schedule_provider.forecaster import streaming
+from idp_schedule_provider.forecaster.schemas import (
+    GetSchedulesResponseModel,
+    TimeInterval,
+)
+
+
+def test_schedule_json_chunks_match_model_json():
+    response = GetSchedulesResponseModel(
+        time_interval=TimeInterval.HOUR_1,
+        time_stamps=[
+            datetime(2000, 1, 1, 0, tzinfo=timezone.utc),
+            datetime(2000, 1, 1, 1, tzinfo=timezone.utc),
+        ],
+        assets={
+            "asset_1": [{"p": 1, "q": {"A": 1, "B": 2}}, {}],
+            "asset_2": [
+                {"cost": [{"x": 1, "y": 2}, {"x": 3, "y": 4}]},
+                {"p": None},
+            ],
+        },
+    )
+
+    chunks = list(
+        streaming.schedule_json_chunks(
+            response.time_interval, response.time_stamps, response.assets.items(), chunk_size=16
+        )
+    )
+
+    assert len(chunks) > 1
+    assert b"".join(chunks) == response.json().encode()
@@ -0,0 +1,33 @@
+from sqlalchemy.orm import Session
+
+from idp_schedule_provider.forecaster import schemas
+from idp_schedule_provider.forecaster.models import Assets, EventData, ScheduleData
+from idp_schedule_provider.forecaster.seed_data import synthetic
+
+
+def _stored(db: Session):
+    schedules = (
+        db.query(Assets.name, ScheduleData.timestamp, ScheduleData.data)
+        .join(Assets, ScheduleData.asset_key == Assets.key)
+        .order_by(Assets.name, ScheduleData.timestamp)
+        .all()
+    )
+    events = db.query(EventData.start_timestamp, EventData.data).order_by(EventData.id).all()
+    return [tuple(row) for row in schedules], [tuple(row) for row in events]
+
+
+def test_generate_is_deterministic(database_client: Session):
+    spec = schemas.SyntheticSeedModel(
+        feeders=2, assets_per_feeder=5, days=2, events_per_day=2, seed=7
+    )
+
+    assert synthetic.generate(database_client, spec)[0] == 2 * 5 * 2 * 24
+    first = _stored(database_client)
+    synthetic.generate(database_client, spec)
+    assert _stored(database_client) == first
+    assert first[1]
+
+    synthetic.generate(database_client, spec.copy(update={"seed": 8}))
+    assert _stored(database_client) != first
+    names = {name for name, *_ in first[0]}
+    assert all(any(mix.value in name for name in names) for mix in schemas.SeedVariableMix)
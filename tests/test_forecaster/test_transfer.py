@@ -0,0 +1,92 @@
+import json
+
+import pytest
+from sqlalchemy.orm import Session
+
+from idp_schedule_provider.forecaster import exceptions, transfer
+from idp_schedule_provider.forecaster.models import (
+    Assets,
+    EventData,
+    Scenarios,
+    ScheduleData,
+)
+
+COUNTS = {"schedules": 2 * 3 * 48, "events": 8}
+
+
+@pytest.fixture()
+def seed_spec():
+    return dict(feeders=2, assets_per_feeder=3, days=2, events_per_day=1, seed=3)
+
+
+def _stored(seeded_engine, scenario_id):
+    with Session(bind=seeded_engine) as db:
+        schedules = (
+            db.query(Assets.name, ScheduleData.timestamp, ScheduleData.data)
+            .join(Assets, ScheduleData.asset_key == Assets.key)
+            .join(Scenarios, ScheduleData.scenario_key == Scenarios.key)
+            .filter(Scenarios.id == scenario_id)
+            .order_by(Assets.name, ScheduleData.timestamp)
+            .all()
+        )
+        events = (
+            db.query(Assets.name, EventData.event_type, EventData.start_timestamp, EventData.data)
+            .join(Assets, EventData.asset_key == Assets.key)
+            .join(Scenarios, EventData.scenario_key == Scenarios.key)
+            .filter(Scenarios.id == scenario_id)
+            .order_by(Assets.name, EventData.start_timestamp)
+            .all()
+        )
+        return [(*row[:-1], dict(row[-1])) for row in schedules + events]
+
+
+@pytest.mark.parametrize("file_format", ["csv", "ndjson"])
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_round_trip(seeded_engine, tmp_path, file_format, jobs):
+    directory = str(tmp_path / "export")
+    assert transfer.export_scenario(seeded_engine, "sce1", directory, file_format, jobs) == COUNTS
+
+    assert transfer.import_scenario(seeded_engine, directory, "sce2", jobs) == COUNTS
+    assert _stored(seeded_engine, "sce2") == _stored(seeded_engine, "sce1")
+    # replaces the scenario
+    assert transfer.import_scenario(seeded_engine, directory, jobs=jobs) == COUNTS
+    assert len(_stored(seeded_engine, "sce1")) == sum(COUNTS.values())
+
+
+def test_import_checks_row_counts(seeded_engine, tmp_path):
+    directory = tmp_path / "export"
+    transfer.export_scenario(seeded_engine, "sce1", str(directory))
+    manifest = json.loads((directory / transfer.MANIFEST).read_text())
+    manifest.update(id="sce2", name="Scenario 2")
+    manifest["files"]["schedules/0000_sce1_feeder_0.csv"] += 1
+    (directory / transfer.MANIFEST).write_text(json.dumps(manifest))
+
+    with pytest.raises(exceptions.TransferException):
+        transfer.import_scenario(seeded_engine, str(directory))
+    assert _stored(seeded_engine, "sce2") == []
+
+
+def test_import_without_manifest(seeded_engine, tmp_path):
+    directory = tmp_path / "import"
+    (directory / "schedules").mkdir(parents=True)
+    (directory / "schedules" / "feeder.csv").write_text(
+        "feeder,asset_name,timestamp,data\n"
+        'f1,a1,2022-01-01T00:00:00Z,"{""p"": 1.5}"\n'
+        'f1,a1,2022-01-01T01:00:00,"{""p"": 2.5}"\n'
+    )
+
+    with pytest.raises(exceptions.TransferException):
+        transfer.import_scenario(seeded_engine, str(directory))
+    assert transfer.import_scenario(seeded_engine, str(directory), "sce2") == {
+        "schedules": 2,
+        "events": 0,
+    }
+    assert [(name, data) for name, _, data in _stored(seeded_engine, "sce2")] == [
+        ("a1", {"p": 1.5}),
+        ("a1", {"p": 2.5}),
+    ]
+
+
+def test_export_unknown_scenario(seeded_engine, tmp_path):
+    with pytest.raises(exceptions.ScenarioNotFoundException):
+        transfer.export_scenario(seeded_engine, "unknown", str(tmp_path))
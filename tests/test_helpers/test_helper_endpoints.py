@@ -186,3 +186,34 @@ def test_add_event(test_client, scenario_seed):
             "event_type": "electric_vehicle_charge",
         }
     ]
+
+
+def test_seed_data(test_client, database_client):
+    rsp = test_client.post("/seed_data")
+    assert rsp.status_code == 204
+
+    rsp = test_client.get("/scenarios")
+    assert {"sce1", "sce2", "12345"} <= rsp.json()["scenarios"].keys()
+    rsp = test_client.get("/sce1/asset_schedules/timespan")
+    assert rsp.json()["assets"]["asset_1"] == {
+        "start_datetime": "2000-01-01T00:00:00+00:00",
+        "end_datetime": "2000-12-28T23:00:00+00:00",
+    }
+    rsp = test_client.get("/12345/asset_events/timespan")
+    assert len(rsp.json()["assets"]) == 2
+
+
+def test_seed_synthetic(test_client, database_client):
+    spec = {"scenario_id": "synthetic", "feeders": 1, "assets_per_feeder": 2, "days": 1}
+    rsp = test_client.post("/seed_data/synthetic", json=spec)
+    assert rsp.status_code == 204
+
+    rsp = test_client.get("/synthetic/asset_schedules/timespan")
+    assert rsp.status_code == 200
+    assert len(rsp.json()["assets"]) == 2
+
+
+def test_seed_synthetic_is_bounded(test_client, database_client):
+    spec = {"scenario_id": "synthetic", "feeders": 1, "assets_per_feeder": 2, "days": 3650}
+    rsp = test_client.post("/seed_data/synthetic", json=spec)
+    assert rsp.status_code == 422
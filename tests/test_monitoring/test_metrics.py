@@ -0,0 +1,103 @@
+import json
+import os
+from datetime import datetime, timezone
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from idp_schedule_provider import metrics
+from idp_schedule_provider.config import get_settings
+from idp_schedule_provider.forecaster.schemas import (
+    InterpolationMethod,
+    SamplingMode,
+    TimeInterval,
+)
+
+
+def test_histogram_render():
+    histogram = metrics.Histogram("test_latency", "test", ["route"], buckets=[0.1, 1.0])
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.1, "/a")
+    histogram.observe(5.0, "/a")
+
+    assert histogram.render(histogram.samples()) == [
+        'test_latency_bucket{route="/a",le="0.1"} 2.0',
+        'test_latency_bucket{route="/a",le="1.0"} 2.0',
+        'test_latency_bucket{route="/a",le="+Inf"} 3.0',
+        'test_latency_count{route="/a"} 3.0',
+        'test_latency_sum{route="/a"} 5.15',
+    ]
+
+
+def test_metrics_implement_rendering():
+    class Gauge(metrics.Metric):
+        def samples(self):
+            return {}
+
+    with pytest.raises(TypeError):
+        Gauge("test_gauge", "test")
+
+
+def test_metrics_are_aggregated_across_workers(tmp_path):
+    registry = metrics.Registry(flush_interval=0)
+    counter = registry.register(metrics.Counter("test_requests_total", "test", ["route"]))
+    counter.inc("/a", amount=2)
+
+    # a snapshot published by another worker
+    with open(tmp_path / "metrics_1.json", "w") as f:
+        json.dump({"test_requests_total": [[["/a"], 3], [["/b"], 1]]}, f)
+
+    with mock.patch.dict(os.environ, {"METRICS_DIR": str(tmp_path)}):
+        get_settings.cache_clear()
+        registry.maybe_publish()
+        rendered = registry.render()
+    get_settings.cache_clear()
+
+    assert (tmp_path / f"metrics_{os.getpid()}.json").exists()
+    assert 'test_requests_total{route="/a"} 5' in rendered
+    assert 'test_requests_total{route="/b"} 1' in rendered
+
+
+def test_metrics_of_stopped_workers_are_not_aggregated(tmp_path, settings_env):
+    settings_env(METRICS_DIR=str(tmp_path))
+    registry = metrics.Registry(flush_interval=0, stale_after=60)
+    registry.register(metrics.Counter("test_requests_total", "test", ["route"]))
+
+    # a snapshot of a worker which was killed a while ago
+    with open(tmp_path / "metrics_1.json", "w") as f:
+        json.dump({"test_requests_total": [[["/a"], 3]]}, f)
+    os.utime(tmp_path / "metrics_1.json", (0, 0))
+    assert 'route="/a"' not in registry.render()
+
+    # the snapshot of a worker is deleted when it exits
+    with mock.patch("atexit.register") as register:
+        registry.maybe_publish()
+    assert (tmp_path / f"metrics_{os.getpid()}.json").exists()
+    unpublish, path = register.call_args.args
+    unpublish(path)
+    assert not (tmp_path / f"metrics_{os.getpid()}.json").exists()
+
+
+def test_metrics_endpoint(test_client: TestClient, scenario_seed):
+    response = test_client.get(
+        f"/{scenario_seed.id}/asset_schedules",
+        params={
+            "start_datetime": datetime(2000, 1, 1, tzinfo=timezone.utc),
+            "end_datetime": datetime(2000, 1, 1, 23, 59, 59, 999999, tzinfo=timezone.utc),
+            "time_interval": TimeInterval.HOUR_1.value,
+            "interpolation_method": InterpolationMethod.LINEAR.value,
+            "sampling_mode": SamplingMode.HOLD_FIRST.value,
+            "feeders": ["f1"],
+        },
+    )
+    assert response.status_code == 200
+
+    response = test_client.get("/metrics")
+    assert response.status_code == 200
+    assert (
+        'idp_http_requests_total{method="GET",route="/{scenario}/asset_schedules",status="200"}'
+        in response.text
+    )
+    for stage in ["scenario_check", "query", "build_response", "resample", "serialize"]:
+        assert f'idp_schedule_stage_duration_seconds_count{{stage="{stage}"}}' in response.text
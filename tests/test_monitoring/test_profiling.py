@@ -0,0 +1,35 @@
+import pstats
+
+from fastapi.testclient import TestClient
+
+
+def test_profiling_disabled(test_client: TestClient, settings_env, tmp_path):
+    settings_env(PROFILE_DIR=str(tmp_path))
+    response = test_client.get("/", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profiling_requires_token(test_client: TestClient, settings_env, tmp_path):
+    settings_env(PROFILING_TOKEN="secret", PROFILE_DIR=str(tmp_path))
+    response = test_client.get("/", headers={"X-Profile": "not the secret"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+
+    response = test_client.get("/", headers={"X-Profile": "s\xe9cret"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_profile_request(test_client: TestClient, scenario_seed, settings_env, tmp_path):
+    settings_env(PROFILING_TOKEN="secret", PROFILE_DIR=str(tmp_path))
+    response = test_client.get(
+        f"/{scenario_seed.id}/asset_schedules/timespan",
+        headers={"X-Profile": "secret", "X-Request-ID": "request-1"},
+    )
+    assert response.status_code == 200
+    assert response.headers["X-Profile-Id"] == "request-1"
+
+    stats = pstats.Stats(str(tmp_path / "request-1.prof"))
+    assert any(name == "get_asset_timespan" for _, _, name in stats.stats)
@@ -0,0 +1,24 @@
+import logging
+
+from fastapi.testclient import TestClient
+
+
+def test_server_timing_header(test_client: TestClient, scenario_seed, settings_env):
+    response = test_client.get(f"/{scenario_seed.id}/asset_schedules/timespan")
+    assert "Server-Timing" not in response.headers
+
+    settings_env(DEBUG="true")
+    response = test_client.get(f"/{scenario_seed.id}/asset_schedules/timespan")
+    assert response.status_code == 200
+    # checking the scenario and querying the timespan
+    assert response.headers["Server-Timing"].startswith('db;desc="2 queries";dur=')
+
+
+def test_slow_query_log(test_client: TestClient, scenario_seed, settings_env, caplog):
+    settings_env(SLOW_QUERY_THRESHOLD_MS="0")
+    with caplog.at_level(logging.WARNING, logger="idp_schedule_provider.slow_query"):
+        response = test_client.get(f"/{scenario_seed.id}/asset_schedules/timespan")
+    assert response.status_code == 200
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("FROM schedule_data" in message and "SEARCH" in message for message in messages)
@@ -0,0 +1,24 @@
+from unittest import mock
+
+from idp_schedule_provider import main, startup
+
+
+def test_startup_steps(settings_env, capsys):
+    settings_env(PROFILE_STARTUP="true")
+    with mock.patch.object(main.models, "init_db") as init_db, mock.patch.object(
+        startup, "STEPS", [("routes", 0.002)]
+    ):
+        main.initialize()
+
+        init_db.assert_called_once_with()
+        assert [name for name, _ in startup.STEPS] == ["routes", "init_db"]
+
+    lines = capsys.readouterr().err.splitlines()
+    assert lines[0] == "startup step:       2000 | routes"
+    assert lines[1].startswith("startup step:") and lines[1].endswith("| init_db")
+
+
+def test_startup_report_disabled(capsys):
+    startup.report()
+
+    assert capsys.readouterr().err == ""